@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Prefix completion and spelling suggestions for search queries.
+
+The build takes the corpus vocabulary and its frequent phrases from the
+token corpus (`tokens/`). Phrases are bigrams and trigrams that do not
+start or end with a stopword. Each entry is weighted by how often it
+occurs. Lookups need no scan of the transcripts:
+
+- Completion: the entries are stored sorted, so this is a prefix trie
+  flattened into one array. Every trie node (prefix) is a contiguous range
+  of entries, found with two binary searches. Small ranges are ranked on
+  the fly. Nodes whose range is larger than SCAN_LIMIT store their top
+  completions precomputed.
+- Correction: symmetric delete. Every term is indexed under all strings
+  reachable by deleting up to MAX_EDIT_DISTANCE characters, stored as
+  sorted CRC32 keys. A misspelled word generates its own deletes, looks
+  them up with one vectorized binary search, and ranks the candidates by
+  verified edit distance (adjacent transpositions count as one edit), then
+  by how well they fit the neighbouring words, then by frequency.
+
+Both answer in a few microseconds to well under a millisecond
+("prodcut market fit" -> "product market fit").
+
+Usage:
+    python3 autocomplete.py --build
+    python3 autocomplete.py "product ma"                 # completions
+    python3 autocomplete.py --correct "prodcut market fit"
+    python3 autocomplete.py --benchmark
+"""
+
+import argparse
+import bisect
+import json
+import random
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from text_features import TOKEN_RE
+from token_corpus import TOKENS_DIR, TokenCorpus
+
+# Configuration
+AUTOCOMPLETE_DIR = Path(__file__).parent / "knowledge_base" / "autocomplete"
+ENTRIES_FILE = "entries.txt"
+WEIGHTS_FILE = "weights.npy"
+PREFIXES_FILE = "prefixes.txt"
+TOP_FILE = "top.npy"
+DELETES_FILE = "deletes.npy"
+MANIFEST_FILE = "manifest.json"
+MIN_TERM_COUNT = 2       # words seen once are mostly transcription noise
+MIN_PHRASE_COUNT = 5
+PHRASE_LENGTHS = (2, 3)
+MAX_EDIT_DISTANCE = 2
+SHORT_WORD = 5           # words up to this length are corrected within distance 1
+SCAN_LIMIT = 256         # prefixes matching more entries than this have precomputed completions
+MAX_COMPLETIONS = 10
+
+DELETE_DTYPE = np.dtype([('key', '<u4'), ('term', '<i4'), ('depth', 'u1')])
+
+
+def normalize(text: str) -> List[str]:
+    """Query words in the token corpus's form (lowercase TOKEN_RE tokens)."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def deletes(word: str, distance: int) -> Dict[str, int]:
+    """Every string made by deleting up to `distance` characters of the word -> fewest deletions needed."""
+    variants = {word: 0}
+    level = {word}
+    for depth in range(1, distance + 1):
+        level = {variant[:i] + variant[i + 1:] for variant in level for i in range(len(variant))}
+        for variant in level:
+            variants.setdefault(variant, depth)
+    return variants
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (adjacent transpositions cost 1); limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if cost and previous2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def _top(weights: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest weights, best first (ties in entry order)."""
+    if len(weights) > k:
+        candidates = np.argpartition(-weights, k - 1)[:k]
+        return candidates[np.lexsort((candidates, -weights[candidates]))]
+    return np.lexsort((np.arange(len(weights)), -weights))
+
+
+def build_autocomplete(tokens_dir: Path = TOKENS_DIR, output_dir: Path = AUTOCOMPLETE_DIR) -> Path:
+    """Write the completion entries, precomputed top completions and delete index."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    corpus = TokenCorpus(tokens_dir)
+
+    weights: Dict[str, int] = {}
+    term_ids = np.flatnonzero(corpus.counts >= MIN_TERM_COUNT)
+    term_ids = term_ids[term_ids != 0]  # the break id
+    terms = [corpus.terms[i] for i in term_ids]
+    for term, count in zip(terms, corpus.counts[term_ids]):
+        weights[term] = int(count)
+    for n in PHRASE_LENGTHS:
+        keys, counts = corpus.ngram_counts(n)
+        first, last = corpus._edges(keys, n)
+        keep = (counts >= MIN_PHRASE_COUNT) & ~(corpus.stop[first] | corpus.stop[last])
+        for key, count in zip(keys[keep], counts[keep]):
+            weights[corpus.decode(key, n)] = int(count)
+
+    entries = sorted(weights)
+    entry_weights = np.array([weights[entry] for entry in entries], dtype=np.uint32)
+
+    # Trie nodes with large ranges: group entries by their first `depth` characters
+    prefixes, top = [], []
+    depth = 1
+    while True:
+        large = False
+        start = 0
+        while start < len(entries):
+            prefix = entries[start][:depth]
+            if len(prefix) < depth:
+                # A complete entry shorter than the depth sorts before its longer neighbours
+                start += 1
+                continue
+            end = bisect.bisect_left(entries, prefix + '\uffff', start)
+            if end - start > SCAN_LIMIT:
+                large = True
+                prefixes.append(prefix)
+                best = start + _top(entry_weights[start:end], MAX_COMPLETIONS)
+                top.append(best)
+            start = end
+        if not large:
+            break
+        depth += 1
+    order = np.argsort(prefixes, kind='stable')
+    prefixes = [prefixes[i] for i in order]
+    top = np.array([top[i] for i in order], dtype=np.int32).reshape(len(prefixes), MAX_COMPLETIONS)
+
+    # Symmetric delete index over the single terms
+    records = []
+    for term_id, term in enumerate(terms):
+        for variant, depth in deletes(term, MAX_EDIT_DISTANCE).items():
+            records.append((zlib.crc32(variant.encode('utf-8')), term_id, depth))
+    delete_index = np.array(records, dtype=DELETE_DTYPE)
+    delete_index.sort(order=['key', 'term'])
+
+    with open(output_dir / ENTRIES_FILE, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(entries) + '\n')
+    with open(output_dir / PREFIXES_FILE, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(prefixes) + '\n')
+    np.save(output_dir / WEIGHTS_FILE, entry_weights)
+    np.save(output_dir / TOP_FILE, top)
+    np.save(output_dir / DELETES_FILE, delete_index)
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_entries': len(entries),
+            'total_terms': len(terms),
+            'total_phrases': len(entries) - len(terms),
+            'precomputed_prefixes': len(prefixes),
+            'delete_keys': len(delete_index),
+            'terms': terms,
+            'min_term_count': MIN_TERM_COUNT,
+            'min_phrase_count': MIN_PHRASE_COUNT,
+            'max_edit_distance': MAX_EDIT_DISTANCE,
+            'scan_limit': SCAN_LIMIT,
+            'max_completions': MAX_COMPLETIONS,
+            'description': 'Frequency-weighted prefix completion and symmetric-delete spelling correction'
+        }, f, indent=2, ensure_ascii=False)
+
+    return output_dir
+
+
+class Autocomplete:
+    """Reader for an index built by build_autocomplete."""
+
+    def __init__(self, directory: Path = AUTOCOMPLETE_DIR):
+        directory = Path(directory)
+        with open(directory / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        with open(directory / ENTRIES_FILE, 'r', encoding='utf-8') as f:
+            self.entries: List[str] = f.read().split('\n')[:-1]
+        with open(directory / PREFIXES_FILE, 'r', encoding='utf-8') as f:
+            self.prefixes = {prefix: row for row, prefix in enumerate(f.read().split('\n')[:-1])}
+        self.weights = np.load(directory / WEIGHTS_FILE)
+        self.top = np.load(directory / TOP_FILE)
+        delete_index = np.load(directory / DELETES_FILE)
+        # Contiguous copies: binary search over a strided field view is several times slower
+        self.delete_keys = np.ascontiguousarray(delete_index['key'])
+        self.delete_terms = np.ascontiguousarray(delete_index['term'])
+        self.delete_depths = np.ascontiguousarray(delete_index['depth'])
+        self.terms: List[str] = self.manifest['terms']
+        self.term_weights = np.array([self.weight(term) for term in self.terms], dtype=np.int64)
+
+    def weight(self, entry: str) -> int:
+        """Frequency of a term or phrase (0 if it is not indexed)."""
+        i = bisect.bisect_left(self.entries, entry)
+        return int(self.weights[i]) if i < len(self.entries) and self.entries[i] == entry else 0
+
+    def complete(self, prefix: str, top_k: int = MAX_COMPLETIONS) -> List[Tuple[str, int]]:
+        """Most frequent terms and phrases starting with `prefix` (normalized like queries)."""
+        prefix = ' '.join(normalize(prefix)) + (' ' if prefix[-1:].isspace() and prefix.strip() else '')
+        if not prefix:
+            return []
+        lo = bisect.bisect_left(self.entries, prefix)
+        hi = bisect.bisect_left(self.entries, prefix + '\uffff', lo)
+        if hi - lo > SCAN_LIMIT and top_k <= self.top.shape[1]:
+            best = self.top[self.prefixes[prefix]][:top_k]
+        else:
+            best = lo + _top(self.weights[lo:hi], top_k)
+        return [(self.entries[i], int(self.weights[i])) for i in best]
+
+    def candidates(self, word: str, max_distance: int = MAX_EDIT_DISTANCE,
+                   closest: bool = False) -> List[Tuple[str, int, int]]:
+        """(term, edit distance, frequency) of indexed terms within max_distance, closest first.
+
+        A term within d edits shares a delete of at most d characters on each
+        side, so candidates are verified in stages d = 0, 1, ...; with
+        closest=True the search stops at the first stage that finds any.
+        """
+        variants = deletes(word, max_distance)
+        keys = np.array([zlib.crc32(v.encode('utf-8')) for v in variants], dtype=np.uint32)
+        lo = np.searchsorted(self.delete_keys, keys, side='left')
+        counts = np.searchsorted(self.delete_keys, keys, side='right') - lo
+        if not counts.any():
+            return []
+        positions = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+        stages = np.maximum(np.repeat(np.fromiter(variants.values(), dtype=np.uint8, count=len(variants)), counts),
+                            self.delete_depths[positions])
+        terms = self.delete_terms[positions]
+        # First stage at which each term shows up
+        order = np.lexsort((stages, terms))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = terms[order][1:] != terms[order][:-1]
+        terms, stages = terms[order][first], stages[order][first]
+
+        results = []
+        for stage in range(max_distance + 1):
+            for term_id in terms[stages == stage].tolist():
+                term = self.terms[term_id]
+                distance = edit_distance(word, term, max_distance)
+                if distance <= max_distance:
+                    results.append((term, distance, int(self.term_weights[term_id])))
+            if closest and any(distance <= stage for _, distance, _ in results):
+                break
+        results.sort(key=lambda r: (r[1], -r[2]))
+        return results
+
+    def correct(self, query: str) -> str:
+        """The lowercased query with unknown words replaced by the closest, best-fitting indexed terms.
+
+        Spacing and punctuation are kept ("prodcut-market fit" -> "product-market fit").
+        """
+        text = query.lower()
+        matches = list(TOKEN_RE.finditer(text))
+        words = [m.group() for m in matches]
+        corrected = list(words)
+        for i, word in enumerate(words):
+            if self.weight(word) or word.isdigit():
+                continue
+            distance = 1 if len(word) <= SHORT_WORD else MAX_EDIT_DISTANCE
+            found = self.candidates(word, distance, closest=True)
+            if not found:
+                continue
+            closest = [c for c in found if c[1] == found[0][1]]
+            previous = corrected[i - 1] if i > 0 else None
+            following = words[i + 1] if i + 1 < len(words) else None
+
+            def context(candidate: Tuple[str, int, int]) -> int:
+                """Frequency of the phrases the candidate forms with its neighbours."""
+                term = candidate[0]
+                score = 0
+                if previous:
+                    score += self.weight(f"{previous} {term}")
+                if following:
+                    score += self.weight(f"{term} {following}")
+                return score
+
+            corrected[i] = max(closest, key=lambda c: (context(c), c[2]))[0]
+
+        parts, end = [], 0
+        for match, word in zip(matches, corrected):
+            parts += [text[end:match.start()], word]
+            end = match.end()
+        return ''.join(parts) + text[end:]
+
+    def suggest(self, query: str, top_k: int = 5) -> Dict[str, object]:
+        """Spelling correction (None if the query looks right) plus completions of the corrected query."""
+        corrected = self.correct(query)
+        return {'query': query, 'corrected': corrected if corrected != query.lower() else None,
+                'completions': self.complete(corrected, top_k)}
+
+
+def benchmark(index: Autocomplete, samples: int = 2000, seed: int = 0):
+    """Latency of completion (random entry prefixes) and correction (random one- and two-edit typos)."""
+    rng = random.Random(seed)
+    frequent = [term for term in index.terms if len(term) >= 5][:5000]
+    prefixes = []
+    for _ in range(samples):
+        entry = rng.choice(index.entries)
+        prefixes.append(entry[:rng.randint(1, len(entry))])
+    typos = []
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    for _ in range(samples):
+        word = list(rng.choice(frequent))
+        for _ in range(rng.randint(1, 2)):
+            i = rng.randrange(len(word) - 1)
+            edit = rng.choice(['swap', 'drop', 'insert', 'replace'])
+            if edit == 'swap':
+                word[i], word[i + 1] = word[i + 1], word[i]
+            elif edit == 'drop':
+                del word[i]
+            elif edit == 'insert':
+                word.insert(i, rng.choice(letters))
+            else:
+                word[i] = rng.choice(letters)
+        typos.append(''.join(word))
+
+    for name, function, inputs in (('complete', index.complete, prefixes), ('correct', index.correct, typos)):
+        timings = []
+        for text in inputs:
+            started = time.perf_counter()
+            function(text)
+            timings.append(time.perf_counter() - started)
+        p50, p99 = np.percentile(timings, [50, 99]) * 1e6
+        print(f"{name:<10} p50 {p50:7.1f} µs   p99 {p99:7.1f} µs   ({len(inputs):,} queries)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query autocomplete and spelling suggestions")
+    parser.add_argument('query', nargs='?', help='Prefix to complete (a trailing space completes the next word)')
+    parser.add_argument('--correct', type=str, metavar='QUERY', help='Spell-correct a query')
+    parser.add_argument('--top', type=int, default=MAX_COMPLETIONS, help='Number of completions')
+    parser.add_argument('--build', action='store_true', help='Build the index from the token corpus')
+    parser.add_argument('--benchmark', action='store_true', help='Measure completion and correction latency')
+    parser.add_argument('--tokens', type=str, default=str(TOKENS_DIR), help='Token corpus directory for --build')
+    parser.add_argument('--dir', type=str, default=None, help='Override autocomplete directory path')
+    args = parser.parse_args()
+
+    directory = Path(args.dir) if args.dir else AUTOCOMPLETE_DIR
+    if args.build:
+        started = time.perf_counter()
+        build_autocomplete(Path(args.tokens), directory)
+        print(f"✓ Created {directory}/ ({time.perf_counter() - started:.1f}s)")
+
+    if not (directory / MANIFEST_FILE).exists():
+        print(f"❌ Error: {directory} not found (run with --build)")
+        sys.exit(1)
+    index = Autocomplete(directory)
+    if args.benchmark:
+        benchmark(index)
+    elif args.correct:
+        started = time.perf_counter()
+        suggestion = index.suggest(args.correct, args.top)
+        elapsed = (time.perf_counter() - started) * 1e6
+        print(f"Did you mean: {suggestion['corrected']}" if suggestion['corrected'] else "No correction needed")
+        print(f"({elapsed:.0f} µs)")
+        for entry, weight in suggestion['completions']:
+            print(f"  {entry}  ({weight:,})")
+    elif args.query:
+        started = time.perf_counter()
+        completions = index.complete(args.query, args.top)
+        elapsed = (time.perf_counter() - started) * 1e6
+        for entry, weight in completions:
+            print(f"  {entry}  ({weight:,})")
+        print(f"({len(completions)} completions in {elapsed:.0f} µs)")
+    elif not args.build:
+        manifest = index.manifest
+        print(f"Entries: {manifest['total_entries']:,} ({manifest['total_terms']:,} terms, "
+              f"{manifest['total_phrases']:,} phrases)")
+        print(f"Precomputed Prefixes: {manifest['precomputed_prefixes']:,}")
+        print(f"Delete Keys: {manifest['delete_keys']:,}")
+
+
+if __name__ == "__main__":
+    main()
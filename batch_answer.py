@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Answer a file of questions concurrently with retrieved podcast context.
+
+Questions are read as NDJSON, one object per line:
+
+    {"id": "q1", "question": "How do I build a great product team?"}
+
+For each question the hybrid retriever (hybrid_search.py) finds the most
+relevant episodes and excerpts locally, a stable-prefix prompt is assembled
+(prompt_layout.py), and the model is called through
+chat_client.AsyncChatClient. At most `--concurrency` calls are in flight at once. Rate limits and transient errors are retried
+with backoff. Answers are appended to the output NDJSON as soon as they
+finish.
+
+The output file doubles as the checkpoint: on restart, questions that
+already have an answer in it are skipped, so an interrupted run resumes
+where it stopped. Failed questions are written with an "error" field and
+retried on the next run.
+
+Usage:
+    python3 batch_answer.py questions.ndjson [-o answers.ndjson] [--concurrency 8]
+    python3 stub_chat_server.py &   # offline test
+    python3 batch_answer.py questions.ndjson --base-url http://127.0.0.1:8765/v1
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+from chat_client import DEFAULT_BASE_URL, DEFAULT_MODEL, MAX_RETRIES, AsyncChatClient, ChatError
+from prompt_layout import Passage, PromptBuilder, table_digest
+
+# Configuration
+CONCURRENCY = 8
+TOP_EPISODES = 3
+CHUNKS_PER_EPISODE = 3
+MAX_TOKENS = 1000
+TEMPERATURE = 0.7
+
+
+def read_questions(path: Path) -> Iterator[Dict[str, Any]]:
+    """Question records from an NDJSON file; lines without an id get their line number.
+
+    A line that is not a JSON object with a non-empty "question" string is
+    yielded as a record with an "error" field instead, so it is reported
+    without stopping the run.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {'id': str(line_number), 'question': None, 'error': f"line {line_number}: invalid JSON ({e})"}
+                continue
+            if not isinstance(record, dict):
+                yield {'id': str(line_number), 'question': None, 'error': f"line {line_number}: not a JSON object"}
+                continue
+            record.setdefault('id', str(line_number))
+            question = record.get('question')
+            if not isinstance(question, str) or not question.strip():
+                yield {'id': record['id'], 'question': question,
+                       'error': f"line {line_number}: missing or empty \"question\""}
+                continue
+            yield record
+
+
+def completed_ids(output_path: Path) -> Set[str]:
+    """Ids already answered in a previous run's output (the checkpoint)."""
+    done: Set[str] = set()
+    if not output_path.exists():
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if 'answer' in record:
+                done.add(str(record['id']))
+    return done
+
+
+class ContextBuilder:
+    """Local retrieval and prompt assembly for a question."""
+
+    def __init__(self, searcher=None, table=None, prompts: PromptBuilder = None):
+        if searcher is None:
+            from hybrid_search import HybridSearcher
+            searcher = HybridSearcher()
+        if table is None:
+            try:
+                from columnar_index import EpisodeTable
+                table = EpisodeTable()
+            except FileNotFoundError:
+                table = None
+        if prompts is None:
+            prompts = PromptBuilder(digest=table_digest(table) if table is not None else "")
+        self.searcher = searcher
+        self.table = table
+        self.prompts = prompts
+
+    def passages(self, question: str, top_episodes: int = TOP_EPISODES,
+                 chunks_per_episode: int = CHUNKS_PER_EPISODE) -> List[Passage]:
+        """Retrieved excerpts for a question, labelled with episode title and guest."""
+        response = self.searcher.search(question, top_episodes, chunks_per_episode=chunks_per_episode)
+        passages = []
+        for result in response['results']:
+            title, guest = result['episode_id'], ''
+            if self.table is not None:
+                row = self.table.find(result['episode_id'])
+                title, guest = self.table.text('title', row), self.table.text('guest', row)
+            for chunk in result['chunks']:
+                passages.append(Passage(result['episode_id'], title, guest, chunk['text'], chunk['chunk_id']))
+        return passages
+
+    def build(self, question: str) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]], int]:
+        """Chat messages, their sources, and the expected cacheable prefix in tokens."""
+        passages = self.passages(question)
+        rendered = self.prompts.render(passages, question)
+        sources: Dict[str, List[int]] = {}
+        for passage in passages:
+            sources.setdefault(passage.source_id, []).append(passage.position)
+        return (rendered.messages,
+                [{'episode_id': episode_id, 'chunk_ids': chunk_ids} for episode_id, chunk_ids in sources.items()],
+                rendered.cacheable_prefix_tokens)
+
+
+async def answer_all(questions: Iterator[Dict[str, Any]], output_path: Path, client: AsyncChatClient,
+                     builder: ContextBuilder, concurrency: int = CONCURRENCY) -> Dict[str, int]:
+    """Answer questions with at most `concurrency` model calls in flight.
+
+    Results are appended to output_path as they complete; returns counts of
+    answered, failed and skipped questions.
+    """
+    done = completed_ids(output_path)
+    stats = {'answered': 0, 'failed': 0, 'skipped': 0}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    with open(output_path, 'a', encoding='utf-8') as out:
+        def write(record: Dict[str, Any]):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                record, messages, sources, cacheable = item
+                started = time.perf_counter()
+                result = {'id': record['id'], 'question': record['question'], 'sources': sources,
+                          'cacheable_prefix_tokens': cacheable}
+                try:
+                    response = await client.create(messages, temperature=TEMPERATURE, max_tokens=MAX_TOKENS)
+                    result['answer'] = response['choices'][0]['message']['content']
+                    result['attempts'] = response['attempts']
+                    stats['answered'] += 1
+                except ChatError as e:
+                    result['error'] = str(e)
+                    stats['failed'] += 1
+                except Exception as e:
+                    # Anything else (e.g. a malformed response) fails this question only;
+                    # the worker keeps draining the queue.
+                    result['error'] = f"{type(e).__name__}: {e}"
+                    stats['failed'] += 1
+                result['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+                write(result)
+
+        loop = asyncio.get_running_loop()
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for record in questions:
+                if str(record['id']) in done:
+                    stats['skipped'] += 1
+                    continue
+                if 'error' in record:
+                    write(record)
+                    stats['failed'] += 1
+                    continue
+                # Retrieval is local and takes milliseconds; it runs in a thread
+                # so the workers keep making progress on the network meanwhile.
+                try:
+                    context = await loop.run_in_executor(None, builder.build, record['question'])
+                except Exception as e:
+                    write({'id': record['id'], 'question': record.get('question'),
+                           'error': f"retrieval failed: {type(e).__name__}: {e}"})
+                    stats['failed'] += 1
+                    continue
+                await queue.put((record, *context))
+        finally:
+            # Let in-flight answers finish and be written even if reading questions fails
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer NDJSON questions concurrently with podcast context")
+    parser.add_argument('questions', type=Path, help='NDJSON file of {"id", "question"} records')
+    parser.add_argument('-o', '--output', type=Path, help='Output NDJSON (default: <questions>.answers.ndjson)')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help='Model calls in flight')
+    parser.add_argument('--retries', type=int, default=MAX_RETRIES, help='Retries per question')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='Chat model name')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='OpenAI-compatible API base URL')
+    args = parser.parse_args()
+
+    output = args.output or args.questions.with_suffix('.answers.ndjson')
+    client = AsyncChatClient(args.base_url, model=args.model, max_retries=args.retries)
+    print(f"Answering {args.questions} -> {output} ({args.concurrency} concurrent calls to {args.base_url})")
+
+    started = time.time()
+    stats = asyncio.run(answer_all(read_questions(args.questions), output, client,
+                                   ContextBuilder(), args.concurrency))
+    print(f"✓ {stats['answered']} answered, {stats['failed']} failed, "
+          f"{stats['skipped']} already done ({time.time() - started:.1f}s)")
+    if stats['failed']:
+        print("Re-run the same command to retry failed questions.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Minimal asyncio client for OpenAI-compatible chat completion endpoints.
+
+Standard library only, so the batch pipelines run wherever the knowledge
+base builds, and can be pointed at `stub_chat_server.py` for offline tests:
+
+    client = AsyncChatClient(base_url="http://127.0.0.1:8765/v1")
+    text = await client.complete(messages)
+
+Rate limits (HTTP 429) and transient server errors are retried with
+exponential backoff and jitter, honouring Retry-After when it is sent.
+
+`stream()` requests a server-sent-event stream and yields the answer text
+as it arrives, recording time to first token and tokens per second:
+
+    stats = StreamStats()
+    async for text in client.stream(messages, stats=stats):
+        print(text, end="", flush=True)
+    print(stats.summary())
+"""
+
+import asyncio
+import json
+import os
+import random
+import ssl
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Configuration
+DEFAULT_BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
+DEFAULT_MODEL = "gpt-4"
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0   # seconds; doubled on every retry
+BACKOFF_MAX = 60.0
+REQUEST_TIMEOUT = 120.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class ChatError(Exception):
+    """A chat request failed; `status` is the HTTP status, or None for connection errors."""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status is None or self.status in RETRY_STATUSES
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Seconds to wait before retry number `attempt` (1-based)."""
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+class StreamStats:
+    """Timings of one streamed completion; every streamed delta counts as one token."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.tokens = 0
+        self.attempts = 0
+        self.finish_reason: Optional[str] = None
+
+    def record_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.tokens += 1
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        """Milliseconds from the call to the first token, retries included."""
+        if self.first_token_at is None:
+            return None
+        return (self.first_token_at - self.started) * 1000
+
+    @property
+    def total_ms(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return (self.finished_at - self.started) * 1000
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Generation rate after the first token (the first token's wait is TTFT)."""
+        if self.first_token_at is None or self.finished_at is None or self.tokens < 2:
+            return None
+        elapsed = self.finished_at - self.first_token_at
+        return (self.tokens - 1) / elapsed if elapsed > 0 else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        def rounded(value):
+            return round(value, 1) if value is not None else None
+        return {'ttft_ms': rounded(self.ttft_ms), 'total_ms': rounded(self.total_ms),
+                'tokens': self.tokens, 'tokens_per_second': rounded(self.tokens_per_second),
+                'attempts': self.attempts, 'finish_reason': self.finish_reason}
+
+    def summary(self) -> str:
+        metrics = self.as_dict()
+        return (f"TTFT {metrics['ttft_ms']} ms, {metrics['tokens']} tokens, "
+                f"{metrics['tokens_per_second']} tokens/s, total {metrics['total_ms']} ms")
+
+
+class AsyncChatClient:
+    """POSTs chat completion requests over one short-lived HTTP/1.1 connection each."""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, api_key: Optional[str] = None,
+                 model: str = DEFAULT_MODEL, max_retries: int = MAX_RETRIES,
+                 timeout: float = REQUEST_TIMEOUT):
+        parts = urlsplit(base_url.rstrip('/'))
+        self.https = parts.scheme == 'https'
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.https else 80)
+        self.path = parts.path + "/chat/completions"
+        self.api_key = api_key if api_key is not None else os.environ.get("OPENAI_API_KEY", "")
+        self.model = model
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+    async def _open(self, payload: Dict[str, Any]) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, int, Dict[str, str]]:
+        """Send the request and read the status line and headers."""
+        body = json.dumps(payload).encode('utf-8')
+        try:
+            reader, writer = await asyncio.open_connection(
+                self.host, self.port, ssl=ssl.create_default_context() if self.https else None)
+        except OSError as e:
+            raise ChatError(f"Cannot connect to {self.host}:{self.port}: {e}") from e
+        headers = [
+            f"POST {self.path} HTTP/1.1",
+            f"Host: {self.host}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Connection: close",
+        ]
+        if self.api_key:
+            headers.append(f"Authorization: Bearer {self.api_key}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            writer.close()
+            raise ChatError("Connection closed before a response was received")
+        status = int(status_line.split()[1])
+        response_headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+        return reader, writer, status, response_headers
+
+    @staticmethod
+    async def _read_lines(reader: asyncio.StreamReader, headers: Dict[str, str]):
+        """Yield body lines, decoding chunked transfer encoding if used."""
+        if headers.get('transfer-encoding', '').lower() != 'chunked':
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                yield line
+        buffer = b""
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                break
+            buffer += await reader.readexactly(size)
+            await reader.readline()  # CRLF after each chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                yield line + b"\n"
+        if buffer:
+            yield buffer
+
+    async def _request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        reader, writer, status, headers = await self._open(payload)
+        try:
+            body = b"".join([line async for line in self._read_lines(reader, headers)])
+        finally:
+            writer.close()
+        if status != 200:
+            retry_after = headers.get('retry-after')
+            raise ChatError(f"HTTP {status}: {body[:200].decode('utf-8', 'replace')}", status,
+                            float(retry_after) if retry_after else None)
+        return json.loads(body)
+
+    async def create(self, messages: List[Dict[str, str]], **options: Any) -> Dict[str, Any]:
+        """One chat completion (the raw response dict), retrying transient failures.
+
+        Returns the response with an added 'attempts' count.
+        """
+        payload = {'model': self.model, 'messages': messages, **options}
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = await asyncio.wait_for(self._request(payload), self.timeout)
+                response['attempts'] = attempt
+                return response
+            except asyncio.TimeoutError:
+                error = ChatError(f"Request timed out after {self.timeout}s")
+            except ChatError as e:
+                error = e
+            if not error.retryable or attempt > self.max_retries:
+                raise error
+            await asyncio.sleep(backoff_delay(attempt, error.retry_after))
+
+    async def _next_line(self, lines: AsyncIterator[bytes]) -> bytes:
+        """Next body line of a stream, or b"" at the end; each read gets the full timeout."""
+        try:
+            return await asyncio.wait_for(lines.__anext__(), self.timeout)
+        except StopAsyncIteration:
+            return b""
+        except asyncio.TimeoutError:
+            raise ChatError(f"No data for {self.timeout}s while streaming") from None
+
+    async def stream(self, messages: List[Dict[str, str]], stats: Optional[StreamStats] = None,
+                     **options: Any) -> AsyncIterator[str]:
+        """Yield the text of a chat completion as the server streams it.
+
+        Failures before the first token are retried like create(); once text
+        has been yielded it cannot be taken back, so later failures raise.
+        Pass a StreamStats to collect TTFT and tokens per second.
+        """
+        stats = stats if stats is not None else StreamStats()
+        payload = {'model': self.model, 'messages': messages, **options, 'stream': True}
+        while True:
+            stats.attempts += 1
+            try:
+                reader, writer, status, headers = await asyncio.wait_for(self._open(payload), self.timeout)
+            except asyncio.TimeoutError:
+                error = ChatError(f"Request timed out after {self.timeout}s")
+            except ChatError as e:
+                error = e
+            else:
+                lines = self._read_lines(reader, headers)
+                try:
+                    if status != 200:
+                        body = b"".join([line async for line in lines])
+                        retry_after = headers.get('retry-after')
+                        raise ChatError(f"HTTP {status}: {body[:200].decode('utf-8', 'replace')}", status,
+                                        float(retry_after) if retry_after else None)
+                    while True:
+                        line = await self._next_line(lines)
+                        if not line:
+                            raise ChatError("Stream ended before [DONE]")
+                        line = line.strip()
+                        if not line.startswith(b"data:"):
+                            continue  # blank event separators, comments, other fields
+                        data = line[5:].strip()
+                        if data == b"[DONE]":
+                            stats.finished_at = time.perf_counter()
+                            return
+                        choice = (json.loads(data).get('choices') or [{}])[0]
+                        stats.finish_reason = choice.get('finish_reason') or stats.finish_reason
+                        text = (choice.get('delta') or {}).get('content')
+                        if text:
+                            stats.record_token()
+                            yield text
+                except ChatError as e:
+                    if stats.tokens:
+                        raise
+                    error = e
+                finally:
+                    writer.close()
+            if not error.retryable or stats.attempts > self.max_retries:
+                raise error
+            await asyncio.sleep(backoff_delay(stats.attempts, error.retry_after))
+
+    async def complete(self, messages: List[Dict[str, str]], **options: Any) -> str:
+        """Text of the first choice of a chat completion."""
+        response = await self.create(messages, **options)
+        return response['choices'][0]['message']['content']
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Multi-turn chat session that reuses transcript context across follow-ups.
+
+A stateless request resends every excerpt for every question, even when a
+follow-up is about the same episodes. A ChatSession remembers which parts
+of which transcripts it has already sent (as character spans) and each turn
+adds only the parts of the newly retrieved excerpts that were not sent yet,
+so a follow-up about the same episodes adds little or no new context.
+
+Excerpts go out only with the question they were retrieved for. Once a turn
+is answered, later requests resend just its question and answer, and that
+history is capped at HISTORY_TOKENS (oldest turns dropped first), so a
+follow-up costs its new excerpts plus a bounded history instead of every
+earlier excerpt again. The history sits before the new excerpts, so
+consecutive requests still share a prefix that provider prompt caching can
+reuse (see prompt_layout.py).
+
+Usage:
+    session = ChatSession()
+    stats = session.add_turn(question, episode_passages(episodes, question))
+    answer = await client.complete(session.messages())
+    session.record_answer(answer)
+
+    python3 knowledge_base/examples/gpt_integration.py --dry-run   # total tokens vs stateless
+"""
+
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from prompt_layout import SEGMENT_SEPARATOR, Passage, PromptBuilder, approx_tokens, normalize, render_passages
+from text_features import tokenize
+
+# Configuration
+HISTORY_TOKENS = 1000      # answered turns resent with each request (about the last one)
+EVICT_TO = 0.75            # once over budget, evict down to this fraction of it
+CHUNK_CHARS = 1000         # excerpt granularity
+CHUNKS_PER_EPISODE = 3     # excerpts per retrieved episode and question
+MIN_NEW_CHARS = 200        # uncovered slivers shorter than this are not added
+
+
+class SessionStats(NamedTuple):
+    prompt_tokens: int        # everything sent for this turn
+    new_tokens: int           # beyond the prefix shared with the previous request
+    passages_added: int
+    passages_reused: int      # already sent in an earlier turn
+    turns_evicted: int        # answered turns dropped (this turn) to stay within budget
+
+
+def relevant_chunks(text: str, question: str, limit: int = CHUNKS_PER_EPISODE,
+                    chunk_chars: int = CHUNK_CHARS) -> List[int]:
+    """Start offsets of the `limit` grid chunks of `text` with the most question-term hits.
+
+    Chunks sit on a fixed grid (multiples of chunk_chars), so every question
+    that touches the same part of a transcript selects the same chunk.
+    """
+    terms = set(tokenize(question))
+    starts = range(0, max(len(text), 1), chunk_chars)
+    if not terms:
+        return list(starts[:limit])
+    scores = {start: sum(1 for token in tokenize(text[start:start + chunk_chars]) if token in terms)
+              for start in starts}
+    best = sorted(starts, key=lambda start: (-scores[start], start))[:limit]
+    return sorted(start for start in best if scores[start]) or [0]
+
+
+def episode_passages(episodes: Iterable[Dict], question: str, limit: int = CHUNKS_PER_EPISODE,
+                     chunk_chars: int = CHUNK_CHARS) -> List[Passage]:
+    """The most relevant chunks of each episode for a question, positioned by char offset."""
+    passages = []
+    for ep in episodes:
+        for start in relevant_chunks(ep['transcript'], question, limit, chunk_chars):
+            passages.append(Passage(ep['id'], ep['title'], ep['guest'],
+                                    ep['transcript'][start:start + chunk_chars], start))
+    return passages
+
+
+def uncovered(start: int, end: int, covered: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Parts of [start, end) not inside any of the `covered` spans."""
+    pieces = []
+    for covered_start, covered_end in sorted(covered):
+        if covered_end <= start or covered_start >= end:
+            continue
+        if covered_start > start:
+            pieces.append((start, covered_start))
+        start = max(start, covered_end)
+        if start >= end:
+            break
+    if start < end:
+        pieces.append((start, end))
+    return pieces
+
+
+class Turn:
+    def __init__(self, question: str, passages: List[Passage]):
+        self.question = normalize(question)
+        self.passages = passages
+        self.answer: Optional[str] = None
+
+
+class ChatSession:
+    """Conversation state: the current turn's excerpts and a bounded question/answer history."""
+
+    def __init__(self, prompts: PromptBuilder = None, history_tokens: int = HISTORY_TOKENS,
+                 min_new_chars: int = MIN_NEW_CHARS):
+        self.prompts = prompts or PromptBuilder()
+        self.history_budget = history_tokens
+        self.min_new_chars = min_new_chars
+        self.turns: List[Turn] = []
+        self.sent: Dict[str, List[Tuple[int, int]]] = {}  # character spans sent per source
+        self._previous: Optional[str] = None
+
+    def add_turn(self, question: str, candidates: Iterable[Passage]) -> SessionStats:
+        """Start a turn with the parts of `candidates` not sent in an earlier turn.
+
+        Candidate positions are character offsets into their source, so
+        overlapping excerpts of the same transcript are trimmed to the new part.
+        """
+        spans = self.sent
+        added, reused = [], 0
+        for candidate in candidates:
+            start, end = candidate.position, candidate.position + len(candidate.text)
+            pieces = [(a, b) for a, b in uncovered(start, end, spans.get(candidate.source_id, []))
+                      if b - a >= min(self.min_new_chars, end - start)]
+            if not pieces:
+                reused += 1
+                continue
+            for a, b in pieces:
+                added.append(candidate._replace(text=candidate.text[a - start:b - start], position=a))
+                spans.setdefault(candidate.source_id, []).append((a, b))
+        self.turns.append(Turn(question, added))
+        turns_evicted = self._evict()
+
+        text = self.text()
+        shared = len(os.path.commonprefix([self._previous, text])) if self._previous is not None else 0
+        self._previous = text
+        return SessionStats(approx_tokens(text), approx_tokens(text[shared:]), len(added), reused,
+                            turns_evicted)
+
+    def record_answer(self, answer: str):
+        """Store the model's answer to the current turn in the history."""
+        self.turns[-1].answer = normalize(answer)
+
+    def _user_content(self, turn: Turn) -> str:
+        # Answered turns keep only their question; the answer stands in for the excerpts
+        if not turn.passages or turn.answer is not None:
+            return f"Question: {turn.question}"
+        return (f"Transcript excerpts from Lenny's Podcast:{SEGMENT_SEPARATOR}{render_passages(turn.passages)}"
+                f"{SEGMENT_SEPARATOR}Question: {turn.question}")
+
+    def messages(self) -> List[Dict[str, str]]:
+        messages = [{"role": "system", "content": self.prompts.prefix}]
+        for turn in self.turns:
+            messages.append({"role": "user", "content": self._user_content(turn)})
+            if turn.answer is not None:
+                messages.append({"role": "assistant", "content": turn.answer})
+        return messages
+
+    def text(self) -> str:
+        """All message contents as sent, for token accounting."""
+        return SEGMENT_SEPARATOR.join(m['content'] for m in self.messages())
+
+    def history_tokens(self) -> int:
+        """Tokens of the answered turns resent with every request."""
+        return sum(approx_tokens(self._user_content(turn)) + approx_tokens(turn.answer or '')
+                   for turn in self.turns[:-1])
+
+    def _evict(self) -> int:
+        """Drop the oldest answered turns once the history is over budget.
+
+        Eviction rewrites the start of the conversation and so invalidates the
+        cached prefix; evicting down to EVICT_TO of the budget in one go keeps
+        that rare instead of happening on every turn.
+        """
+        if self.history_tokens() <= self.history_budget:
+            return 0
+        turns_evicted = 0
+        while len(self.turns) > 1 and self.history_tokens() > self.history_budget * EVICT_TO:
+            self.turns.pop(0)
+            turns_evicted += 1
+        return turns_evicted
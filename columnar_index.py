@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Columnar, memory-mappable copy of the episode index.
+
+Numeric fields live in a NumPy structured array (one fixed-width record per
+episode) and text fields are (start, end) byte offsets into a shared UTF-8
+string heap in which every distinct string is stored once. Loading the table
+is two mmaps, and sorts, filters and aggregates run as vectorized NumPy
+operations instead of Python loops over a list of dicts.
+
+Usage:
+    python3 columnar_index.py                # summary statistics
+    python3 columnar_index.py --top 10       # most viewed episodes
+    python3 columnar_index.py --longer-than 3600
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Configuration
+COLUMNAR_DIR = Path(__file__).parent / "knowledge_base" / "columnar"
+ROWS_FILE = "episodes.npy"
+STRINGS_FILE = "strings.bin"
+MANIFEST_FILE = "manifest.json"
+
+NUMERIC_FIELDS = [
+    ('duration_seconds', '<f8'),
+    ('view_count', '<f8'),
+    ('transcript_length', '<i8'),
+    ('word_count', '<i8'),
+]
+TEXT_FIELDS = [
+    'id', 'guest', 'title', 'youtube_url', 'video_id',
+    'description', 'duration', 'channel',
+]
+
+
+def row_dtype() -> np.dtype:
+    """Record layout: numeric fields followed by string heap offsets."""
+    fields = list(NUMERIC_FIELDS)
+    for name in TEXT_FIELDS:
+        fields.append((f'{name}_start', '<u8'))
+        fields.append((f'{name}_end', '<u8'))
+    return np.dtype(fields)
+
+
+def _as_number(value: Any) -> float:
+    """Coerce a metadata value to a number, treating junk as 0."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def build_columnar_index(index: List[Dict[str, Any]], output_dir: Path = COLUMNAR_DIR) -> Path:
+    """Write the episode index entries as a columnar table."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    rows = np.zeros(len(index), dtype=row_dtype())
+    heap = bytearray()
+    interned: Dict[str, tuple] = {}
+
+    for i, entry in enumerate(index):
+        for name, _ in NUMERIC_FIELDS:
+            rows[name][i] = _as_number(entry.get(name, 0))
+        for name in TEXT_FIELDS:
+            value = str(entry.get(name, '') or '')
+            span = interned.get(value)
+            if span is None:
+                encoded = value.encode('utf-8')
+                span = (len(heap), len(heap) + len(encoded))
+                heap.extend(encoded)
+                interned[value] = span
+            rows[f'{name}_start'][i], rows[f'{name}_end'][i] = span
+
+    np.save(output_dir / ROWS_FILE, rows)
+    with open(output_dir / STRINGS_FILE, 'wb') as f:
+        f.write(heap)
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_episodes': len(index),
+            'numeric_fields': [name for name, _ in NUMERIC_FIELDS],
+            'text_fields': TEXT_FIELDS,
+            'distinct_strings': len(interned),
+            'string_heap_bytes': len(heap),
+            'description': 'Columnar episode metadata (numpy records + UTF-8 string heap)'
+        }, f, indent=2)
+
+    return output_dir
+
+
+class EpisodeTable:
+    """Read-only view over a columnar index built by build_columnar_index."""
+
+    def __init__(self, directory: Path = COLUMNAR_DIR):
+        directory = Path(directory)
+        self.rows = np.load(directory / ROWS_FILE, mmap_mode='r')
+        strings_path = directory / STRINGS_FILE
+        if strings_path.stat().st_size:
+            self.strings = np.memmap(strings_path, dtype=np.uint8, mode='r')
+        else:
+            self.strings = np.empty(0, dtype=np.uint8)
+        self._row_by_id: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def column(self, name: str) -> np.ndarray:
+        """Return a numeric column as a (memory-mapped) array."""
+        return self.rows[name]
+
+    def text(self, name: str, row: int) -> str:
+        """Decode a single text field."""
+        record = self.rows[row]
+        start, end = int(record[f'{name}_start']), int(record[f'{name}_end'])
+        return bytes(self.strings[start:end]).decode('utf-8')
+
+    def texts(self, name: str, rows=None) -> List[str]:
+        """Decode a text field for the given rows (all rows by default)."""
+        if rows is None:
+            rows = range(len(self.rows))
+        return [self.text(name, int(row)) for row in rows]
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Materialize one row as an index.json-style dict."""
+        entry: Dict[str, Any] = {name: self.text(name, row) for name in TEXT_FIELDS}
+        record = self.rows[row]
+        for name, _ in NUMERIC_FIELDS:
+            entry[name] = record[name].item()
+        return entry
+
+    def find(self, episode_id: str) -> int:
+        """Row number for an episode id, or -1 if unknown."""
+        if self._row_by_id is None:
+            self._row_by_id = {value: i for i, value in enumerate(self.texts('id'))}
+        return self._row_by_id.get(episode_id, -1)
+
+    def top(self, name: str, n: int = 10, descending: bool = True) -> np.ndarray:
+        """Row numbers of the n largest (or smallest) values of a column."""
+        values = np.asarray(self.column(name))
+        if descending:
+            values = -values
+        n = min(n, len(values))
+        if n <= 0:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.argpartition(values, n - 1)[:n]
+        return candidates[np.argsort(values[candidates], kind='stable')]
+
+    def where(self, mask: np.ndarray) -> np.ndarray:
+        """Row numbers where a boolean mask over the table is true."""
+        return np.flatnonzero(mask)
+
+    def summary(self) -> Dict[str, Any]:
+        """Corpus-wide aggregates."""
+        n = len(self.rows)
+        words = self.column('word_count')
+        duration = self.column('duration_seconds')
+        return {
+            'total_episodes': n,
+            'total_words': int(words.sum()),
+            'total_characters': int(self.column('transcript_length').sum()),
+            'total_views': float(self.column('view_count').sum()),
+            'average_words': float(words.mean()) if n else 0.0,
+            'average_duration_seconds': float(duration.mean()) if n else 0.0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the columnar episode index")
+    parser.add_argument('--top', type=int, metavar='N', help='Show the N most viewed episodes')
+    parser.add_argument('--longer-than', type=float, metavar='SECONDS',
+                        help='List episodes longer than SECONDS')
+    parser.add_argument('--dir', type=str, default=None, help='Override columnar directory path')
+    args = parser.parse_args()
+
+    table = EpisodeTable(Path(args.dir) if args.dir else COLUMNAR_DIR)
+
+    if args.top:
+        for i, row in enumerate(table.top('view_count', args.top), 1):
+            print(f"{i}. {table.text('guest', row)}: {table.column('view_count')[row]:,.0f} views")
+            print(f"   {table.text('title', row)[:60]}...")
+    elif args.longer_than is not None:
+        rows = table.where(table.column('duration_seconds') > args.longer_than)
+        print(f"Episodes longer than {args.longer_than:,.0f}s: {len(rows)}")
+        for row in rows:
+            print(f"  - {table.text('guest', row)}: {table.text('duration', row)}")
+    else:
+        stats = table.summary()
+        print(f"Total Episodes: {stats['total_episodes']}")
+        print(f"Total Words: {stats['total_words']:,}")
+        print(f"Total Characters: {stats['total_characters']:,}")
+        print(f"Average Words per Episode: {stats['average_words']:,.0f}")
+        print(f"Average Duration: {stats['average_duration_seconds'] / 60:,.1f} minutes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Single-blob transcript corpus with offset-referenced chunks.
+
+All transcripts are concatenated into one UTF-8 file (`transcripts.bin`) that
+readers memory-map. Episodes are described by a byte offset table and chunks
+by fixed-width (episode_row, start, end) records, so chunk text is sliced out
+of the blob on demand instead of being copied into a JSON file with its
+episode title and guest repeated on every entry.
+
+Episode rows line up with the rows of the columnar index (columnar_index.py).
+
+Usage:
+    python3 corpus_blob.py                   # corpus statistics
+    python3 corpus_blob.py --chunk 42        # print one chunk
+    python3 corpus_blob.py --episode marty-cagan
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+from records import Chunk, Episode
+
+# Configuration
+CORPUS_DIR = Path(__file__).parent / "knowledge_base" / "corpus"
+BLOB_FILE = "transcripts.bin"
+EPISODES_FILE = "episodes.npy"
+CHUNKS_FILE = "chunks.npy"
+MANIFEST_FILE = "manifest.json"
+
+CHUNK_DTYPE = np.dtype([
+    ('episode_row', '<u4'),
+    ('start', '<u4'),
+    ('end', '<u4'),
+])
+
+
+def char_to_byte_offsets(text: str, positions: List[int]) -> Dict[int, int]:
+    """Map character offsets in text to UTF-8 byte offsets in one linear pass."""
+    mapping = {}
+    byte_pos = 0
+    char_pos = 0
+    for pos in sorted(set(positions)):
+        byte_pos += len(text[char_pos:pos].encode('utf-8'))
+        char_pos = pos
+        mapping[pos] = byte_pos
+    return mapping
+
+
+def build_corpus(episodes: List[Episode], chunks: List[Chunk], output_dir: Path = CORPUS_DIR) -> Path:
+    """Write the transcript blob, episode offset table and chunk records.
+
+    `episodes` and `chunks` are records.Episode / records.Chunk lists, as
+    built by create_knowledge_base or loaded with records.load.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    spans_by_episode: Dict[str, List[Chunk]] = {}
+    for chunk in chunks:
+        spans_by_episode.setdefault(chunk.episode_id, []).append(chunk)
+
+    episode_offsets = np.zeros(len(episodes) + 1, dtype=np.int64)
+    records = np.zeros(len(chunks), dtype=CHUNK_DTYPE)
+    n_records = 0
+    blob_size = 0
+
+    with open(output_dir / BLOB_FILE, 'wb') as blob:
+        for row, episode in enumerate(episodes):
+            transcript = episode.transcript
+            episode_chunks = spans_by_episode.get(episode.id, [])
+            positions = [c.start_char for c in episode_chunks] + [c.end_char for c in episode_chunks]
+            byte_offsets = char_to_byte_offsets(transcript, positions)
+
+            for chunk in episode_chunks:
+                records[n_records] = (
+                    row,
+                    blob_size + byte_offsets[chunk.start_char],
+                    blob_size + byte_offsets[chunk.end_char],
+                )
+                n_records += 1
+
+            encoded = transcript.encode('utf-8')
+            blob.write(encoded)
+            blob_size += len(encoded)
+            episode_offsets[row + 1] = blob_size
+
+    if blob_size > np.iinfo(np.uint32).max:
+        raise ValueError(f"Corpus blob is {blob_size:,} bytes; chunk records only address 4 GiB")
+
+    np.save(output_dir / EPISODES_FILE, episode_offsets)
+    np.save(output_dir / CHUNKS_FILE, records[:n_records])
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_episodes': len(episodes),
+            'total_chunks': n_records,
+            'blob_bytes': blob_size,
+            'episode_ids': [ep.id for ep in episodes],
+            'description': 'Concatenated UTF-8 transcripts with byte offset tables'
+        }, f, indent=2, ensure_ascii=False)
+
+    return output_dir
+
+
+class Corpus:
+    """Memory-mapped reader for a corpus built by build_corpus."""
+
+    def __init__(self, directory: Path = CORPUS_DIR):
+        directory = Path(directory)
+        with open(directory / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.episode_ids: List[str] = self.manifest['episode_ids']
+        self.episode_offsets = np.load(directory / EPISODES_FILE, mmap_mode='r')
+        self.chunks = np.load(directory / CHUNKS_FILE, mmap_mode='r')
+        if self.manifest['blob_bytes']:
+            self.blob = np.memmap(directory / BLOB_FILE, dtype=np.uint8, mode='r')
+        else:
+            self.blob = np.empty(0, dtype=np.uint8)
+        # First chunk of every episode, for chunk_index lookups
+        self.episode_first_chunk = np.searchsorted(
+            self.chunks['episode_row'], np.arange(len(self.episode_ids) + 1))
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    @property
+    def num_episodes(self) -> int:
+        return len(self.episode_ids)
+
+    def episode_span(self, row: int) -> tuple:
+        """Byte span of an episode transcript within the blob."""
+        return int(self.episode_offsets[row]), int(self.episode_offsets[row + 1])
+
+    def episode_bytes(self, row: int) -> memoryview:
+        """Zero-copy view of an episode transcript."""
+        start, end = self.episode_span(row)
+        return memoryview(self.blob[start:end])
+
+    def episode_text(self, row: int) -> str:
+        return str(self.episode_bytes(row), 'utf-8')
+
+    def chunk_bytes(self, i: int) -> memoryview:
+        """Zero-copy view of a chunk's text."""
+        record = self.chunks[i]
+        return memoryview(self.blob[int(record['start']):int(record['end'])])
+
+    def chunk_text(self, i: int) -> str:
+        return str(self.chunk_bytes(i), 'utf-8')
+
+    def chunk_index(self, i: int) -> int:
+        """Position of chunk i within its episode."""
+        row = int(self.chunks['episode_row'][i])
+        return i - int(self.episode_first_chunk[row])
+
+    def episode_chunks(self, row: int) -> range:
+        """Chunk numbers belonging to an episode."""
+        return range(int(self.episode_first_chunk[row]), int(self.episode_first_chunk[row + 1]))
+
+    def chunk_record(self, i: int) -> Dict[str, Any]:
+        """Materialize chunk i as a dict (text decoded on demand)."""
+        row = int(self.chunks['episode_row'][i])
+        return {
+            'chunk_id': i,
+            'episode_row': row,
+            'episode_id': self.episode_ids[row],
+            'chunk_index': self.chunk_index(i),
+            'text': self.chunk_text(i),
+        }
+
+    def iter_chunks(self, start: int = 0, stop: int = None) -> Iterator[Dict[str, Any]]:
+        """Yield chunk records in corpus order."""
+        stop = len(self.chunks) if stop is None else min(stop, len(self.chunks))
+        for i in range(start, stop):
+            yield self.chunk_record(i)
+
+    def row_of_offset(self, positions) -> np.ndarray:
+        """Episode rows containing the given blob byte offsets."""
+        return np.searchsorted(self.episode_offsets, positions, side='right') - 1
+
+    def chunk_of_offset(self, positions) -> np.ndarray:
+        """First chunk covering each blob byte offset (-1 if none).
+
+        Chunk starts and ends both increase through the corpus, so the
+        earliest covering chunk is the first one ending after the position.
+        """
+        positions = np.asarray(positions)
+        candidates = np.searchsorted(self.chunks['end'], positions, side='right')
+        result = np.full(positions.shape, -1, dtype=np.int64)
+        in_range = candidates < len(self.chunks)
+        covered = np.zeros(positions.shape, dtype=bool)
+        covered[in_range] = self.chunks['start'][candidates[in_range]] <= positions[in_range]
+        result[covered] = candidates[covered]
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the single-blob transcript corpus")
+    parser.add_argument('--chunk', type=int, metavar='N', help='Print chunk N')
+    parser.add_argument('--episode', type=str, metavar='ID', help='Print the chunks of one episode')
+    parser.add_argument('--dir', type=str, default=None, help='Override corpus directory path')
+    args = parser.parse_args()
+
+    corpus = Corpus(Path(args.dir) if args.dir else CORPUS_DIR)
+
+    if args.chunk is not None:
+        if not 0 <= args.chunk < len(corpus):
+            print(f"❌ Error: chunk {args.chunk} out of range (0-{len(corpus) - 1})")
+            sys.exit(1)
+        record = corpus.chunk_record(args.chunk)
+        print(f"Episode: {record['episode_id']} (chunk {record['chunk_index']})")
+        print(record['text'])
+    elif args.episode:
+        if args.episode not in corpus.episode_ids:
+            print(f"❌ Error: unknown episode: {args.episode}")
+            sys.exit(1)
+        row = corpus.episode_ids.index(args.episode)
+        for i in corpus.episode_chunks(row):
+            start, end = int(corpus.chunks['start'][i]), int(corpus.chunks['end'][i])
+            print(f"{corpus.chunk_index(i):>4}. bytes {start:,}-{end:,}: {corpus.chunk_text(i)[:70]!r}")
+    else:
+        manifest = corpus.manifest
+        print(f"Total Episodes: {manifest['total_episodes']}")
+        print(f"Total Chunks: {manifest['total_chunks']:,}")
+        print(f"Blob Size: {manifest['blob_bytes']:,} bytes")
+        print(f"Chunk Table Size: {corpus.chunks.nbytes:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
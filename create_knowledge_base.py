@@ -2,17 +2,34 @@
 """
 Create an accessible knowledge base from all Lenny's Podcast transcripts
 for use with GPT projects.
+
+Usage:
+    python3 create_knowledge_base.py [--compact]
+    python3 create_knowledge_base.py --tokens 256 [--token-overlap 32] [--tokenizer approx]
 """
 
+import argparse
 import os
-import json
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import re
 
+from autocomplete import build_autocomplete
+from columnar_index import build_columnar_index
+from corpus_blob import build_corpus
+from fuzzy_lookup import build_trigram_index
+from records import Chunk, Episode, dump, to_dict
+from related_episodes import build_related_episodes
+from speakers import build_speaker_index
+from timestamps import build_timestamp_index
+from token_chunking import (CHUNK_TOKEN_OVERLAP, CHUNK_TOKENS, DEFAULT_TOKENIZER, ApproxTokenizer, get_tokenizer,
+                            span_token_counts, token_chunks)
+from token_corpus import build_token_corpus
+from topic_clusters import build_topics
+
 # Configuration
-EPISODES_DIR = Path("episodes")
-OUTPUT_DIR = Path("knowledge_base")
+EPISODES_DIR = Path(__file__).parent / "episodes"
+OUTPUT_DIR = Path(__file__).parent / "knowledge_base"
 CHUNK_SIZE = 1000  # Characters per chunk for embeddings
 CHUNK_OVERLAP = 200  # Overlap between chunks
 
@@ -178,68 +195,168 @@ def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVE
     return chunks
 
 
-def create_knowledge_base():
-    """Process all transcripts and create knowledge base files."""
+def load_episode(transcript_file: Path) -> Optional[Episode]:
+    """Parse one episodes/<slug>/transcript.md into an Episode record (None if empty)."""
+    episode_data = parse_transcript(transcript_file)
+    if not episode_data:
+        return None
+    metadata = episode_data.get('metadata', {})
+    transcript = episode_data.get('transcript', '')
+    
+    return Episode(
+        id=episode_data['episode_slug'],
+        guest=metadata.get('guest', 'Unknown'),
+        title=metadata.get('title', 'Untitled'),
+        youtube_url=metadata.get('youtube_url', ''),
+        video_id=metadata.get('video_id', ''),
+        description=metadata.get('description', ''),
+        duration_seconds=metadata.get('duration_seconds', 0),
+        duration=metadata.get('duration', ''),
+        view_count=metadata.get('view_count', 0),
+        channel=metadata.get('channel', ''),
+        transcript=transcript,
+        transcript_length=len(transcript),
+        word_count=len(transcript.split())
+    )
+
+
+def episode_chunks(episode: Episode, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP,
+                   unit: str = 'chars', tokenizer=None) -> List[Chunk]:
+    """Embedding chunks of one episode's transcript.
+
+    chunk_size and overlap count characters, or tokens of `tokenizer` with
+    unit='tokens'. Either way every chunk records its token count
+    (approximate tokenizer unless one is given).
+    """
+    tokenizer = tokenizer or ApproxTokenizer()
+    if unit == 'tokens':
+        chunks = token_chunks(episode.transcript, tokenizer, chunk_size, overlap)
+    else:
+        chunks = chunk_text(episode.transcript, chunk_size, overlap)
+        counts = span_token_counts(episode.transcript, [(c['start'], c['end']) for c in chunks], tokenizer)
+        for chunk, count in zip(chunks, counts):
+            chunk['tokens'] = count
+    return [
+        Chunk(
+            episode_id=episode.id,
+            episode_title=episode.title,
+            guest=episode.guest,
+            chunk_index=chunk_idx,
+            text=chunk['text'],
+            start_char=chunk['start'],
+            end_char=chunk['end'],
+            token_count=chunk['tokens']
+        )
+        for chunk_idx, chunk in enumerate(chunks)
+    ]
+
+
+def write_episode_files(episodes: List[Episode], all_chunks: List[Chunk], output_dir: Path = OUTPUT_DIR,
+                        compact: bool = False, verbose: bool = True,
+                        chunking: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Write knowledge_base.json, index.json, chunks_for_embeddings.json and episode_index.txt.
+
+    `chunking` is the chunk metadata (default: character chunk size and
+    overlap). Each file is replaced atomically. Returns the index entries
+    (metadata without transcripts).
+    """
+    index = [to_dict(episode, exclude=('transcript',)) for episode in episodes]
+    chunking = chunking or {'chunk_size': CHUNK_SIZE, 'chunk_overlap': CHUNK_OVERLAP}
+
+    # Save complete knowledge base (all episodes with full transcripts)
+    kb_file = dump({
+        'metadata': {
+            'total_episodes': len(episodes),
+            'total_chunks': len(all_chunks),
+            **chunking
+        },
+        'episodes': episodes
+    }, output_dir / "knowledge_base.json", compact)
+
+    # Save index (metadata only, no transcripts)
+    index_file = dump({
+        'metadata': {
+            'total_episodes': len(index),
+            'description': 'Index of all episodes with metadata only (no transcripts)'
+        },
+        'episodes': index
+    }, output_dir / "index.json", compact)
+
+    # Save chunks for embeddings
+    chunks_file = dump({
+        'metadata': {
+            'total_chunks': len(all_chunks),
+            **chunking,
+            'description': 'Text chunks ready for embedding generation and vector search'
+        },
+        'chunks': all_chunks
+    }, output_dir / "chunks_for_embeddings.json", compact)
+
+    # Create a simple text index for quick reference
+    text_index_file = output_dir / "episode_index.txt"
+    temporary = output_dir / ".episode_index.txt.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write("Lenny's Podcast - Episode Index\n")
+        f.write("=" * 80 + "\n\n")
+        for i, ep in enumerate(index, 1):
+            f.write(f"{i}. {ep['title']}\n")
+            f.write(f"   Guest: {ep['guest']}\n")
+            f.write(f"   Duration: {ep['duration']} | Views: {ep['view_count']:,}\n")
+            f.write(f"   ID: {ep['id']}\n")
+            f.write(f"   YouTube: {ep['youtube_url']}\n\n")
+    os.replace(temporary, text_index_file)
+
+    if verbose:
+        print(f"\n✓ Created {kb_file} ({len(episodes)} episodes)")
+        print(f"✓ Created {index_file} ({len(index)} episodes)")
+        print(f"✓ Created {chunks_file} ({len(all_chunks)} chunks)")
+        print(f"✓ Created {text_index_file}")
+    return index
+
+
+def create_knowledge_base(compact: bool = False, episodes_dir: Path = EPISODES_DIR,
+                          output_dir: Path = OUTPUT_DIR, chunk_tokens: int = 0,
+                          token_overlap: int = CHUNK_TOKEN_OVERLAP, tokenizer: str = DEFAULT_TOKENIZER):
+    """Process all transcripts and create knowledge base files.
+
+    Reads episodes_dir/*/transcript.md and writes everything to output_dir;
+    with compact=True the JSON files are written without indentation. With
+    chunk_tokens, chunks hold that many tokens of `tokenizer` (overlapping
+    by token_overlap; see token_chunks) instead of CHUNK_SIZE characters.
+    """
+    
+    chunk_tokenizer = get_tokenizer(tokenizer)
+    if chunk_tokens:
+        chunking = {'chunk_size': chunk_tokens, 'chunk_overlap': token_overlap,
+                    'chunk_unit': 'tokens', 'tokenizer': chunk_tokenizer.name}
+    else:
+        chunking = {'chunk_size': CHUNK_SIZE, 'chunk_overlap': CHUNK_OVERLAP}
     
     # Create output directory
-    OUTPUT_DIR.mkdir(exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
     
     # Find all transcript files
-    transcript_files = list(EPISODES_DIR.glob("*/transcript.md"))
+    transcript_files = list(episodes_dir.glob("*/transcript.md"))
     print(f"Found {len(transcript_files)} transcript files")
     
     # Process all transcripts
     episodes = []
     all_chunks = []
-    index = []
     
     for i, transcript_file in enumerate(sorted(transcript_files), 1):
         print(f"Processing {i}/{len(transcript_files)}: {transcript_file.parent.name}")
         
         try:
-            episode_data = parse_transcript(transcript_file)
-            if not episode_data:
+            episode = load_episode(transcript_file)
+            if episode is None:
                 print(f"  Warning: No data extracted from {transcript_file.name}")
                 continue
-            metadata = episode_data.get('metadata', {})
-            transcript = episode_data.get('transcript', '')
-            
-            # Create episode entry
-            episode = {
-                'id': episode_data['episode_slug'],
-                'guest': metadata.get('guest', 'Unknown'),
-                'title': metadata.get('title', 'Untitled'),
-                'youtube_url': metadata.get('youtube_url', ''),
-                'video_id': metadata.get('video_id', ''),
-                'description': metadata.get('description', ''),
-                'duration_seconds': metadata.get('duration_seconds', 0),
-                'duration': metadata.get('duration', ''),
-                'view_count': metadata.get('view_count', 0),
-                'channel': metadata.get('channel', ''),
-                'transcript': transcript,
-                'transcript_length': len(transcript),
-                'word_count': len(transcript.split())
-            }
             
             episodes.append(episode)
             
-            # Create index entry (without full transcript)
-            index_entry = {k: v for k, v in episode.items() if k != 'transcript'}
-            index.append(index_entry)
-            
             # Create chunks for embeddings
-            chunks = chunk_text(transcript, CHUNK_SIZE, CHUNK_OVERLAP)
-            for chunk_idx, chunk in enumerate(chunks):
-                chunk_entry = {
-                    'episode_id': episode['id'],
-                    'episode_title': episode['title'],
-                    'guest': episode['guest'],
-                    'chunk_index': chunk_idx,
-                    'text': chunk['text'],
-                    'start_char': chunk['start'],
-                    'end_char': chunk['end']
-                }
-                all_chunks.append(chunk_entry)
+            all_chunks.extend(episode_chunks(episode, chunking['chunk_size'], chunking['chunk_overlap'],
+                                             chunking.get('chunk_unit', 'chars'), chunk_tokenizer))
         
         except Exception as e:
             import traceback
@@ -247,63 +364,49 @@ def create_knowledge_base():
             print(f"  Traceback: {traceback.format_exc()}")
             continue
     
-    # Save complete knowledge base (all episodes with full transcripts)
-    kb_file = OUTPUT_DIR / "knowledge_base.json"
-    with open(kb_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            'metadata': {
-                'total_episodes': len(episodes),
-                'total_chunks': len(all_chunks),
-                'chunk_size': CHUNK_SIZE,
-                'chunk_overlap': CHUNK_OVERLAP
-            },
-            'episodes': episodes
-        }, f, indent=2, ensure_ascii=False)
-    print(f"\n✓ Created {kb_file} ({len(episodes)} episodes)")
+    # Save knowledge_base.json, index.json, chunks_for_embeddings.json and episode_index.txt
+    index = write_episode_files(episodes, all_chunks, output_dir, compact, chunking=chunking)
     
-    # Save index (metadata only, no transcripts)
-    index_file = OUTPUT_DIR / "index.json"
-    with open(index_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            'metadata': {
-                'total_episodes': len(index),
-                'description': 'Index of all episodes with metadata only (no transcripts)'
-            },
-            'episodes': index
-        }, f, indent=2, ensure_ascii=False)
-    print(f"✓ Created {index_file} ({len(index)} episodes)")
+    # Save columnar copy of the index for memory-mapped, vectorized queries
+    columnar_dir = build_columnar_index(index, output_dir / "columnar")
+    print(f"✓ Created {columnar_dir}/ ({len(index)} rows)")
     
-    # Save chunks for embeddings
-    chunks_file = OUTPUT_DIR / "chunks_for_embeddings.json"
-    with open(chunks_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            'metadata': {
-                'total_chunks': len(all_chunks),
-                'chunk_size': CHUNK_SIZE,
-                'chunk_overlap': CHUNK_OVERLAP,
-                'description': 'Text chunks ready for embedding generation and vector search'
-            },
-            'chunks': all_chunks
-        }, f, indent=2, ensure_ascii=False)
-    print(f"✓ Created {chunks_file} ({len(all_chunks)} chunks)")
+    # Save trigram index for fuzzy guest/title/slug lookup
+    trigram_file = build_trigram_index(index, output_dir / "trigram_index.json")
+    print(f"✓ Created {trigram_file}")
     
-    # Create a simple text index for quick reference
-    text_index_file = OUTPUT_DIR / "episode_index.txt"
-    with open(text_index_file, 'w', encoding='utf-8') as f:
-        f.write("Lenny's Podcast - Episode Index\n")
-        f.write("=" * 80 + "\n\n")
-        for i, ep in enumerate(index, 1):
-            f.write(f"{i}. {ep['title']}\n")
-            f.write(f"   Guest: {ep['guest']}\n")
-            f.write(f"   Duration: {ep['duration']} | Views: {ep['view_count']:,}\n")
-            f.write(f"   ID: {ep['id']}\n")
-            f.write(f"   YouTube: {ep['youtube_url']}\n\n")
-    print(f"✓ Created {text_index_file}")
+    # Save single-blob corpus with offset-referenced chunks
+    corpus_dir = build_corpus(episodes, all_chunks, output_dir / "corpus")
+    print(f"✓ Created {corpus_dir}/ ({len(episodes)} transcripts, {len(all_chunks)} chunk records)")
+    
+    # Save speaker-turn timestamps so hits resolve to video times without a rescan
+    timestamps_dir = build_timestamp_index(episodes, output_dir / "timestamps")
+    print(f"✓ Created {timestamps_dir}/")
+    
+    # Save speaker turns so queries can be restricted to what one speaker said
+    speakers_dir = build_speaker_index(episodes, output_dir / "speakers")
+    print(f"✓ Created {speakers_dir}/")
+    
+    # Save the corpus as integer token ids for n-gram and collocation statistics
+    tokens_dir = build_token_corpus(corpus_dir, output_dir / "tokens")
+    print(f"✓ Created {tokens_dir}/")
+    
+    # Save frequency-weighted completions and spelling corrections for the search box
+    autocomplete_dir = build_autocomplete(tokens_dir, output_dir / "autocomplete")
+    print(f"✓ Created {autocomplete_dir}/")
+    
+    # Save top-k related-episode graph (TF-IDF cosine neighbours)
+    related_dir = build_related_episodes(corpus_dir, output_dir / "related")
+    print(f"✓ Created {related_dir}/")
+    
+    # Cluster chunks into topics (local mini-batch k-means, no API calls)
+    topics_dir = build_topics(corpus_dir, output_dir / "topics")
+    print(f"✓ Created {topics_dir}/")
     
     # Print summary
     if episodes:
-        total_words = sum(ep['word_count'] for ep in episodes)
-        total_chars = sum(ep['transcript_length'] for ep in episodes)
+        total_words = sum(ep.word_count for ep in episodes)
+        total_chars = sum(ep.transcript_length for ep in episodes)
         
         print("\n" + "=" * 80)
         print("Knowledge Base Summary")
@@ -312,6 +415,7 @@ def create_knowledge_base():
         print(f"Total Words: {total_words:,}")
         print(f"Total Characters: {total_chars:,}")
         print(f"Total Chunks: {len(all_chunks)}")
+        print(f"Total Chunk Tokens: {sum(chunk.token_count for chunk in all_chunks):,} ({chunk_tokenizer.name})")
         print(f"Average Words per Episode: {total_words // len(episodes):,}")
         print(f"Average Chunks per Episode: {len(all_chunks) // len(episodes)}")
         print("=" * 80)
@@ -322,8 +426,17 @@ def create_knowledge_base():
         print("No episodes processed successfully!")
         print("=" * 80)
     
-    print(f"\nAll files saved to: {OUTPUT_DIR.absolute()}")
+    print(f"\nAll files saved to: {output_dir.absolute()}")
 
 
 if __name__ == "__main__":
-    create_knowledge_base()
+    parser = argparse.ArgumentParser(description="Create the knowledge base from episodes/*/transcript.md")
+    parser.add_argument('--compact', action='store_true', help='Write JSON without indentation (smaller, faster)')
+    parser.add_argument('--tokens', type=int, default=0, metavar='N',
+                        help=f'Chunk to N tokens (e.g. {CHUNK_TOKENS}) instead of {CHUNK_SIZE} characters')
+    parser.add_argument('--token-overlap', type=int, default=CHUNK_TOKEN_OVERLAP, help='Token overlap for --tokens')
+    parser.add_argument('--tokenizer', type=str, default=DEFAULT_TOKENIZER,
+                        help="Tokenizer for --tokens and token counts: 'approx' or 'tiktoken[:encoding]'")
+    args = parser.parse_args()
+    create_knowledge_base(compact=args.compact, chunk_tokens=args.tokens, token_overlap=args.token_overlap,
+                          tokenizer=args.tokenizer)
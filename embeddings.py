@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Pluggable embedding backends, with a built-in offline LSA backend.
+
+Every backend turns a list of texts into L2-normalized float32 vectors:
+
+    lsa     - hashing vectorizer + TF-IDF + randomized truncated SVD, fitted
+              on the corpus chunks. No network, no API key, deterministic.
+    openai  - OpenAI embedding API (requires `pip install openai` and
+              OPENAI_API_KEY).
+
+The local build embeds every chunk of the corpus in batches and persists the
+model and the chunk vectors under `knowledge_base/embeddings/`, so vector
+search works entirely offline.
+
+Usage:
+    python3 embeddings.py --build [--dim 256]
+    python3 embeddings.py "How to prioritize product features?"
+"""
+
+import argparse
+import json
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+from corpus_blob import CORPUS_DIR, Corpus
+from text_features import CSRMatrix, tokenize
+
+# Configuration
+EMBEDDINGS_DIR = Path(__file__).parent / "knowledge_base" / "embeddings"
+MODEL_FILE = "lsa_model.npz"
+VECTORS_FILE = "lsa_vectors.npy"
+MANIFEST_FILE = "manifest.json"
+LSA_DIM = 256
+HASH_FEATURES = 2 ** 16
+OVERSAMPLES = 16
+POWER_ITERATIONS = 2
+EMBED_BATCH_SIZE = 1024  # texts per batch when embedding
+DOT_BLOCK = 64  # sparse rows per block; small blocks keep the gathered rows in cache
+SEED = 42
+
+
+class EmbeddingBackend:
+    """Interface: map texts to L2-normalized float32 vectors of size `dim`."""
+
+    name = 'base'
+    dim = 0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed_batches(self, texts: Iterable[str], batch_size: int = EMBED_BATCH_SIZE) -> Iterable[np.ndarray]:
+        """Embed a stream of texts, yielding one (batch, dim) array per batch."""
+        batch: List[str] = []
+        for text in texts:
+            batch.append(text)
+            if len(batch) == batch_size:
+                yield self.embed(batch)
+                batch = []
+        if batch:
+            yield self.embed(batch)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length (zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+class HashingVectorizer:
+    """Stateless signed feature hashing of tokens into a fixed number of columns."""
+
+    def __init__(self, n_features: int = HASH_FEATURES):
+        if n_features & (n_features - 1):
+            raise ValueError(f"n_features must be a power of two, got {n_features}")
+        self.n_features = n_features
+        self._cache: Dict[str, tuple] = {}
+
+    def _hash(self, token: str) -> tuple:
+        hashed = self._cache.get(token)
+        if hashed is None:
+            h = zlib.crc32(token.encode('utf-8'))
+            hashed = (h & (self.n_features - 1), 1.0 if h >> 31 else -1.0)
+            self._cache[token] = hashed
+        return hashed
+
+    def transform(self, texts: Iterable[str]) -> CSRMatrix:
+        """Raw signed term counts, one CSR row per text."""
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for text in texts:
+            row: Dict[int, float] = {}
+            for token in tokenize(text):
+                column, sign = self._hash(token)
+                row[column] = row.get(column, 0.0) + sign
+            columns = sorted(c for c, v in row.items() if v)
+            indices.extend(columns)
+            data.extend(row[c] for c in columns)
+            indptr.append(len(indices))
+        return CSRMatrix(np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int32),
+                         np.array(data, dtype=np.float32), self.n_features)
+
+
+def csr_dot_dense(matrix: CSRMatrix, dense: np.ndarray, block: int = DOT_BLOCK) -> np.ndarray:
+    """matrix @ dense for a CSR matrix, a block of rows at a time."""
+    result = np.zeros((matrix.n_rows, dense.shape[1]), dtype=np.float32)
+    for start in range(0, matrix.n_rows, block):
+        stop = min(start + block, matrix.n_rows)
+        lo, hi = matrix.indptr[start], matrix.indptr[stop]
+        if lo == hi:
+            continue
+        lengths = np.diff(matrix.indptr[start:stop + 1])
+        nonempty = np.flatnonzero(lengths)
+        products = dense[matrix.indices[lo:hi]] * matrix.data[lo:hi, None]
+        segment_starts = (np.cumsum(lengths) - lengths)[nonempty]
+        result[start + nonempty] = np.add.reduceat(products, segment_starts, axis=0)
+    return result
+
+
+def orthonormalize(matrix: np.ndarray) -> np.ndarray:
+    """Orthonormal basis for the columns of a tall matrix (eigen-decomposed Gram matrix).
+
+    Much cheaper than a Householder QR of the tall matrix and accurate enough
+    for the randomized range finder; near-null directions are dropped.
+    """
+    gram = matrix.T.astype(np.float64) @ matrix
+    values, vectors = np.linalg.eigh(gram)
+    keep = values > values.max() * 1e-10
+    return (matrix @ (vectors[:, keep] / np.sqrt(values[keep]))).astype(np.float32)
+
+
+class LSABackend(EmbeddingBackend):
+    """Offline embeddings: hashed TF-IDF projected onto its top singular vectors."""
+
+    name = 'lsa'
+
+    def __init__(self, components: np.ndarray = None, idf: np.ndarray = None,
+                 n_features: int = HASH_FEATURES):
+        self.vectorizer = HashingVectorizer(n_features)
+        self.components = components  # (n_features, dim)
+        self.idf = idf
+        self.dim = 0 if components is None else components.shape[1]
+
+    def _weight(self, counts: CSRMatrix) -> CSRMatrix:
+        """Sublinear TF-IDF weighting and per-row L2 normalization."""
+        data = np.sign(counts.data) * (1 + np.log(np.abs(counts.data))) * self.idf[counts.indices]
+        lengths = np.diff(counts.indptr)
+        # Rows without tokens (empty or stopword-only texts) get norm 0 and stay zero vectors
+        rows = np.repeat(np.arange(counts.n_rows), lengths)
+        norms = np.sqrt(np.bincount(rows, weights=data ** 2, minlength=counts.n_rows))
+        data = data / np.repeat(np.maximum(norms, 1e-12), lengths)
+        return CSRMatrix(counts.indptr, counts.indices, data.astype(np.float32), counts.n_cols)
+
+    def fit(self, texts: List[str], dim: int = LSA_DIM, seed: int = SEED) -> 'LSABackend':
+        """Learn IDF weights and a rank-`dim` projection by randomized SVD (Halko et al.)."""
+        self.fit_matrix(texts, dim, seed)
+        return self
+
+    def fit_matrix(self, texts: List[str], dim: int = LSA_DIM, seed: int = SEED) -> CSRMatrix:
+        """Fit on texts and return their weighted rows, so they can be projected without re-tokenizing."""
+        counts = self.vectorizer.transform(texts)
+        df = np.bincount(counts.indices, minlength=counts.n_cols)
+        self.idf = (np.log((1 + counts.n_rows) / (1 + df)) + 1).astype(np.float32)
+        matrix = self._weight(counts)
+        transposed = matrix.transpose()
+
+        rank = min(dim + OVERSAMPLES, matrix.n_rows, matrix.n_cols)
+        rng = np.random.default_rng(seed)
+        sample = csr_dot_dense(matrix, rng.standard_normal((matrix.n_cols, rank), dtype=np.float32))
+        basis = orthonormalize(sample)
+        for _ in range(POWER_ITERATIONS):
+            basis = orthonormalize(csr_dot_dense(transposed, basis))
+            basis = orthonormalize(csr_dot_dense(matrix, basis))
+        # SVD of the small projection B = basis.T @ matrix via the eigenvectors of B @ B.T
+        projected = csr_dot_dense(transposed, basis)  # B.T, (n_features, rank)
+        values, vectors = np.linalg.eigh(projected.T.astype(np.float64) @ projected)
+        order = np.argsort(-values)[:dim]
+        singular = np.sqrt(np.maximum(values[order], 1e-12))
+        self.components = np.ascontiguousarray((projected @ vectors[:, order]) / singular, dtype=np.float32)
+        self.dim = self.components.shape[1]
+        return matrix
+
+    def project(self, matrix: CSRMatrix, start: int, stop: int) -> np.ndarray:
+        """Normalized embeddings of weighted rows start:stop."""
+        lo, hi = matrix.indptr[start], matrix.indptr[stop]
+        rows = CSRMatrix(matrix.indptr[start:stop + 1] - lo, matrix.indices[lo:hi],
+                         matrix.data[lo:hi], matrix.n_cols)
+        return normalize_rows(csr_dot_dense(rows, self.components))
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        if self.components is None:
+            raise RuntimeError("LSA backend is not fitted; run `python3 embeddings.py --build` first")
+        matrix = self._weight(self.vectorizer.transform(texts))
+        return self.project(matrix, 0, matrix.n_rows)
+
+    def save(self, path: Path):
+        np.savez(path, components=self.components, idf=self.idf,
+                 n_features=np.int64(self.vectorizer.n_features))
+
+    @classmethod
+    def load(cls, path: Path = EMBEDDINGS_DIR / MODEL_FILE) -> 'LSABackend':
+        with np.load(path) as model:
+            return cls(model['components'], model['idf'], int(model['n_features']))
+
+
+class OpenAIBackend(EmbeddingBackend):
+    """Remote embeddings from the OpenAI API."""
+
+    name = 'openai'
+
+    def __init__(self, model: str = "text-embedding-ada-002", dim: int = 1536):
+        from openai import OpenAI  # only needed when this backend is used
+        self.client = OpenAI()
+        self.model = model
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        response = self.client.embeddings.create(input=texts, model=self.model)
+        return normalize_rows(np.array([item.embedding for item in response.data], dtype=np.float32))
+
+
+BACKENDS = {
+    'lsa': LSABackend.load,
+    'openai': OpenAIBackend,
+}
+
+
+def get_backend(name: str = 'lsa', **kwargs: Any) -> EmbeddingBackend:
+    """Instantiate a registered backend by name."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {name} (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name](**kwargs)
+
+
+def build_lsa_embeddings(corpus_dir: Path = CORPUS_DIR, output_dir: Path = EMBEDDINGS_DIR,
+                         dim: int = LSA_DIM, n_features: int = HASH_FEATURES) -> Path:
+    """Fit the LSA backend on all chunks and persist the model and chunk vectors."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    corpus = Corpus(corpus_dir)
+    started = time.time()
+
+    texts = [corpus.chunk_text(i) for i in range(len(corpus))]
+    backend = LSABackend(n_features=n_features)
+    matrix = backend.fit_matrix(texts, dim)
+    backend.save(output_dir / MODEL_FILE)
+
+    vectors = np.lib.format.open_memmap(output_dir / VECTORS_FILE, mode='w+',
+                                        dtype=np.float32, shape=(len(texts), backend.dim))
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        stop = min(start + EMBED_BATCH_SIZE, len(texts))
+        vectors[start:stop] = backend.project(matrix, start, stop)
+    vectors.flush()
+    del vectors
+
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'backend': backend.name,
+            'dim': backend.dim,
+            'hash_features': n_features,
+            'total_chunks': len(texts),
+            'build_seconds': round(time.time() - started, 1),
+            'description': 'Offline LSA embeddings of corpus chunks (rows match corpus/chunks.npy)'
+        }, f, indent=2)
+    return output_dir
+
+
+def load_vectors(directory: Path = EMBEDDINGS_DIR) -> np.ndarray:
+    """Memory-mapped (chunks, dim) matrix of chunk vectors."""
+    return np.load(Path(directory) / VECTORS_FILE, mmap_mode='r')
+
+
+def vector_search(vectors: np.ndarray, query: np.ndarray, top_k: int = 5, block: int = 65536) -> List[tuple]:
+    """(chunk_id, cosine) of the top_k rows most similar to a normalized query vector."""
+    best_ids = np.empty(0, dtype=np.int64)
+    best_scores = np.empty(0, dtype=np.float32)
+    for start in range(0, len(vectors), block):
+        scores = np.asarray(vectors[start:start + block]) @ query
+        keep = min(top_k, len(scores))
+        top = np.argpartition(-scores, keep - 1)[:keep]
+        best_ids = np.concatenate([best_ids, top + start])
+        best_scores = np.concatenate([best_scores, scores[top]])
+    order = np.lexsort((best_ids, -best_scores))[:top_k]  # ties broken by chunk id
+    return [(int(best_ids[i]), float(best_scores[i])) for i in order]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline embeddings and vector search over chunks")
+    parser.add_argument('query', nargs='?', help='Search query')
+    parser.add_argument('--build', action='store_true', help='Fit the LSA backend and embed all chunks')
+    parser.add_argument('--dim', type=int, default=LSA_DIM, help='Embedding size for --build')
+    parser.add_argument('--features', type=int, default=HASH_FEATURES, help='Hash space size for --build')
+    parser.add_argument('--top', type=int, default=5, help='Number of results')
+    args = parser.parse_args()
+
+    if args.build:
+        print(f"Fitting LSA embeddings ({args.dim} dims) on {CORPUS_DIR}...")
+        output_dir = build_lsa_embeddings(dim=args.dim, n_features=args.features)
+        with open(output_dir / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        print(f"✓ Created {output_dir}/ ({manifest['total_chunks']:,} vectors in {manifest['build_seconds']}s)")
+    if not args.query:
+        if not args.build:
+            parser.print_help()
+        return
+
+    backend = get_backend('lsa')
+    corpus = Corpus()
+    started = time.perf_counter()
+    results = vector_search(load_vectors(), backend.embed([args.query])[0], args.top)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(f"Top {len(results)} chunks for '{args.query}' ({elapsed_ms:.1f} ms):")
+    for chunk_id, score in results:
+        record = corpus.chunk_record(chunk_id)
+        print(f"\n{score:.3f}  {record['episode_id']} (chunk {record['chunk_index']})")
+        print(f"   {record['text'][:200]}...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Retrieval quality and latency of chunking parameters.
+
+For every (chunk size, overlap) pair of a grid, the transcripts are
+re-chunked with create_knowledge_base.chunk_text and a fresh corpus, BM25
+index and (for --retriever vector/hybrid) LSA vectors are built. A labeled
+query set is run against each index, and each configuration reports:
+- recall@k and MRR
+- chunk count and index bytes
+- p50/p95 query latency
+
+Configurations are built and scored in parallel worker processes. Latency
+is measured afterwards, one configuration at a time, so parallel builds
+do not distort it.
+
+A query set is JSON:
+
+    {"queries": [{"query": "pricing strategy for b2b saas",
+                  "relevant": [{"episode_id": "madhavan-ramanujam", "start": 600, "end": 900}]}]}
+
+`start`/`end` (seconds) are optional; without them any chunk of the episode
+counts. A chunk is relevant when its episode matches and its time span
+(from the timestamp index) overlaps the labeled span. recall@k is the
+fraction of a query's labels hit by its top k chunks, MRR uses the first
+relevant chunk.
+
+Usage:
+    python3 eval_chunking.py --generate 200                 # synthetic set from transcript turns
+    python3 eval_chunking.py --sizes 500 1000 2000 --overlaps 0 200
+    python3 eval_chunking.py --queries my_queries.json --retriever hybrid --workers 4
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from create_knowledge_base import CHUNK_OVERLAP, CHUNK_SIZE, episode_chunks
+from records import Chunk, Episode, load
+from text_features import tokenize
+from timestamps import TimestampIndex, build_timestamp_index, find_markers
+
+# Configuration
+KB_FILE = Path(__file__).parent / "knowledge_base" / "knowledge_base.json"
+EVAL_DIR = Path(__file__).parent / "knowledge_base" / "eval"
+QUERIES_FILE = EVAL_DIR / "queries.json"
+RESULTS_FILE = "results.json"
+SIZES = [500, 1000, 2000]
+OVERLAPS = [0, 200]
+KS = [1, 5, 10]
+RETRIEVERS = ['lexical', 'vector', 'hybrid']
+QUERY_TERMS = 6        # content words per generated query
+MIN_TURN_TERMS = 40    # generated queries come from turns at least this long
+SHARED_FILES = {'transcripts.bin'}  # identical for every configuration, not counted as index
+
+
+class Config(NamedTuple):
+    chunk_size: int
+    overlap: int
+
+    @property
+    def name(self) -> str:
+        return f"size{self.chunk_size}_overlap{self.overlap}"
+
+
+def generate_queries(episodes: List[Episode], count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Known-item queries: a few content words sampled from one speaker turn.
+
+    The turn's time span is the relevant label, so a configuration is
+    rewarded for retrieving the right part of the right episode.
+    """
+    rng = random.Random(seed)
+    turns = []
+    for episode in episodes:
+        markers = find_markers(episode.transcript)
+        for (start, seconds), (end, next_seconds) in zip(markers, markers[1:]):
+            if next_seconds > seconds:
+                turns.append((episode, start, end, seconds, next_seconds))
+    queries = []
+    while turns and len(queries) < count:
+        episode, start, end, seconds, next_seconds = turns.pop(rng.randrange(len(turns)))
+        terms = tokenize(episode.transcript[start:end])
+        if len(terms) < MIN_TURN_TERMS:
+            continue
+        picked = sorted(rng.sample(range(len(terms)), QUERY_TERMS))
+        queries.append({
+            'query': ' '.join(terms[i] for i in picked),
+            'relevant': [{'episode_id': episode.id, 'start': seconds, 'end': next_seconds}],
+        })
+    return queries
+
+
+def directory_bytes(directory: Path) -> int:
+    return sum(path.stat().st_size for path in directory.rglob('*')
+               if path.is_file() and path.name not in SHARED_FILES)
+
+
+class Retriever:
+    """Top-k chunk ids from one configuration's indexes."""
+
+    def __init__(self, directory: Path, kind: str):
+        from hybrid_search import CANDIDATES, LexicalIndex, VectorRetriever, reciprocal_rank_fusion
+        self.kind = kind
+        self.candidates = CANDIDATES
+        self.fuse = reciprocal_rank_fusion
+        self.lexical = LexicalIndex(directory / "lexical") if kind != 'vector' else None
+        self.vector = VectorRetriever('lsa', directory / "embeddings") if kind != 'lexical' else None
+
+    def search(self, query: str, k: int) -> List[int]:
+        if self.kind == 'lexical':
+            return [chunk_id for chunk_id, _ in self.lexical.search(query, k)]
+        if self.kind == 'vector':
+            return [chunk_id for chunk_id, _ in self.vector.search(query, k)]
+        fused = self.fuse({'lexical': self.lexical.search(query, self.candidates),
+                           'vector': self.vector.search(query, self.candidates)})
+        return sorted(fused, key=lambda chunk_id: -fused[chunk_id]['score'])[:k]
+
+
+def build_config(episodes: List[Episode], config: Config, directory: Path, retriever: str) -> List[Chunk]:
+    """Chunk, then build the corpus and the indexes `retriever` needs."""
+    from corpus_blob import build_corpus
+    from embeddings import build_lsa_embeddings
+    from hybrid_search import build_lexical_index
+
+    chunks = [chunk for episode in episodes for chunk in episode_chunks(episode, config.chunk_size, config.overlap)]
+    build_corpus(episodes, chunks, directory / "corpus")
+    if retriever != 'vector':
+        build_lexical_index(directory / "corpus", directory / "lexical")
+    if retriever != 'lexical':
+        build_lsa_embeddings(directory / "corpus", directory / "embeddings")
+    return chunks
+
+
+def score(ranked: List[int], labels: List[Dict[str, Any]], chunk_episode_ids: List[str],
+          chunk_times: np.ndarray, ks: List[int]) -> Tuple[Dict[int, float], float]:
+    """(recall@k for each k, reciprocal rank) of one query's ranked chunk ids."""
+    hit_rank = [None] * len(labels)
+    first_relevant = None
+    for rank, chunk_id in enumerate(ranked, 1):
+        begin, end = chunk_times[chunk_id]
+        for i, label in enumerate(labels):
+            if chunk_episode_ids[chunk_id] != label['episode_id']:
+                continue
+            if 'start' in label and (end < label['start'] or begin > label.get('end', label['start'])):
+                continue
+            if hit_rank[i] is None:
+                hit_rank[i] = rank
+            if first_relevant is None:
+                first_relevant = rank
+    recall = {k: sum(1 for r in hit_rank if r is not None and r <= k) / len(labels) for k in ks}
+    return recall, (1.0 / first_relevant if first_relevant else 0.0)
+
+
+def evaluate_config(kb_file: Path, config: Config, queries: List[Dict[str, Any]], work_dir: Path,
+                    timestamps_dir: Path, retriever: str, ks: List[int]) -> Dict[str, Any]:
+    """Build one configuration and score the query set against it (runs in a worker)."""
+    episodes = load(kb_file, episodes=Episode)['episodes']
+    directory = work_dir / config.name
+    started = time.perf_counter()
+    chunks = build_config(episodes, config, directory, retriever)
+    build_seconds = time.perf_counter() - started
+
+    timestamps = TimestampIndex(timestamps_dir)
+    chunk_times = np.array([(timestamps.seconds_at(c.episode_id, c.start_char),
+                             timestamps.seconds_at(c.episode_id, max(c.end_char - 1, c.start_char)))
+                            for c in chunks], dtype=np.int64).reshape(-1, 2)
+    chunk_episode_ids = [c.episode_id for c in chunks]
+
+    search = Retriever(directory, retriever)
+    recalls = {k: [] for k in ks}
+    reciprocal_ranks = []
+    for query in queries:
+        recall, rr = score(search.search(query['query'], max(ks)), query['relevant'],
+                           chunk_episode_ids, chunk_times, ks)
+        for k in ks:
+            recalls[k].append(recall[k])
+        reciprocal_ranks.append(rr)
+
+    return {
+        'chunk_size': config.chunk_size,
+        'overlap': config.overlap,
+        'chunks': len(chunks),
+        'index_bytes': directory_bytes(directory),
+        'build_seconds': round(build_seconds, 2),
+        'recall': {str(k): round(float(np.mean(recalls[k])), 4) for k in ks},
+        'mrr': round(float(np.mean(reciprocal_ranks)), 4),
+    }
+
+
+def measure_latency(directory: Path, retriever: str, queries: List[Dict[str, Any]], k: int) -> Tuple[float, float]:
+    """(p50, p95) milliseconds per query, after one warm-up pass."""
+    search = Retriever(directory, retriever)
+    for query in queries[:10]:
+        search.search(query['query'], k)
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        search.search(query['query'], k)
+        timings.append((time.perf_counter() - started) * 1000)
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 95))
+
+
+def run_grid(kb_file: Path, configs: List[Config], queries: List[Dict[str, Any]], work_dir: Path,
+             retriever: str = 'lexical', ks: List[int] = KS, workers: int = None,
+             keep: bool = False) -> List[Dict[str, Any]]:
+    """Evaluate every configuration; indexes are deleted afterwards unless keep=True."""
+    work_dir.mkdir(parents=True, exist_ok=True)
+    episodes = load(kb_file, episodes=Episode)['episodes']
+    timestamps_dir = build_timestamp_index(episodes, work_dir / "timestamps")
+    del episodes
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(configs)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(evaluate_config, kb_file, config, queries, work_dir, timestamps_dir, retriever, ks)
+                   for config in configs]
+        results = [future.result() for future in futures]
+
+    for config, result in zip(configs, results):
+        directory = work_dir / config.name
+        result['latency_ms'] = dict(zip(('p50', 'p95'), (round(v, 3) for v in
+                                        measure_latency(directory, retriever, queries, max(ks)))))
+        if not keep:
+            shutil.rmtree(directory)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency over chunking parameters")
+    parser.add_argument('--queries', type=str, default=str(QUERIES_FILE), help='Labeled query set (JSON)')
+    parser.add_argument('--generate', type=int, metavar='N', help='Write N synthetic queries to --queries and exit')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for --generate')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='Chunk sizes (characters)')
+    parser.add_argument('--overlaps', type=int, nargs='+', default=OVERLAPS, help='Chunk overlaps (characters)')
+    parser.add_argument('--k', type=int, nargs='+', default=KS, help='Cutoffs for recall@k')
+    parser.add_argument('--retriever', choices=RETRIEVERS, default='lexical', help='Retrieval method to evaluate')
+    parser.add_argument('--workers', type=int, default=None, help='Parallel configurations (default: all cores)')
+    parser.add_argument('--keep', action='store_true', help='Keep the built indexes')
+    parser.add_argument('--kb', type=str, default=str(KB_FILE), help='knowledge_base.json')
+    parser.add_argument('--dir', type=str, default=None, help='Override eval working directory path')
+    args = parser.parse_args()
+
+    kb_file = Path(args.kb)
+    queries_file = Path(args.queries)
+    work_dir = Path(args.dir) if args.dir else EVAL_DIR
+    if not kb_file.exists():
+        print(f"❌ Error: {kb_file} not found. Run create_knowledge_base.py first.")
+        return
+
+    if args.generate:
+        queries = generate_queries(load(kb_file, episodes=Episode)['episodes'], args.generate, args.seed)
+        queries_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(queries_file, 'w', encoding='utf-8') as f:
+            json.dump({'generated': True, 'seed': args.seed, 'queries': queries}, f, indent=2, ensure_ascii=False)
+        print(f"✓ Created {queries_file} ({len(queries)} queries)")
+        return
+
+    if not queries_file.exists():
+        print(f"❌ Error: {queries_file} not found. Label a query set or run with --generate N.")
+        return
+    with open(queries_file, 'r', encoding='utf-8') as f:
+        queries = json.load(f)['queries']
+
+    configs = [Config(size, overlap) for size in args.sizes for overlap in args.overlaps if overlap < size]
+    print(f"Evaluating {len(configs)} configurations x {len(queries)} queries ({args.retriever})...")
+    started = time.perf_counter()
+    results = run_grid(kb_file, configs, queries, work_dir, args.retriever, args.k, args.workers, args.keep)
+
+    recall_headers = ''.join(f"{'R@' + str(k):>7}" for k in args.k)
+    print(f"\n{'size':>6} {'overlap':>7} {'chunks':>8} {'index MB':>9}{recall_headers} {'MRR':>6} {'p50 ms':>7} {'p95 ms':>7}")
+    for r in results:
+        marker = '  (current)' if (r['chunk_size'], r['overlap']) == (CHUNK_SIZE, CHUNK_OVERLAP) else ''
+        recalls = ''.join(f"{r['recall'][str(k)]:>7.3f}" for k in args.k)
+        print(f"{r['chunk_size']:>6} {r['overlap']:>7} {r['chunks']:>8,} {r['index_bytes'] / 1e6:>9.1f}{recalls} "
+              f"{r['mrr']:>6.3f} {r['latency_ms']['p50']:>7.2f} {r['latency_ms']['p95']:>7.2f}{marker}")
+
+    results_file = work_dir / RESULTS_FILE
+    with open(results_file, 'w', encoding='utf-8') as f:
+        json.dump({'queries': str(queries_file), 'retriever': args.retriever, 'results': results}, f, indent=2)
+    print(f"\n✓ Created {results_file} ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
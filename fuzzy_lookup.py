@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Trigram index for fuzzy guest, title and episode-slug lookup.
+
+Names are normalized (accents stripped, case-folded, punctuation removed) and
+split into padded character trigrams. A query only touches the postings of
+its own trigrams, so ranked matches come back in well under a millisecond
+and tolerate typos, partial names and alternate spellings
+("soderstrom" -> "Gustav Söderström", "bosworht" -> "Andrew Bosworth").
+
+Usage:
+    python3 fuzzy_lookup.py "shreyas dosh"
+    python3 fuzzy_lookup.py "growth loops" --field title
+"""
+
+import argparse
+import json
+import re
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Configuration
+TRIGRAM_INDEX_FILE = Path(__file__).parent / "knowledge_base" / "trigram_index.json"
+INDEXED_FIELDS = ['guest', 'title', 'id']
+MIN_SCORE = 0.3
+
+
+def normalize(text: str) -> str:
+    """Strip accents, case-fold and reduce to space-separated alphanumeric words."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(re.findall(r'[a-z0-9]+', stripped.casefold()))
+
+
+def trigrams(text: str) -> List[str]:
+    """Distinct padded trigrams of each word in the normalized text."""
+    grams = []
+    seen = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            gram = padded[i:i + 3]
+            if gram not in seen:
+                seen.add(gram)
+                grams.append(gram)
+    return grams
+
+
+def build_trigram_index(index: List[Dict[str, Any]], output_file: Path = TRIGRAM_INDEX_FILE) -> Path:
+    """Index the guest, title and slug of every episode in index.json order."""
+    entries = []
+    entry_by_key: Dict[tuple, int] = {}
+    postings: Dict[str, List[int]] = {}
+
+    for row, episode in enumerate(index):
+        for field in INDEXED_FIELDS:
+            text = str(episode.get(field, '') or '')
+            if not text:
+                continue
+            key = (field, text)
+            if key in entry_by_key:
+                entries[entry_by_key[key]]['rows'].append(row)
+                continue
+            grams = trigrams(text)
+            entry_id = len(entries)
+            entry_by_key[key] = entry_id
+            entries.append({'field': field, 'text': text, 'rows': [row], 'size': len(grams)})
+            for gram in grams:
+                postings.setdefault(gram, []).append(entry_id)
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'metadata': {
+                'total_entries': len(entries),
+                'total_trigrams': len(postings),
+                'fields': INDEXED_FIELDS,
+                'description': 'Trigram postings over episode guests, titles and slugs'
+            },
+            'episode_ids': [ep['id'] for ep in index],
+            'entries': entries,
+            'postings': postings
+        }, f, ensure_ascii=False, separators=(',', ':'))
+    return output_file
+
+
+class TrigramIndex:
+    """Ranked fuzzy lookup over a trigram index file."""
+
+    def __init__(self, index_file: Path = TRIGRAM_INDEX_FILE):
+        with open(index_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.episode_ids: List[str] = data['episode_ids']
+        self.entries: List[Dict[str, Any]] = data['entries']
+        self.postings: Dict[str, List[int]] = data['postings']
+
+    def lookup(self, query: str, fields: Optional[List[str]] = None,
+               limit: int = 10, min_score: float = MIN_SCORE) -> List[Dict[str, Any]]:
+        """Best matching entries, scored by the share of query trigrams they contain.
+
+        Ties (e.g. a short query matching several names) are broken by Dice
+        similarity, which prefers entries without extra unmatched words.
+        """
+        grams = trigrams(query)
+        if not grams:
+            return []
+
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for entry_id in self.postings.get(gram, ()):
+                shared[entry_id] = shared.get(entry_id, 0) + 1
+
+        scored = []
+        for entry_id, count in shared.items():
+            entry = self.entries[entry_id]
+            if fields and entry['field'] not in fields:
+                continue
+            coverage = count / len(grams)
+            if coverage < min_score:
+                continue
+            dice = 2 * count / (len(grams) + entry['size'])
+            scored.append((coverage, dice, entry_id))
+        scored.sort(reverse=True)
+
+        results = []
+        for coverage, dice, entry_id in scored[:limit]:
+            entry = self.entries[entry_id]
+            results.append({
+                'field': entry['field'],
+                'text': entry['text'],
+                'score': round(coverage, 3),
+                'similarity': round(dice, 3),
+                'episode_ids': [self.episode_ids[row] for row in entry['rows']],
+            })
+        return results
+
+    def resolve(self, name: str, field: str = 'guest') -> Optional[str]:
+        """Canonical spelling of a name, or None if nothing is close enough."""
+        matches = self.lookup(name, fields=[field], limit=1)
+        return matches[0]['text'] if matches else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzy lookup of guests, titles and episode ids")
+    parser.add_argument('query', help='Name, title fragment or slug (typos allowed)')
+    parser.add_argument('--field', choices=INDEXED_FIELDS, action='append',
+                        help='Restrict to a field (repeatable)')
+    parser.add_argument('--limit', type=int, default=10, help='Maximum number of matches')
+    parser.add_argument('--index', type=str, default=None, help='Override trigram index path')
+    args = parser.parse_args()
+
+    index = TrigramIndex(Path(args.index) if args.index else TRIGRAM_INDEX_FILE)
+    started = time.perf_counter()
+    matches = index.lookup(args.query, fields=args.field, limit=args.limit)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(f"Matches for '{args.query}' ({elapsed_ms:.3f} ms):")
+    for match in matches:
+        episodes = ', '.join(match['episode_ids'][:3])
+        print(f"  {match['score']:.2f}  [{match['field']}] {match['text'][:60]}  -> {episodes}")
+    if not matches:
+        print("  (no matches)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Hybrid lexical + vector retrieval over transcript chunks.
+
+Two retrievers run concurrently for every query:
+
+    lexical  - BM25 over a chunk-level inverted index (good at names,
+               acronyms and exact terms)
+    vector   - cosine similarity of embeddings (good at paraphrases); uses
+               the PQ index when it has been built, else the full vectors
+
+Their rankings are fused with reciprocal rank fusion (RRF):
+score(chunk) = sum over retrievers of 1 / (RRF_K + rank). Chunks from the same
+episode are then collapsed into one result. Every search reports its
+per-stage latencies.
+
+Output of the lexical build (`knowledge_base/lexical/`):
+    terms.json      - sorted vocabulary (term id = position)
+    postings.npz    - CSR term -> (chunk ids, term frequencies), chunk lengths
+    manifest.json   - build parameters and BM25 statistics
+
+Usage:
+    python3 hybrid_search.py --build
+    python3 hybrid_search.py "How does Figma think about PLG?"
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from corpus_blob import CORPUS_DIR, Corpus
+from embeddings import EMBEDDINGS_DIR, MODEL_FILE, get_backend, load_vectors, vector_search
+from text_features import CSRMatrix, tokenize
+from timestamps import TIMESTAMPS_DIR, TimestampIndex
+
+# Configuration
+LEXICAL_DIR = Path(__file__).parent / "knowledge_base" / "lexical"
+TERMS_FILE = "terms.json"
+POSTINGS_FILE = "postings.npz"
+MANIFEST_FILE = "manifest.json"
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+CANDIDATES = 100  # results taken from each retriever before fusion
+
+
+def build_lexical_index(corpus_dir: Path = CORPUS_DIR, output_dir: Path = LEXICAL_DIR) -> Path:
+    """Chunk-level inverted index with term frequencies for BM25."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    corpus = Corpus(corpus_dir)
+
+    term_ids: Dict[str, int] = {}
+    chunk_terms: List[np.ndarray] = []
+    for chunk_id in range(len(corpus)):
+        tokens = tokenize(corpus.chunk_text(chunk_id))
+        chunk_terms.append(np.fromiter((term_ids.setdefault(t, len(term_ids)) for t in tokens),
+                                       dtype=np.int64, count=len(tokens)))
+    lengths = np.array([len(terms) for terms in chunk_terms], dtype=np.int32)
+
+    # Sort terms alphabetically so ids are stable and terms.json is diffable
+    terms = sorted(term_ids)
+    remap = np.empty(len(terms), dtype=np.int64)
+    remap[[term_ids[t] for t in terms]] = np.arange(len(terms))
+
+    n_terms = len(terms)
+    all_terms = remap[np.concatenate(chunk_terms)] if chunk_terms else np.empty(0, dtype=np.int64)
+    all_chunks = np.repeat(np.arange(len(chunk_terms), dtype=np.int64), lengths)
+    pairs, tf = np.unique(all_terms * len(chunk_terms) + all_chunks, return_counts=True)
+    indices = (pairs % max(len(chunk_terms), 1)).astype(np.int32)
+    indptr = np.zeros(n_terms + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pairs // max(len(chunk_terms), 1), minlength=n_terms), out=indptr[1:])
+
+    np.savez(output_dir / POSTINGS_FILE, indptr=indptr, indices=indices,
+             tf=tf.astype(np.int32), lengths=lengths)
+    with open(output_dir / TERMS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(terms, f, ensure_ascii=False)
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_chunks': len(chunk_terms),
+            'total_terms': n_terms,
+            'total_postings': len(indices),
+            'average_chunk_length': float(lengths.mean()) if len(lengths) else 0.0,
+            'description': 'BM25 inverted index over corpus chunks (rows match corpus/chunks.npy)'
+        }, f, indent=2)
+    return output_dir
+
+
+def bm25_idf(df, n_chunks: int):
+    """BM25 inverse document frequency of terms occurring in `df` of `n_chunks` chunks."""
+    return np.log(1 + (n_chunks - np.asarray(df) + 0.5) / (np.asarray(df) + 0.5))
+
+
+def bm25_length_norm(lengths: np.ndarray, average_length: float) -> np.ndarray:
+    """Per-chunk length normalization of the BM25 denominator."""
+    return (BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(average_length, 1e-9))).astype(np.float32)
+
+
+class LexicalIndex:
+    """BM25 ranking of chunks."""
+
+    def __init__(self, directory: Path = LEXICAL_DIR):
+        directory = Path(directory)
+        with open(directory / TERMS_FILE, 'r', encoding='utf-8') as f:
+            self.term_ids = {term: i for i, term in enumerate(json.load(f))}
+        with np.load(directory / POSTINGS_FILE) as postings:
+            self.postings = CSRMatrix(postings['indptr'], postings['indices'],
+                                      postings['tf'], len(postings['lengths']))
+            self.lengths = postings['lengths'].astype(np.float32)
+        # Per-chunk length normalization of the BM25 denominator, precomputed
+        self.length_norm = bm25_length_norm(self.lengths, self.lengths.mean() if len(self.lengths) else 0.0)
+        df = np.diff(self.postings.indptr)
+        self.idf = bm25_idf(df, len(self.lengths)).astype(np.float32)
+
+    def document_frequencies(self, terms: Iterable[str], mask: np.ndarray = None) -> Dict[str, int]:
+        """Chunks containing each term (counting only those where `mask` is True, if given)."""
+        frequencies = {}
+        for term in terms:
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            lo, hi = self.postings.indptr[term_id], self.postings.indptr[term_id + 1]
+            frequencies[term] = int(hi - lo) if mask is None else int(np.count_nonzero(mask[self.postings.indices[lo:hi]]))
+        return frequencies
+
+    def search(self, query: str, top_k: int = CANDIDATES, mask: np.ndarray = None,
+               idf: Dict[str, float] = None, average_length: float = None) -> List[Tuple[int, float]]:
+        """(chunk_id, bm25) of the best-scoring chunks (only those where `mask` is True, if given).
+
+        `idf` (per query term) and `average_length` replace this index's own
+        statistics, so several indexes searched as one collection score alike.
+        """
+        scores = np.zeros(self.postings.n_cols, dtype=np.float32)
+        length_norm = self.length_norm if average_length is None else bm25_length_norm(self.lengths, average_length)
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            weight = self.idf[term_id] if idf is None else np.float32(idf[term])
+            lo, hi = self.postings.indptr[term_id], self.postings.indptr[term_id + 1]
+            chunks = self.postings.indices[lo:hi]
+            tf = self.postings.data[lo:hi]
+            scores[chunks] += weight * tf * (BM25_K1 + 1) / (tf + length_norm[chunks])
+        if mask is not None:
+            scores[~mask] = 0
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        top = matched[np.argsort(-scores[matched], kind='stable')[:top_k]]
+        return [(int(chunk_id), float(scores[chunk_id])) for chunk_id in top]
+
+
+class VectorRetriever:
+    """Embedding search through the PQ index if built, else over the full vectors."""
+
+    def __init__(self, backend_name: str = 'lsa', vectors_dir: Path = EMBEDDINGS_DIR, pq_dir: Path = None):
+        # The local model lives next to the vectors it produced
+        options = {'path': Path(vectors_dir) / MODEL_FILE} if backend_name == 'lsa' else {}
+        self.backend = get_backend(backend_name, **options)
+        self.pq = None
+        if pq_dir is not None and Path(pq_dir).exists():
+            from pq_index import PQIndex
+            self.pq = PQIndex(pq_dir, vectors_dir)
+        else:
+            self.vectors = load_vectors(vectors_dir)
+
+    def search(self, query: str, top_k: int = CANDIDATES) -> List[Tuple[int, float]]:
+        if not tokenize(query):
+            # Empty or stopword-only: there is nothing to embed, and a zero vector would rank chunks arbitrarily
+            return []
+        vector = self.backend.embed([query])[0]
+        if self.pq is not None:
+            return self.pq.search(vector, top_k, rerank=top_k)
+        return vector_search(self.vectors, vector, top_k)
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[Tuple[int, float]]], k: int = RRF_K) -> Dict[int, Dict[str, Any]]:
+    """chunk_id -> fused score and the rank it had in each input ranking."""
+    fused: Dict[int, Dict[str, Any]] = {}
+    for name, ranking in rankings.items():
+        for rank, (chunk_id, _) in enumerate(ranking, 1):
+            entry = fused.setdefault(chunk_id, {'score': 0.0, 'ranks': {}})
+            entry['score'] += 1.0 / (k + rank)
+            entry['ranks'][name] = rank
+    return fused
+
+
+class HybridSearcher:
+    """Concurrent lexical + vector retrieval, fused with RRF and collapsed by episode."""
+
+    def __init__(self, corpus_dir: Path = CORPUS_DIR, lexical_dir: Path = LEXICAL_DIR,
+                 vectors_dir: Path = EMBEDDINGS_DIR, pq_dir: Path = None, backend_name: str = 'lsa',
+                 timestamps_dir: Path = TIMESTAMPS_DIR):
+        self.corpus = Corpus(corpus_dir)
+        self.lexical = LexicalIndex(lexical_dir)
+        self.vector = VectorRetriever(backend_name, vectors_dir, pq_dir)
+        # Optional: chunks get a video timestamp and deep link when it is built
+        self.timestamps = TimestampIndex(timestamps_dir) if Path(timestamps_dir).exists() else None
+        self.pool = ThreadPoolExecutor(max_workers=2)
+
+    def _timed(self, retriever, query: str, candidates: int) -> Tuple[List[Tuple[int, float]], float]:
+        started = time.perf_counter()
+        results = retriever.search(query, candidates)
+        return results, (time.perf_counter() - started) * 1000
+
+    def search(self, query: str, top_k: int = 5, candidates: int = CANDIDATES,
+               rrf_k: int = RRF_K, chunks_per_episode: int = 3) -> Dict[str, Any]:
+        """Best episodes for a query, each with its best-matching chunks.
+
+        Returns {'results': [...], 'timings_ms': {...}} where every result has
+        the episode id, fused score, and up to chunks_per_episode chunks with
+        their lexical/vector ranks.
+        """
+        started = time.perf_counter()
+        lexical_future = self.pool.submit(self._timed, self.lexical, query, candidates)
+        vector_future = self.pool.submit(self._timed, self.vector, query, candidates)
+        lexical, lexical_ms = lexical_future.result()
+        vector, vector_ms = vector_future.result()
+        retrieved = time.perf_counter()
+
+        fused = reciprocal_rank_fusion({'lexical': lexical, 'vector': vector}, rrf_k)
+        episodes: Dict[int, Dict[str, Any]] = {}
+        for chunk_id, entry in sorted(fused.items(), key=lambda item: -item[1]['score']):
+            row = int(self.corpus.chunks['episode_row'][chunk_id])
+            episode = episodes.get(row)
+            if episode is None:
+                if len(episodes) == top_k:
+                    continue
+                episode = episodes[row] = {
+                    'episode_id': self.corpus.episode_ids[row],
+                    'score': entry['score'],
+                    'chunks': [],
+                }
+            if len(episode['chunks']) < chunks_per_episode:
+                chunk = {
+                    'chunk_id': chunk_id,
+                    'chunk_index': self.corpus.chunk_index(chunk_id),
+                    'score': entry['score'],
+                    'ranks': entry['ranks'],
+                    'text': self.corpus.chunk_text(chunk_id),
+                }
+                if self.timestamps is not None:
+                    chunk.update(self.timestamps.locate_chunk(self.corpus, chunk_id))
+                episode['chunks'].append(chunk)
+        finished = time.perf_counter()
+
+        return {
+            'query': query,
+            'results': list(episodes.values()),
+            'timings_ms': {
+                'lexical': round(lexical_ms, 2),
+                'vector': round(vector_ms, 2),
+                'retrieval': round((retrieved - started) * 1000, 2),
+                'fusion': round((finished - retrieved) * 1000, 2),
+                'total': round((finished - started) * 1000, 2),
+            },
+        }
+
+
+def print_response(query: str, response: Dict[str, Any]):
+    timings = ', '.join(f"{stage} {ms:.1f}" for stage, ms in response['timings_ms'].items())
+    print(f"Top {len(response['results'])} episodes for '{query}' (ms: {timings}):")
+    for result in response['results']:
+        print(f"\n{result['score']:.4f}  {result['episode_id']}")
+        for chunk in result['chunks']:
+            ranks = ' '.join(f"{name}#{rank}" for name, rank in chunk['ranks'].items())
+            print(f"   [{chunk['chunk_index']}] ({ranks}) {chunk['text'][:150]}...")
+            if chunk.get('url'):
+                print(f"      {chunk['timestamp']}  {chunk['url']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid BM25 + vector search over chunks")
+    parser.add_argument('query', nargs='?', help='Search query')
+    parser.add_argument('--build', action='store_true', help='Build the lexical (BM25) index')
+    parser.add_argument('--top', type=int, default=5, help='Number of episodes')
+    parser.add_argument('--pq', action='store_true', help='Use the PQ index for the vector stage')
+    args = parser.parse_args()
+
+    if args.build:
+        output_dir = build_lexical_index()
+        print(f"✓ Created {output_dir}/")
+    if not args.query:
+        if not args.build:
+            parser.print_help()
+        return
+
+    from pq_index import PQ_DIR
+
+    searcher = HybridSearcher(pq_dir=PQ_DIR if args.pq else None)
+    print_response(args.query, searcher.search(args.query, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,41 +7,11 @@ import json
 from pathlib import Path
 
 # Configuration
-CHUNKS_DIR = Path("knowledge_base/chunks")
+CHUNKS_DIR = Path(__file__).parent / "chunks"
 BATCH_SIZE = 5  # Episodes per message (will combine chunks as needed)
-OUTPUT_DIR = Path("knowledge_base/batch_prompts")
+OUTPUT_DIR = Path(__file__).parent / "batch_prompts"
 
-def load_chunk(chunk_num):
-    """Load a chunk file"""
-    chunk_file = CHUNKS_DIR / f"knowledge_base_chunk_{chunk_num:03d}.json"
-    with open(chunk_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def generate_batch_prompts():
-    """Generate batch prompt files for efficient ChatGPT processing"""
-    
-    OUTPUT_DIR.mkdir(exist_ok=True)
-    
-    # Load index to get total episodes
-    with open(CHUNKS_DIR / 'index.json', 'r') as f:
-        index = json.load(f)
-    
-    total_episodes = index['metadata']['total_episodes']
-    total_batches = (total_episodes + BATCH_SIZE - 1) // BATCH_SIZE
-    
-    print(f"Generating batch prompts for {total_episodes} episodes")
-    print(f"Batch size: {BATCH_SIZE} episodes per message")
-    print(f"Total batches: {total_batches}\n")
-    
-    # Generate prompts
-    for batch_num in range(total_batches):
-        start_ep = batch_num * BATCH_SIZE + 1
-        end_ep = min((batch_num + 1) * BATCH_SIZE, total_episodes)
-        
-        # Build prompt
-        if batch_num == 0:
-            # First batch - include system prompt
-            prompt = """You are an expert at creating structured knowledge bases from podcast transcripts. I have 269 episodes from Lenny's Podcast that I want to turn into a comprehensive, searchable knowledge base.
+FIRST_BATCH_INSTRUCTIONS = """You are an expert at creating structured knowledge bases from podcast transcripts. I have 269 episodes from Lenny's Podcast that I want to turn into a comprehensive, searchable knowledge base.
 
 ## Your Task
 
@@ -82,18 +52,48 @@ I'll provide episodes in batches. For each batch:
 - Maintain cross-references with previously processed episodes
 - Update the master index, topic organization, and framework library
 
-Here are the first {} episodes to process:
+Here are the first episodes to process:"""
 
-""".format(end_ep - start_ep + 1)
-        else:
-            # Subsequent batches
-            prompt = f"""Process episodes {start_ep} through {end_ep} and add them to the knowledge base:
+NEXT_BATCH_INSTRUCTIONS = """Process the following episodes and add them to the knowledge base.
+Maintain cross-references with all previously processed episodes.
+Update the master index, topic organization, and framework library."""
 
-"""
+def load_chunk(chunk_num, chunks_dir=CHUNKS_DIR):
+    """Load a chunk file"""
+    chunk_file = chunks_dir / f"knowledge_base_chunk_{chunk_num:03d}.json"
+    with open(chunk_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def generate_batch_prompts(chunks_dir=CHUNKS_DIR, output_dir=OUTPUT_DIR):
+    """Generate batch prompt files for efficient ChatGPT processing"""
+    
+    output_dir.mkdir(exist_ok=True)
+    
+    # Load index to get total episodes
+    with open(chunks_dir / 'index.json', 'r') as f:
+        index = json.load(f)
+    
+    total_episodes = index['metadata']['total_episodes']
+    total_batches = (total_episodes + BATCH_SIZE - 1) // BATCH_SIZE
+    
+    print(f"Generating batch prompts for {total_episodes} episodes")
+    print(f"Batch size: {BATCH_SIZE} episodes per message")
+    print(f"Total batches: {total_batches}\n")
+    
+    # Generate prompts
+    for batch_num in range(total_batches):
+        start_ep = batch_num * BATCH_SIZE + 1
+        end_ep = min((batch_num + 1) * BATCH_SIZE, total_episodes)
+        
+        # Build prompt: the fixed instructions come first and are byte-identical
+        # in every batch of their kind, so prompt caching can reuse them;
+        # everything that varies (episodes, ranges) follows them
+        prompt = FIRST_BATCH_INSTRUCTIONS if batch_num == 0 else NEXT_BATCH_INSTRUCTIONS
+        prompt += "\n\n"
         
         # Add episodes to prompt
         for ep_num in range(start_ep, end_ep + 1):
-            chunk_data = load_chunk(ep_num)
+            chunk_data = load_chunk(ep_num, chunks_dir)
             episode = chunk_data['episodes'][0]  # Only one episode per file
             
             # Add episode to prompt
@@ -111,14 +111,12 @@ Guest: {episode['guest']}
             prompt += "\n```\n\n"
         
         if batch_num == 0:
-            prompt += "Please process these episodes and create the initial knowledge base structure.\n"
+            prompt += f"These are episodes {start_ep}-{end_ep}. Please process them and create the initial knowledge base structure.\n"
         else:
-            prompt += f"""Maintain cross-references with all previously processed episodes (1-{start_ep-1}).
-Update the master index, topic organization, and framework library.
-"""
+            prompt += f"These are episodes {start_ep}-{end_ep}; previously processed episodes are 1-{start_ep-1}.\n"
         
         # Save prompt
-        prompt_file = OUTPUT_DIR / f"batch_{batch_num+1:03d}_episodes_{start_ep:03d}-{end_ep:03d}.txt"
+        prompt_file = output_dir / f"batch_{batch_num+1:03d}_episodes_{start_ep:03d}-{end_ep:03d}.txt"
         with open(prompt_file, 'w', encoding='utf-8') as f:
             f.write(prompt)
         
@@ -140,6 +138,10 @@ Files Created:
         summary += f"  batch_{batch_num+1:03d}_episodes_{start_ep:03d}-{end_ep:03d}.txt\n"
     
     summary += f"""
+Stable prefix (identical in every batch of its kind):
+  batch_001:     {len(FIRST_BATCH_INSTRUCTIONS):,} characters of instructions
+  batch_002+:    {len(NEXT_BATCH_INSTRUCTIONS):,} characters of instructions
+
 Usage:
 1. Copy batch_001 file and paste into ChatGPT (includes system prompt)
 2. After ChatGPT responds, copy batch_002 and paste
@@ -149,10 +151,10 @@ Usage:
 Each batch file is ready to copy-paste directly into ChatGPT.
 """
     
-    with open(OUTPUT_DIR / "README.txt", 'w') as f:
+    with open(output_dir / "README.txt", 'w') as f:
         f.write(summary)
     
-    print(f"\n✓ Created {total_batches} batch prompt files in {OUTPUT_DIR}")
+    print(f"\n✓ Created {total_batches} batch prompt files in {output_dir}")
     print(f"✓ Created README.txt with usage instructions")
 
 if __name__ == "__main__":
@@ -4,11 +4,15 @@ Basic usage examples for the Lenny's Podcast Knowledge Base
 """
 
 import json
+import sys
 from pathlib import Path
 
 # Get the knowledge base directory
 KB_DIR = Path(__file__).parent.parent
 
+# Make the repository-level modules (fuzzy_lookup, columnar_index) importable
+sys.path.insert(0, str(KB_DIR.parent))
+
 # Example 1: Load and explore the knowledge base
 print("=" * 80)
 print("Example 1: Loading the Knowledge Base")
@@ -45,6 +49,15 @@ print(f"Found {len(matching_episodes)} episode(s) with '{guest_name}':")
 for ep in matching_episodes:
     print(f"  - {ep['title']}")
 
+# Fuzzy lookup tolerates typos, nicknames in titles and accents
+from fuzzy_lookup import TrigramIndex
+
+trigram_index = TrigramIndex(KB_DIR / 'trigram_index.json')
+for query in ["shreyas dosh", "bosworht", "soderstrom"]:
+    matches = trigram_index.lookup(query, limit=1)
+    if matches:
+        print(f"  '{query}' -> {matches[0]['text']} ({', '.join(matches[0]['episode_ids'])})")
+
 # Example 4: Get most popular episodes
 print("\n" + "=" * 80)
 print("Example 4: Most Popular Episodes (by views)")
@@ -102,6 +115,29 @@ print(f"\nEpisodes longer than 1 hour: {len(long_episodes)}")
 for ep in long_episodes[:3]:
     print(f"  - {ep['guest']}: {ep['duration']}")
 
+# Example 7: Columnar index (memory-mapped, vectorized queries)
+print("\n" + "=" * 80)
+print("Example 7: Using the Columnar Index (requires numpy)")
+print("=" * 80)
+
+try:
+    from columnar_index import EpisodeTable
+
+    table = EpisodeTable(KB_DIR / 'columnar')
+    stats = table.summary()
+    print(f"Total words: {stats['total_words']:,}")
+    print(f"Average duration: {stats['average_duration_seconds'] / 60:.1f} minutes")
+
+    print("\nTop 3 episodes by views:")
+    for row in table.top('view_count', 3):
+        print(f"  - {table.text('guest', row)}: {table.column('view_count')[row]:,.0f} views")
+
+    long_rows = table.where(table.column('duration_seconds') > 3600)
+    print(f"\nEpisodes longer than 1 hour: {len(long_rows)}")
+except (ImportError, FileNotFoundError) as e:
+    print(f"Skipped: {e}")
+    print("Install numpy and rerun create_knowledge_base.py to build knowledge_base/columnar/")
+
 print("\n" + "=" * 80)
 print("Done! Check the other example files for more advanced usage.")
 print("=" * 80)
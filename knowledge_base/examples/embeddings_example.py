@@ -1,87 +1,71 @@
 #!/usr/bin/env python3
 """
 Example: Creating embeddings for RAG (Retrieval-Augmented Generation)
+
+Usage:
+    python3 embeddings_example.py            # offline LSA backend (default)
+    python3 embeddings_example.py openai     # OpenAI embedding API
+
+The offline backend needs `python3 embeddings.py --build` to be run once
+from the repository root.
 """
 
 import json
-import numpy as np
+import sys
 from pathlib import Path
-from openai import OpenAI
 
 # Get the knowledge base directory
 KB_DIR = Path(__file__).parent.parent
-
-# Initialize OpenAI client
-client = OpenAI()
+sys.path.insert(0, str(KB_DIR.parent))
 
 def load_chunks():
     """Load the chunks for embeddings"""
     with open(KB_DIR / 'chunks_for_embeddings.json', 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def create_embeddings(chunks_data, max_chunks=100):
+def create_embeddings(chunks_data, backend, max_chunks=100, batch_size=50):
     """
-    Create embeddings for chunks using OpenAI's embedding model.
-    In production, process all chunks in batches.
+    Create embeddings for chunks with the given embedding backend.
+    In production, process all chunks (see `embeddings.py --build`).
     """
-    print(f"Creating embeddings for {min(max_chunks, len(chunks_data['chunks']))} chunks...")
+    print(f"Creating {backend.name} embeddings for {min(max_chunks, len(chunks_data['chunks']))} chunks...")
     
     embeddings = []
     chunks_to_process = chunks_data['chunks'][:max_chunks]
+    texts = (chunk['text'] for chunk in chunks_to_process)
     
-    for i, chunk in enumerate(chunks_to_process):
-        if (i + 1) % 10 == 0:
-            print(f"  Processed {i + 1}/{len(chunks_to_process)} chunks...")
-        
-        try:
-            response = client.embeddings.create(
-                input=chunk['text'],
-                model="text-embedding-ada-002"
-            )
-            
+    for batch in backend.embed_batches(texts, batch_size):
+        for vector in batch:
+            chunk = chunks_to_process[len(embeddings)]
             embeddings.append({
                 'chunk_id': f"{chunk['episode_id']}_{chunk['chunk_index']}",
-                'embedding': response.data[0].embedding,
+                'embedding': vector.tolist(),
                 'episode_id': chunk['episode_id'],
                 'episode_title': chunk['episode_title'],
                 'guest': chunk['guest'],
                 'text': chunk['text']
             })
-        except Exception as e:
-            print(f"Error processing chunk {i}: {e}")
-            continue
+        print(f"  Processed {len(embeddings)}/{len(chunks_to_process)} chunks...")
     
     return embeddings
 
-def search_similar_chunks(query, embeddings, chunks_data, top_k=5):
+def search_similar_chunks(query, embeddings, backend, top_k=5):
     """
     Search for similar chunks using cosine similarity
     """
-    # Create query embedding
-    query_response = client.embeddings.create(
-        input=query,
-        model="text-embedding-ada-002"
-    )
-    query_embedding = np.array(query_response.data[0].embedding)
-    
-    # Calculate similarities
-    similarities = []
-    for emb in embeddings:
-        chunk_embedding = np.array(emb['embedding'])
-        # Cosine similarity
-        similarity = np.dot(query_embedding, chunk_embedding) / (
-            np.linalg.norm(query_embedding) * np.linalg.norm(chunk_embedding)
-        )
-        similarities.append((similarity, emb))
-    
-    # Sort by similarity
-    similarities.sort(reverse=True)
+    import numpy as np
+
+    # Backends return unit-length vectors, so cosine similarity is a dot product
+    query_embedding = backend.embed([query])[0]
+    matrix = np.array([emb['embedding'] for emb in embeddings], dtype=np.float32)
+    similarities = matrix @ query_embedding
     
     # Return top results
     results = []
-    for similarity, emb in similarities[:top_k]:
+    for i in np.argsort(-similarities)[:top_k]:
+        emb = embeddings[i]
         results.append({
-            'similarity': float(similarity),
+            'similarity': float(similarities[i]),
             'text': emb['text'],
             'episode': emb['episode_title'],
             'guest': emb['guest']
@@ -93,6 +77,7 @@ def main():
     print("=" * 80)
     print("Embeddings Example for RAG")
     print("=" * 80)
+    backend_name = sys.argv[1] if len(sys.argv) > 1 else 'lsa'
     
     # Load chunks
     print("\nLoading chunks...")
@@ -102,14 +87,17 @@ def main():
     # Create embeddings (limiting to 100 for demo - use all in production)
     print("\nCreating embeddings...")
     try:
-        embeddings = create_embeddings(chunks_data, max_chunks=100)
+        # numpy (and openai for that backend) load only once embeddings are needed
+        from embeddings import get_backend
+        backend = get_backend(backend_name)
+        embeddings = create_embeddings(chunks_data, backend, max_chunks=100)
         print(f"\nCreated {len(embeddings)} embeddings")
         
         # Example search
         query = "How to prioritize product features?"
         print(f"\nSearching for: '{query}'")
         
-        results = search_similar_chunks(query, embeddings, chunks_data, top_k=3)
+        results = search_similar_chunks(query, embeddings, backend, top_k=3)
         
         print("\n" + "=" * 80)
         print("Top Results:")
@@ -129,10 +117,9 @@ def main():
     except Exception as e:
         print(f"\nError: {e}")
         print("\nMake sure you have:")
-        print("1. Set OPENAI_API_KEY environment variable")
-        print("2. Installed openai package: pip install openai")
-        print("3. Installed numpy: pip install numpy")
-        print("4. Have API credits available")
+        print("1. Installed numpy: pip install numpy")
+        print("2. For the offline backend: run `python3 embeddings.py --build` from the repository root")
+        print("3. For the openai backend: set OPENAI_API_KEY, pip install openai, and have API credits available")
 
 if __name__ == "__main__":
     main()
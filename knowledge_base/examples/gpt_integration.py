@@ -1,17 +1,61 @@
 #!/usr/bin/env python3
 """
 Example: Using the knowledge base with GPT/OpenAI
+
+By default the answer is streamed: tokens are printed as they arrive, the
+retrieval for the next (follow-up) question runs while the current answer
+is still generating, and time-to-first-token and tokens/s are reported for
+every request. Use --no-stream for the blocking OpenAI SDK call.
+
+Follow-ups share one chat_session.ChatSession, so each turn sends only the
+excerpts not sent before plus a bounded question/answer history instead of
+rebuilding the whole context; --dry-run prints the total input tokens of the
+session against stateless requests (build_messages) without calling a model.
+
+Usage:
+    python3 examples/gpt_integration.py ["question" ["follow-up" ...]] [--no-stream]
+    python3 ../stub_chat_server.py --latency 0.3 --token-delay 0.02 &   # offline test
+    python3 examples/gpt_integration.py --base-url http://127.0.0.1:8765/v1
+    python3 examples/gpt_integration.py --dry-run
 """
 
+import argparse
+import asyncio
 import json
+import sys
+import time
 from pathlib import Path
-from openai import OpenAI
 
 # Get the knowledge base directory
 KB_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(KB_DIR.parent))
+
+from chat_client import DEFAULT_BASE_URL, AsyncChatClient, ChatError, StreamStats
+from chat_session import ChatSession, episode_passages
+from prompt_layout import approx_tokens
+from text_features import tokenize
+
+# Stand-in answer for --dry-run, about as long as a typical real one (~500 tokens)
+DRY_RUN_ANSWER = "This is a placeholder answer that stands in for the model's reply. " * 30
+
+# A question and four follow-ups
+CONVERSATION = [
+    "How do I build a great product team?",
+    "How should I hire the first product managers for that team?",
+    "What mistakes do leaders make when hiring product managers?",
+    "How do the best product teams run reviews?",
+    "How big should a product team be before adding managers?",
+]
+
+_client = None
 
-# Initialize OpenAI client (you'll need to set OPENAI_API_KEY)
-client = OpenAI()
+def get_openai_client():
+    """OpenAI SDK client, created on first use (you'll need to set OPENAI_API_KEY)"""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI()
+    return _client
 
 def load_knowledge_base():
     """Load the knowledge base"""
@@ -23,23 +67,24 @@ def find_relevant_episodes(kb, query, top_n=3):
     Simple keyword-based search to find relevant episodes.
     For production, use embeddings + vector search instead.
     """
-    query_words = set(query.lower().split())
+    # Stopwords would match every transcript, so only content words count
+    query_words = set(tokenize(query))
     scored_episodes = []
     
     for ep in kb['episodes']:
         transcript_lower = ep['transcript'].lower()
-        # Count how many query words appear in transcript
-        matches = sum(1 for word in query_words if word in transcript_lower)
+        # Count how often the query words appear in the transcript
+        matches = sum(transcript_lower.count(word) for word in query_words)
         if matches > 0:
             scored_episodes.append((matches, ep))
     
     # Sort by relevance
-    scored_episodes.sort(reverse=True)
+    scored_episodes.sort(key=lambda x: x[0], reverse=True)
     return [ep for _, ep in scored_episodes[:top_n]]
 
-def ask_gpt_with_context(question, episodes):
+def build_messages(question, episodes):
     """
-    Ask GPT a question with relevant podcast context
+    Chat messages for a question with relevant podcast context
     """
     # Build context from relevant episodes
     context_parts = []
@@ -66,20 +111,105 @@ Question: {question}
 
 Please provide a comprehensive answer based on the information in these transcripts."""
 
-    # Call GPT
-    response = client.chat.completions.create(
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def stateless_tokens(question, episodes):
+    """Input tokens of the same question sent on its own (build_messages)"""
+    return sum(approx_tokens(message['content']) for message in build_messages(question, episodes))
+
+def ask_gpt_with_context(question, episodes):
+    """
+    Ask GPT a question with relevant podcast context (blocks until the full answer arrives)
+    """
+    response = get_openai_client().chat.completions.create(
         model="gpt-4",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
+        messages=build_messages(question, episodes),
         temperature=0.7,
         max_tokens=1000
     )
     
     return response.choices[0].message.content
 
+async def stream_gpt_with_context(question, episodes, client, stats=None):
+    """
+    Yield GPT's answer text as it is generated; pass a StreamStats for TTFT and tokens/s
+    """
+    async for text in client.stream(build_messages(question, episodes), stats=stats,
+                                    temperature=0.7, max_tokens=1000):
+        yield text
+
+def retrieve_passages(kb, question, top_n=3):
+    """Relevant episodes and the excerpt of each that best matches the question"""
+    episodes = find_relevant_episodes(kb, question, top_n)
+    return episodes, episode_passages(episodes, question)
+
+async def stream_conversation(kb, questions, client, top_n=3, session=None, dry_run=False):
+    """
+    Stream answers to a question and its follow-ups, printing tokens as they arrive.
+
+    All turns share one ChatSession, so a follow-up adds only excerpts that
+    were not sent before. Retrieval for the next question runs in
+    a thread while the current answer streams, so follow-ups start generating
+    without waiting on the search. With dry_run no model is called and each
+    answer is a placeholder of typical length.
+    Returns per-question metrics.
+    """
+    session = session or ChatSession()
+    metrics = []
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    next_retrieval = loop.run_in_executor(None, retrieve_passages, kb, questions[0], top_n)
+    for i, question in enumerate(questions):
+        waited = time.perf_counter()
+        episodes, passages = await next_retrieval
+        retrieval_wait_ms = (time.perf_counter() - waited) * 1000
+        if i + 1 < len(questions):
+            next_retrieval = loop.run_in_executor(None, retrieve_passages, kb, questions[i + 1], top_n)
+
+        turn = session.add_turn(question, passages)
+        stateless = stateless_tokens(question, episodes)
+        print(f"\nQuestion: {question}")
+        print("Sources: " + ", ".join(ep['guest'] for ep in episodes))
+        print(f"Input: ~{turn.prompt_tokens:,} tokens (stateless: ~{stateless:,}), "
+              f"~{turn.new_tokens:,} outside the cached prefix; excerpts +{turn.passages_added} added, "
+              f"{turn.passages_reused} already sent; {turn.turns_evicted} old turns dropped")
+        record = {'question': question, 'prompt_tokens': turn.prompt_tokens, 'new_tokens': turn.new_tokens,
+                  'stateless_tokens': stateless, 'retrieval_wait_ms': round(retrieval_wait_ms, 1)}
+        if dry_run:
+            session.record_answer(DRY_RUN_ANSWER)
+            metrics.append(record)
+            continue
+
+        print("-" * 80)
+        stats = StreamStats()
+        answer = []
+        async for text in client.stream(session.messages(), stats=stats, temperature=0.7, max_tokens=1000):
+            answer.append(text)
+            print(text, end="", flush=True)
+        session.record_answer("".join(answer))
+        print("\n" + "-" * 80)
+        print(f"{stats.summary()} (waited {retrieval_wait_ms:.1f} ms for retrieval)")
+        metrics.append({**record, **stats.as_dict()})
+
+    print(f"\nAnswered {len(questions)} questions in {time.perf_counter() - started:.1f}s")
+    session_total = sum(m['prompt_tokens'] for m in metrics)
+    stateless_total = sum(m['stateless_tokens'] for m in metrics)
+    print(f"Input tokens: ~{session_total:,} with the session vs ~{stateless_total:,} stateless "
+          f"({session_total / max(stateless_total, 1):.0%} of stateless); "
+          f"~{sum(m['new_tokens'] for m in metrics):,} of them outside the cached prefix")
+    return metrics
+
 def main():
+    parser = argparse.ArgumentParser(description="Ask GPT questions with podcast context")
+    parser.add_argument('questions', nargs='*', help='A question followed by any follow-up questions')
+    parser.add_argument('--no-stream', action='store_true', help='Wait for the full answer (OpenAI SDK)')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='OpenAI-compatible API base URL')
+    parser.add_argument('--dry-run', action='store_true', help='Report session input tokens without calling a model')
+    args = parser.parse_args()
+    
     print("=" * 80)
     print("GPT Integration Example")
     print("=" * 80)
@@ -89,8 +219,19 @@ def main():
     kb = load_knowledge_base()
     print(f"Loaded {len(kb['episodes'])} episodes")
     
+    questions = args.questions or CONVERSATION
+    if not args.no_stream:
+        try:
+            asyncio.run(stream_conversation(kb, questions, AsyncChatClient(args.base_url),
+                                            dry_run=args.dry_run))
+        except ChatError as e:
+            print(f"\nError: {e}")
+            print("\nMake sure you have set OPENAI_API_KEY (or --base-url for a local server)")
+            sys.exit(1)
+        return
+    
     # Example question
-    question = "How do I build a great product team?"
+    question = questions[0]
     
     print(f"\nQuestion: {question}")
     print("\nFinding relevant episodes...")
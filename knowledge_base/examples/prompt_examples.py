@@ -5,18 +5,29 @@ Shows how to combine prompts with actual transcript content
 """
 
 import json
+import sys
 from pathlib import Path
 
 # Get the knowledge base directory
 KB_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(KB_DIR.parent))
+
+from prompt_layout import Passage, PromptBuilder, corpus_digest
 
 def load_knowledge_base():
     """Load the knowledge base"""
     with open(KB_DIR / 'knowledge_base.json', 'r', encoding='utf-8') as f:
         return json.load(f)
 
+def correct_spelling(topic):
+    """Topic with misspelled words corrected (unchanged if the autocomplete index is not built)"""
+    if not (KB_DIR / "autocomplete" / "manifest.json").exists():
+        return topic
+    from autocomplete import Autocomplete
+    return Autocomplete(KB_DIR / "autocomplete").correct(topic)
+
 def find_relevant_episodes(kb, topic, max_episodes=3):
-    """Find episodes relevant to a topic"""
+    """Find episodes relevant to a topic (retrying with a spelling correction if none match)"""
     topic_lower = topic.lower()
     scored = []
     
@@ -27,32 +38,35 @@ def find_relevant_episodes(kb, topic, max_episodes=3):
         if score > 0:
             scored.append((score, ep))
     
+    if not scored:
+        corrected = correct_spelling(topic)
+        if corrected != topic_lower:
+            print(f"No episodes mention '{topic}'; searching for '{corrected}' instead")
+            return find_relevant_episodes(kb, corrected, max_episodes)
+    
     scored.sort(key=lambda x: x[0], reverse=True)
     return [ep for _, ep in scored[:max_episodes]]
 
-def build_prompt_with_context(prompt_template, relevant_episodes, max_chars_per_episode=3000):
-    """
-    Build a GPT prompt with relevant transcript context
-    """
-    # Build context from episodes
-    context_parts = []
-    for ep in relevant_episodes:
-        context_parts.append(
-            f"Episode: {ep['title']}\n"
-            f"Guest: {ep['guest']}\n"
-            f"Transcript excerpt:\n{ep['transcript'][:max_chars_per_episode]}...\n"
-        )
-    
-    context = "\n\n---\n\n".join(context_parts)
-    
-    # Combine with prompt template
-    full_prompt = f"""Based on these transcripts from Lenny's Podcast:
+def build_prompt_with_context(prompt_template, relevant_episodes, max_chars_per_episode=3000, builder=None):
+    """Build a GPT prompt with relevant transcript context (the full prompt text)"""
+    return render_prompt_with_context(prompt_template, relevant_episodes, max_chars_per_episode, builder).text
 
-{context}
+def render_prompt_with_context(prompt_template, relevant_episodes, max_chars_per_episode=3000, builder=None):
+    """
+    Lay out a GPT prompt with relevant transcript context.
 
-{prompt_template}"""
-    
-    return full_prompt
+    Segments are laid out from most to least stable (system instructions,
+    episode catalog, excerpts, question) so providers can cache the prefix;
+    pass the same builder for every request to keep that prefix identical.
+    Returns a prompt_layout.RenderedPrompt (use .messages for the API call).
+    """
+    if builder is None:
+        builder = PromptBuilder()
+    passages = [
+        Passage(ep['id'], ep['title'], ep['guest'], ep['transcript'][:max_chars_per_episode] + "...")
+        for ep in relevant_episodes
+    ]
+    return builder.render(passages, prompt_template)
 
 def example_prompts():
     """Show example prompts you can use"""
@@ -101,6 +115,10 @@ def main():
     kb = load_knowledge_base()
     print(f"Loaded {len(kb['episodes'])} episodes")
     
+    # One builder for all prompts: the system instructions and episode
+    # catalog form a byte-identical prefix that providers can cache
+    builder = PromptBuilder(digest=corpus_digest(kb['episodes']))
+    
     # Example 1: Product-Market Fit
     print("\n" + "=" * 80)
     print("Example 1: Product-Market Fit Prompt")
@@ -114,12 +132,14 @@ def main():
         print(f"  - {ep['guest']}: {ep['title'][:60]}...")
     
     prompt = example_prompts()["product_market_fit"]
-    full_prompt = build_prompt_with_context(prompt, relevant)
+    rendered = render_prompt_with_context(prompt, relevant, builder=builder)
     
-    print(f"\nFull prompt length: {len(full_prompt)} characters")
-    print(f"\nPrompt preview (first 500 chars):")
+    print(f"\nFull prompt length: {len(rendered.text)} characters")
+    print(f"Stable prefix: {rendered.stable_prefix_chars} characters "
+          f"(~{rendered.cacheable_prefix_tokens} tokens cacheable)")
+    print(f"\nExcerpts preview (first 500 chars):")
     print("-" * 80)
-    print(full_prompt[:500] + "...")
+    print(rendered.messages[1]['content'][:500] + "...")
     
     # Example 2: Building Teams
     print("\n" + "=" * 80)
@@ -134,9 +154,10 @@ def main():
         print(f"  - {ep['guest']}: {ep['title'][:60]}...")
     
     prompt = example_prompts()["building_teams"]
-    full_prompt = build_prompt_with_context(prompt, relevant)
+    rendered = render_prompt_with_context(prompt, relevant, builder=builder)
     
-    print(f"\nFull prompt length: {len(full_prompt)} characters")
+    print(f"\nFull prompt length: {len(rendered.text)} characters")
+    print(f"Shared prefix with the previous prompt: {rendered.shared_prefix_chars} characters")
     
     # Show how to use with OpenAI
     print("\n" + "=" * 80)
@@ -148,19 +169,11 @@ from openai import OpenAI
 
 client = OpenAI()
 
-# Use the prompt we built
+# Use the prompt we built: the system message holds the stable prefix
+# (instructions + episode catalog), the user message holds excerpts + question
 response = client.chat.completions.create(
     model="gpt-4",
-    messages=[
-        {
-            "role": "system",
-            "content": "You are an expert product management assistant with access to transcripts from Lenny's Podcast."
-        },
-        {
-            "role": "user",
-            "content": full_prompt  # The prompt we built above
-        }
-    ]
+    messages=rendered.messages
 )
 
 answer = response.choices[0].message.content
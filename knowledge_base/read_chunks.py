@@ -31,6 +31,12 @@ import argparse
 from pathlib import Path
 from typing import List, Dict, Any
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    from records import Episode, load as load_records
+except ImportError:  # read_chunks.py uploaded on its own (e.g. to ChatGPT)
+    load_records = None
+
 # Configuration
 CHUNKS_DIR = Path(__file__).parent / "chunks"
 CHUNK_PATTERN = "knowledge_base_chunk_{:03d}.json"
@@ -42,6 +48,14 @@ def list_chunk_files() -> List[Path]:
     return chunk_files
 
 
+def load_chunk_data(chunk_file: Path) -> Dict[str, Any]:
+    """Load a chunk file; episodes are records.Episode when the repository is available."""
+    if load_records is not None:
+        return load_records(chunk_file, episodes=Episode)
+    with open(chunk_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
 def read_chunk_file(chunk_number: int) -> Dict[str, Any]:
     """Read a specific chunk file by number."""
     chunk_file = CHUNKS_DIR / CHUNK_PATTERN.format(chunk_number)
@@ -49,13 +63,25 @@ def read_chunk_file(chunk_number: int) -> Dict[str, Any]:
     if not chunk_file.exists():
         raise FileNotFoundError(f"Chunk file not found: {chunk_file}")
     
-    with open(chunk_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return load_chunk_data(chunk_file)
+
+
+def load_file_index() -> Dict[str, Dict[str, Any]]:
+    """Entries of chunks/index.json by filename ({} if missing or without guest names)."""
+    try:
+        with open(CHUNKS_DIR / "index.json", 'r', encoding='utf-8') as f:
+            entries = json.load(f).get('chunks', [])
+    except (OSError, ValueError):
+        return {}
+    return {entry['filename']: entry for entry in entries if 'first_guest' in entry}
 
 
 def display_file_list():
     """Display a list of all chunk files."""
     files = list_chunk_files()
+    # Titles and guests come from the index when it has them, so listing
+    # does not have to parse every transcript
+    index = load_file_index()
     print(f"\n📁 Found {len(files)} chunk files in {CHUNKS_DIR}\n")
     print("Available files:")
     print("-" * 60)
@@ -63,10 +89,13 @@ def display_file_list():
     for i, file_path in enumerate(files, 1):
         chunk_num = file_path.stem.split('_')[-1]
         try:
-            data = json.load(open(file_path, 'r', encoding='utf-8'))
-            episode = data['episodes'][0]
-            title = episode.get('title', 'Unknown')[:50]
-            guest = episode.get('guest', 'Unknown')
+            entry = index.get(file_path.name)
+            if entry is not None:
+                title, guest = entry['first_episode'][:50], entry['first_guest']
+            else:
+                episode = load_chunk_data(file_path)['episodes'][0]
+                title = episode.get('title', 'Unknown')[:50]
+                guest = episode.get('guest', 'Unknown')
             print(f"{chunk_num:>3}. {title}... | Guest: {guest}")
         except Exception as e:
             print(f"{chunk_num:>3}. [Error reading file: {e}]")
@@ -115,7 +144,7 @@ def display_summary():
     
     for file_path in files:
         try:
-            data = json.load(open(file_path, 'r', encoding='utf-8'))
+            data = load_chunk_data(file_path)
             episodes = data.get('episodes', [])
             total_episodes += len(episodes)
             
@@ -171,7 +200,7 @@ def read_all(show_content: bool = False):
     read_chunks(sorted(chunk_numbers), show_content)
 
 
-def main():
+def main(argv: List[str] = None):
     parser = argparse.ArgumentParser(
         description="Read and display knowledge base chunk files for ChatGPT",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -225,7 +254,7 @@ def main():
         help='Override chunks directory path'
     )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Override directory if specified
     global CHUNKS_DIR
@@ -0,0 +1,8 @@
+"""
+Lenny's Podcast knowledge base: one `lenny-kb` command for the repository scripts.
+
+Nothing is imported here; each subcommand imports what it needs when it runs
+(see cli.py), so metadata commands start without numpy or openai.
+"""
+
+__version__ = "0.1.0"
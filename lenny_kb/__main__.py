@@ -0,0 +1,3 @@
+from lenny_kb.cli import main
+
+main()
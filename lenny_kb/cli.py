@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+`lenny-kb`: build, split, watch, read, search, prompts and embed in one command.
+
+Subcommands import their modules inside their handlers, so a metadata
+command such as `lenny-kb read --list` never loads numpy, openai or the
+index builders (see startup_benchmark.py for the cold-start check).
+
+Paths are resolved against the repository root: --root, else the
+LENNY_KB_ROOT environment variable, else the nearest directory (the current
+one or a parent) with episodes/ or knowledge_base/, else the checkout this
+package lives in. The package only holds the CLI; the build and search
+modules are imported from that root, so it must be a checkout of the repo.
+
+Usage:
+    lenny-kb build [--tokens 256]     # episodes/ -> knowledge_base/
+    lenny-kb split [--compact]        # knowledge_base.json -> chunks/
+    lenny-kb watch [--poll] [--once]  # keep both up to date as episodes/ changes
+    lenny-kb read --list              # any read_chunks.py options
+    lenny-kb search "pricing strategy" [--top 5] [--pq]
+    lenny-kb prompts                  # chunks/ -> batch_prompts/
+    lenny-kb embed [--dim 256] [--features 65536]
+    python3 -m lenny_kb read --file 1
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+# Configuration
+ROOT_ENV = "LENNY_KB_ROOT"
+DEFAULT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _is_root(path: Path) -> bool:
+    return (path / "episodes").is_dir() or (path / "knowledge_base").is_dir()
+
+
+def find_root(explicit: str = None) -> Optional[Path]:
+    """The repository root to work in, or None if there is none."""
+    explicit = explicit or os.environ.get(ROOT_ENV)
+    if explicit:
+        root = Path(explicit).resolve()
+        return root if _is_root(root) else None
+    cwd = Path.cwd()
+    for candidate in [cwd, *cwd.parents, DEFAULT_ROOT]:
+        if _is_root(candidate):
+            return candidate
+    return None
+
+
+def _root(args: argparse.Namespace) -> Path:
+    root = find_root(args.root)
+    if root is None:
+        where = args.root or os.environ.get(ROOT_ENV)
+        if where:
+            print(f"❌ Error: {where} has neither episodes/ nor knowledge_base/")
+        else:
+            print(f"❌ Error: no episodes/ or knowledge_base/ in {Path.cwd()} or its parents; "
+                  f"run from a checkout or pass --root (or set {ROOT_ENV})")
+        sys.exit(1)
+    if not (root / "create_knowledge_base.py").is_file():
+        print(f"❌ Error: {root} is not a checkout of the repository (no create_knowledge_base.py)")
+        sys.exit(1)
+    return root
+
+
+def _import_root(root: Path):
+    """Make the repository's top-level modules importable."""
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+
+
+def _load_script(path: Path):
+    """Import a script that lives outside the package (knowledge_base/*.py) by path."""
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def cmd_build(args: argparse.Namespace, root: Path):
+    from create_knowledge_base import create_knowledge_base
+    create_knowledge_base(args.compact, root / "episodes", root / "knowledge_base", args.tokens,
+                          args.token_overlap, args.tokenizer)
+
+
+def cmd_split(args: argparse.Namespace, root: Path):
+    from split_knowledge_base import split_knowledge_base
+    kb_dir = root / "knowledge_base"
+    split_knowledge_base(args.compact, kb_dir / "knowledge_base.json", kb_dir / "chunks")
+
+
+def cmd_watch(args: argparse.Namespace, root: Path):
+    from watch_knowledge_base import LiveKnowledgeBase, open_watcher, watch
+    kb = LiveKnowledgeBase(root / "episodes", root / "knowledge_base", args.compact,
+                           root / "knowledge_base" / "segments")
+    watcher = open_watcher(root / "episodes", args.poll)
+    try:
+        watch(kb, watcher, args.once)
+    except KeyboardInterrupt:
+        print("\nStopped")
+    finally:
+        watcher.close()
+
+
+def cmd_read(args: argparse.Namespace, root: Path):
+    kb_dir = root / "knowledge_base"
+    read_chunks = _load_script(kb_dir / "read_chunks.py")
+    options = args.options if '--dir' in args.options else args.options + ['--dir', str(kb_dir / "chunks")]
+    read_chunks.main(options)
+
+
+def cmd_search(args: argparse.Namespace, root: Path):
+    from hybrid_search import HybridSearcher, print_response
+    kb_dir = root / "knowledge_base"
+    searcher = HybridSearcher(kb_dir / "corpus", kb_dir / "lexical", kb_dir / "embeddings",
+                              pq_dir=kb_dir / "pq" if args.pq else None, timestamps_dir=kb_dir / "timestamps")
+    print_response(args.query, searcher.search(args.query, args.top))
+
+
+def cmd_prompts(args: argparse.Namespace, root: Path):
+    kb_dir = root / "knowledge_base"
+    generator = _load_script(kb_dir / "batch_prompt_generator.py")
+    generator.generate_batch_prompts(kb_dir / "chunks", kb_dir / "batch_prompts")
+
+
+def cmd_embed(args: argparse.Namespace, root: Path):
+    from embeddings import build_lsa_embeddings
+    kb_dir = root / "knowledge_base"
+    print(f"Fitting LSA embeddings ({args.dim} dims) on {kb_dir / 'corpus'}...")
+    output_dir = build_lsa_embeddings(kb_dir / "corpus", kb_dir / "embeddings", args.dim, args.features)
+    print(f"✓ Created {output_dir}/")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="lenny-kb", description="Lenny's Podcast knowledge base tools")
+    parser.add_argument('--root', type=str, default=None,
+                        help=f'Repository root with episodes/ and knowledge_base/ (default: ${ROOT_ENV}, '
+                             'else the nearest one from the current directory up)')
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.required = True
+
+    build = commands.add_parser('build', help='Create the knowledge base from episodes/*/transcript.md')
+    build.add_argument('--compact', action='store_true', help='Write JSON without indentation')
+    build.add_argument('--tokens', type=int, default=0, metavar='N', help='Chunk to N tokens')
+    build.add_argument('--token-overlap', type=int, default=32, help='Token overlap for --tokens')
+    build.add_argument('--tokenizer', type=str, default='approx', help="'approx' or 'tiktoken[:encoding]'")
+    build.set_defaults(handler=cmd_build)
+
+    split = commands.add_parser('split', help='Split knowledge_base.json into per-episode chunk files')
+    split.add_argument('--compact', action='store_true', help='Write JSON without indentation')
+    split.set_defaults(handler=cmd_split)
+
+    watch = commands.add_parser('watch', help='Keep the knowledge base up to date as episodes/ changes')
+    watch.add_argument('--compact', action='store_true', help='Write JSON without indentation')
+    watch.add_argument('--poll', action='store_true', help='Poll file mtimes instead of using inotify')
+    watch.add_argument('--once', action='store_true', help='Catch up with episodes/ and exit')
+    watch.set_defaults(handler=cmd_watch)
+
+    read = commands.add_parser('read', add_help=False,
+                               help='Read chunk files (options of knowledge_base/read_chunks.py)')
+    read.set_defaults(handler=cmd_read)
+
+    search = commands.add_parser('search', help='Hybrid BM25 + vector search over chunks')
+    search.add_argument('query', help='Search query')
+    search.add_argument('--top', type=int, default=5, help='Number of episodes')
+    search.add_argument('--pq', action='store_true', help='Use the PQ index for the vector stage')
+    search.set_defaults(handler=cmd_search)
+
+    prompts = commands.add_parser('prompts', help='Generate batch prompts for all chunk files')
+    prompts.set_defaults(handler=cmd_prompts)
+
+    embed = commands.add_parser('embed', help='Fit the LSA backend and embed all chunks')
+    embed.add_argument('--dim', type=int, default=256, help='Embedding size')
+    embed.add_argument('--features', type=int, default=2 ** 16, help='Hash space size')
+    embed.set_defaults(handler=cmd_embed)
+    return parser
+
+
+def main(argv: List[str] = None):
+    parser = build_parser()
+    # `read` forwards everything after it to read_chunks.py
+    args, extra = parser.parse_known_args(argv)
+    if args.command == 'read':
+        args.options = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    root = _root(args)
+    _import_root(root)
+    args.handler(args, root)
+
+
+if __name__ == "__main__":
+    main()
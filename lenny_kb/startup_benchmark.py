@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the `lenny-kb` metadata commands.
+
+Each command runs in a fresh interpreter several times; the median wall
+time must stay under the budget, and numpy / openai must not have been
+imported. Exits non-zero when either check fails, so it can gate CI.
+
+Usage:
+    python3 -m lenny_kb.startup_benchmark [--runs 10] [--budget-ms 100]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+# Configuration
+RUNS = 10
+BUDGET_MS = 100.0
+METADATA_COMMANDS = [
+    ['read', '--list'],
+    ['read', '--file', '1', '--metadata-only'],
+    ['--help'],
+]
+HEAVY_MODULES = ('numpy', 'openai')
+
+# Runs the CLI, then reports which heavy modules it pulled in (on stderr,
+# so the command's own output can be discarded)
+PROBE = (
+    "import sys\n"
+    "from lenny_kb.cli import main\n"
+    "try:\n"
+    "    main(sys.argv[1:])\n"
+    "except SystemExit:\n"
+    "    pass\n"
+    "sys.stderr.write(' '.join(m for m in {heavy!r} if m in sys.modules))\n"
+)
+
+
+def _wall_ms(argv: List[str]) -> float:
+    started = time.perf_counter()
+    subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - started) * 1000
+
+
+def run_once(command: List[str], probe: bool = False) -> Tuple[float, str]:
+    """(milliseconds, heavy modules loaded) for one fresh-process run."""
+    if probe:
+        argv = [sys.executable, '-c', PROBE.format(heavy=HEAVY_MODULES)] + command
+    else:
+        argv = [sys.executable, '-m', 'lenny_kb'] + command
+    started = time.perf_counter()
+    result = subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"lenny-kb {' '.join(command)} failed: {result.stderr.strip()}")
+    return elapsed_ms, result.stderr.strip() if probe else ''
+
+
+def benchmark(command: List[str], runs: int = RUNS) -> Tuple[float, float, str]:
+    """(median ms, max ms, heavy modules) for `runs` cold starts of a command."""
+    run_once(command)  # warm the OS file cache and .pyc files
+    timings = [run_once(command)[0] for _ in range(runs)]
+    _, heavy = run_once(command, probe=True)
+    return statistics.median(timings), max(timings), heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start time of lenny-kb metadata commands")
+    parser.add_argument('--runs', type=int, default=RUNS, help='Fresh-process runs per command')
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS, help='Maximum median wall time')
+    args = parser.parse_args()
+
+    interpreter_ms = statistics.median([_wall_ms([sys.executable, '-c', 'pass']) for _ in range(args.runs)])
+    failed = False
+    print(f"Median of {args.runs} cold starts, budget {args.budget_ms:.0f} ms "
+          f"(bare interpreter: {interpreter_ms:.1f} ms):")
+    for command in METADATA_COMMANDS:
+        median_ms, max_ms, heavy = benchmark(command, args.runs)
+        ok = median_ms <= args.budget_ms and not heavy
+        failed |= not ok
+        note = f"  imported {heavy}" if heavy else ''
+        print(f"  {'✓' if ok else '❌'} lenny-kb {' '.join(command):<32} {median_ms:6.1f} ms (max {max_ms:6.1f}){note}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
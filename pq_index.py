@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Product-quantized vector index for compact, in-memory vector search.
+
+Each chunk vector is split into M sub-vectors and every sub-vector is
+replaced by the id of its nearest centroid in a 256-entry codebook trained on
+the corpus, so a 256-dimensional float32 vector (1 KB) becomes M bytes.
+
+Queries use asymmetric distance computation (ADC): the query stays exact,
+one (M, 256) table of sub-vector dot products is computed per query, and the
+score of every chunk is the sum of M table lookups. The top candidates can
+optionally be re-ranked exactly against the memory-mapped full vectors.
+
+Output (`knowledge_base/pq/`):
+    codebooks.npy   - (M, 256, dim / M) float32 centroids
+    codes.npy       - (chunks, M) uint8 codes, rows match corpus/chunks.npy
+    manifest.json   - parameters and the source vectors file
+
+Usage:
+    python3 pq_index.py --build [--subspaces 32]
+    python3 pq_index.py "How to prioritize product features?" [--rerank 100]
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from embeddings import EMBEDDINGS_DIR, VECTORS_FILE, get_backend, load_vectors
+
+# Configuration
+PQ_DIR = Path(__file__).parent / "knowledge_base" / "pq"
+CODEBOOKS_FILE = "codebooks.npy"
+CODES_FILE = "codes.npy"
+MANIFEST_FILE = "manifest.json"
+NUM_SUBSPACES = 32
+NUM_CENTROIDS = 256  # one byte per sub-vector code
+TRAIN_SAMPLE = 20000
+KMEANS_ITERATIONS = 20
+ENCODE_BLOCK = 8192
+RERANK = 100
+SEED = 42
+
+
+def kmeans(points: np.ndarray, k: int = NUM_CENTROIDS, iterations: int = KMEANS_ITERATIONS,
+           seed: int = SEED) -> np.ndarray:
+    """Lloyd's k-means on dense points; empty clusters are reseeded from random points."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(points))
+    centers = points[rng.choice(len(points), size=k, replace=False)].copy()
+    point_norms = (points ** 2).sum(axis=1)
+    for _ in range(iterations):
+        labels = nearest_centroids(points, centers, point_norms)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, points)
+        filled = counts > 0
+        centers[filled] = sums[filled] / counts[filled, None]
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centers[empty] = points[rng.choice(len(points), size=len(empty), replace=False)]
+    return centers
+
+
+def nearest_centroids(points: np.ndarray, centers: np.ndarray, point_norms: np.ndarray = None) -> np.ndarray:
+    """Index of the nearest (squared Euclidean) center for every point."""
+    if point_norms is None:
+        point_norms = (points ** 2).sum(axis=1)
+    distances = point_norms[:, None] - 2 * points @ centers.T + (centers ** 2).sum(axis=1)
+    return distances.argmin(axis=1)
+
+
+def train_codebooks(vectors: np.ndarray, m: int = NUM_SUBSPACES, sample: int = TRAIN_SAMPLE,
+                    seed: int = SEED) -> np.ndarray:
+    """One k-means codebook per subspace, trained on a random sample of vectors."""
+    dim = vectors.shape[1]
+    if dim % m:
+        raise ValueError(f"Vector size {dim} is not divisible by {m} subspaces")
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(vectors), size=min(sample, len(vectors)), replace=False))
+    training = np.asarray(vectors[rows], dtype=np.float32).reshape(len(rows), m, dim // m)
+    return np.stack([kmeans(training[:, i], seed=seed + i) for i in range(m)])
+
+
+def encode(vectors: np.ndarray, codebooks: np.ndarray, block: int = ENCODE_BLOCK) -> np.ndarray:
+    """(n, M) uint8 codes of vectors, a block of rows at a time."""
+    m, _, dsub = codebooks.shape
+    codes = np.empty((len(vectors), m), dtype=np.uint8)
+    for start in range(0, len(vectors), block):
+        chunk = np.asarray(vectors[start:start + block], dtype=np.float32).reshape(-1, m, dsub)
+        for i in range(m):
+            codes[start:start + len(chunk), i] = nearest_centroids(chunk[:, i], codebooks[i])
+    return codes
+
+
+def build_pq_index(vectors_dir: Path = EMBEDDINGS_DIR, output_dir: Path = PQ_DIR,
+                   m: int = NUM_SUBSPACES) -> Path:
+    """Train codebooks on the persisted chunk vectors and encode all of them."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    vectors = load_vectors(vectors_dir)
+    started = time.time()
+
+    codebooks = train_codebooks(vectors, m)
+    codes = encode(vectors, codebooks)
+    np.save(output_dir / CODEBOOKS_FILE, codebooks)
+    np.save(output_dir / CODES_FILE, codes)
+
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_vectors': len(vectors),
+            'dim': int(vectors.shape[1]),
+            'subspaces': int(codebooks.shape[0]),
+            'centroids': int(codebooks.shape[1]),
+            'bytes_per_vector': int(codes.shape[1]),
+            'vectors_dir': os.path.relpath(Path(vectors_dir).resolve(), output_dir.resolve()),
+            'build_seconds': round(time.time() - started, 1),
+            'description': 'Product-quantization codebooks and codes of the chunk vectors'
+        }, f, indent=2)
+    return output_dir
+
+
+class PQIndex:
+    """ADC search over PQ codes, with optional exact re-ranking."""
+
+    def __init__(self, directory: Path = PQ_DIR, vectors_dir: Path = None):
+        directory = Path(directory)
+        with open(directory / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.codebooks = np.load(directory / CODEBOOKS_FILE)
+        self.codes = np.load(directory / CODES_FILE)  # small enough to keep in RAM
+        self._columns = np.ascontiguousarray(self.codes.T)  # contiguous codes per subspace for ADC
+        # Stored relative to the index directory so a copied knowledge base stays consistent
+        self.vectors_dir = Path(vectors_dir) if vectors_dir else directory / self.manifest['vectors_dir']
+        self._vectors = None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Full-precision vectors, memory-mapped on first use."""
+        if self._vectors is None:
+            self._vectors = load_vectors(self.vectors_dir)
+        return self._vectors
+
+    def lookup_table(self, query: np.ndarray) -> np.ndarray:
+        """(M, 256) dot products of each query sub-vector with its codebook."""
+        m, _, dsub = self.codebooks.shape
+        return np.einsum('mkd,md->mk', self.codebooks, query.reshape(m, dsub).astype(np.float32))
+
+    def adc_scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate inner product of the query with every encoded vector."""
+        table = self.lookup_table(query)
+        scores = np.zeros(len(self.codes), dtype=np.float32)
+        for i in range(table.shape[0]):
+            scores += table[i][self._columns[i]]
+        return scores
+
+    def search(self, query: np.ndarray, top_k: int = 5, rerank: int = 0) -> List[Tuple[int, float]]:
+        """(chunk_id, score) of the best matches; rerank > 0 rescores that many candidates exactly."""
+        scores = self.adc_scores(query)
+        candidates = min(max(top_k, rerank), len(scores))
+        if not candidates:
+            return []
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        if rerank:
+            rows = np.sort(top)  # sequential reads from the memory map
+            exact = np.asarray(self.vectors[rows]) @ query
+            top, top_scores = rows, exact
+        else:
+            top_scores = scores[top]
+        order = np.argsort(-top_scores, kind='stable')[:top_k]
+        return [(int(top[i]), float(top_scores[i])) for i in order]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Product-quantized vector search over chunks")
+    parser.add_argument('query', nargs='?', help='Search query')
+    parser.add_argument('--build', action='store_true', help='Train codebooks and encode all chunk vectors')
+    parser.add_argument('--subspaces', type=int, default=NUM_SUBSPACES, help='Bytes per vector for --build')
+    parser.add_argument('--top', type=int, default=5, help='Number of results')
+    parser.add_argument('--rerank', type=int, default=RERANK, help='Candidates to re-rank exactly (0 = off)')
+    args = parser.parse_args()
+
+    if args.build:
+        print(f"Training product quantizer on {EMBEDDINGS_DIR / VECTORS_FILE}...")
+        output_dir = build_pq_index(m=args.subspaces)
+        with open(output_dir / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        print(f"✓ Created {output_dir}/ ({manifest['total_vectors']:,} vectors, "
+              f"{manifest['bytes_per_vector']} bytes each, {manifest['build_seconds']}s)")
+    if not args.query:
+        if not args.build:
+            parser.print_help()
+        return
+
+    from corpus_blob import Corpus
+
+    index = PQIndex()
+    query = get_backend('lsa').embed([args.query])[0]
+    started = time.perf_counter()
+    results = index.search(query, args.top, args.rerank)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    corpus = Corpus()
+    print(f"Top {len(results)} chunks for '{args.query}' ({elapsed_ms:.1f} ms, rerank={args.rerank}):")
+    for chunk_id, score in results:
+        record = corpus.chunk_record(chunk_id)
+        print(f"\n{score:.3f}  {record['episode_id']} (chunk {record['chunk_index']})")
+        print(f"   {record['text'][:200]}...")
+
+
+if __name__ == "__main__":
+    main()
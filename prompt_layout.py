@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Prompt builder with a cache-friendly, stable-prefix layout.
+
+Provider-side prompt caching only reuses an exact prefix of the request,
+so segments are always laid out from most to least stable:
+
+    1. system instructions     - fixed for the application
+    2. corpus digest           - fixed for a given knowledge base build
+    3. retrieved passages      - vary per question
+    4. question                - varies per request
+
+Every segment is normalized (Unicode NFC, LF line endings, no trailing
+whitespace) and rendered with fixed separators, and passages are ordered by
+source rather than by retrieval rank, so the same inputs always give
+byte-identical prompts. Each render reports how long its stable prefix is
+and how much of it a provider can be expected to serve from cache.
+
+Usage:
+    python3 prompt_layout.py "How do I find product-market fit?"
+"""
+
+import argparse
+import math
+import os
+import unicodedata
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+# Configuration
+CHARS_PER_TOKEN = 4        # rough average for English text
+CACHE_MIN_TOKENS = 1024    # shortest prefix providers cache (OpenAI)
+CACHE_INCREMENT = 128      # cached prefixes grow in steps of this many tokens
+SEGMENT_SEPARATOR = "\n\n"
+PASSAGE_SEPARATOR = "\n\n---\n\n"
+
+SYSTEM_INSTRUCTIONS = """You are an expert assistant with access to transcripts from Lenny's Podcast,
+which features interviews with world-class product leaders and growth experts.
+Answer questions based on the provided transcript excerpts. Cite the guest
+and episode for every claim, and say so when the excerpts do not cover the question."""
+
+
+class Passage(NamedTuple):
+    """One retrieved excerpt; `position` orders passages within a source."""
+    source_id: str
+    title: str
+    guest: str
+    text: str
+    position: int = 0
+
+
+class RenderedPrompt(NamedTuple):
+    messages: List[Dict[str, str]]
+    text: str                      # all segments concatenated, as sent
+    segment_chars: Dict[str, int]
+    stable_prefix_chars: int       # system instructions + corpus digest
+    stable_prefix_tokens: int
+    cacheable_prefix_tokens: int   # what a provider cache can be expected to reuse
+    shared_prefix_chars: int       # identical leading characters with the previous render
+
+
+def normalize(text: str) -> str:
+    """Canonical form of a segment so equal content renders to equal bytes."""
+    text = unicodedata.normalize('NFC', text).replace('\r\n', '\n').replace('\r', '\n')
+    return "\n".join(line.rstrip() for line in text.strip().split("\n"))
+
+
+def approx_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def cacheable_tokens(prefix_tokens: int) -> int:
+    """Tokens of a stable prefix a provider cache can reuse (0 below the minimum)."""
+    if prefix_tokens < CACHE_MIN_TOKENS:
+        return 0
+    return prefix_tokens - prefix_tokens % CACHE_INCREMENT
+
+
+def corpus_digest(episodes: Iterable[Dict[str, Any]]) -> str:
+    """Static catalog of the knowledge base: one line per episode, sorted by id."""
+    lines = sorted(f"- {ep['id']}: {ep.get('guest', '')} | {ep.get('title', '')}" for ep in episodes)
+    return f"Lenny's Podcast episode catalog ({len(lines)} episodes):\n" + "\n".join(lines)
+
+
+def table_digest(table) -> str:
+    """corpus_digest() of a columnar_index.EpisodeTable."""
+    return corpus_digest({'id': i, 'guest': g, 'title': t} for i, g, t in
+                         zip(table.texts('id'), table.texts('guest'), table.texts('title')))
+
+
+def render_passages(passages: Iterable[Passage]) -> str:
+    """Passages grouped by source in a rank-independent order."""
+    by_source: Dict[str, List[Passage]] = {}
+    for passage in passages:
+        by_source.setdefault(passage.source_id, []).append(passage)
+    parts = []
+    for source_id in sorted(by_source):
+        group = sorted(set(by_source[source_id]), key=lambda p: (p.position, p.text))
+        first = group[0]
+        excerpts = "\n...\n".join(normalize(p.text) for p in group)
+        parts.append(f"Episode: {normalize(first.title)}\nGuest: {normalize(first.guest)}\n"
+                     f"Transcript excerpts:\n{excerpts}")
+    return PASSAGE_SEPARATOR.join(parts)
+
+
+class PromptBuilder:
+    """Renders (passages, question) into messages behind a fixed system + digest prefix."""
+
+    def __init__(self, system: str = SYSTEM_INSTRUCTIONS, digest: str = ""):
+        self.system = normalize(system)
+        self.digest = normalize(digest)
+        # The stable prefix is rendered once and reused verbatim
+        self.prefix = SEGMENT_SEPARATOR.join(part for part in (self.system, self.digest) if part)
+        self._previous: Optional[str] = None
+
+    def render(self, passages: Iterable[Passage], question: str) -> RenderedPrompt:
+        context = render_passages(passages)
+        question = normalize(question)
+        user = (f"Transcript excerpts from Lenny's Podcast:{SEGMENT_SEPARATOR}{context}{SEGMENT_SEPARATOR}"
+                f"Question: {question}")
+        messages = [
+            {"role": "system", "content": self.prefix},
+            {"role": "user", "content": user},
+        ]
+        text = self.prefix + SEGMENT_SEPARATOR + user
+        stable_tokens = approx_tokens(self.prefix)
+        shared = len(os.path.commonprefix([self._previous, text])) if self._previous is not None else 0
+        self._previous = text
+        return RenderedPrompt(
+            messages=messages,
+            text=text,
+            segment_chars={'system': len(self.system), 'digest': len(self.digest),
+                           'passages': len(context), 'question': len(question)},
+            stable_prefix_chars=len(self.prefix),
+            stable_prefix_tokens=stable_tokens,
+            cacheable_prefix_tokens=cacheable_tokens(stable_tokens),
+            shared_prefix_chars=shared,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a stable-prefix prompt and report its cacheable prefix")
+    parser.add_argument('question', help='Question to render')
+    parser.add_argument('--top', type=int, default=3, help='Episodes to retrieve')
+    parser.add_argument('--show', action='store_true', help='Print the rendered prompt')
+    args = parser.parse_args()
+
+    from batch_answer import ContextBuilder
+
+    context = ContextBuilder()
+    rendered = context.prompts.render(context.passages(args.question, args.top), args.question)
+    if args.show:
+        print(rendered.text)
+        print("=" * 80)
+    print(f"Segments (chars): {rendered.segment_chars}")
+    print(f"Stable prefix: {rendered.stable_prefix_chars:,} chars, ~{rendered.stable_prefix_tokens:,} tokens")
+    print(f"Expected cacheable prefix: ~{rendered.cacheable_prefix_tokens:,} of "
+          f"~{approx_tokens(rendered.text):,} prompt tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Typed Episode and Chunk records with a schema-driven JSON codec.
+
+Episodes and chunks are immutable NamedTuples (tuple storage, no per-object
+__dict__), so the whole knowledge base takes a fraction of the memory of
+the equivalent dicts. The decoder also interns the fields every chunk
+repeats (episode id, title and guest), so all chunks of an episode share
+one copy of each string instead of one per chunk.
+
+The field lists of the record types are the schema: encoding walks them
+in order and decoding fills missing optional fields with their defaults, so
+files keep exactly the key/value layout plain `json.load` readers expect.
+Documents are written either pretty (indent=2, the default) or compact (no
+whitespace), and orjson is used for both directions when it is installed.
+
+Usage:
+    python3 records.py                  # benchmark dicts + json vs records + codec
+    python3 records.py --kb path/to/knowledge_base.json --chunks path/to/chunks_for_embeddings.json
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib json module is used instead
+    orjson = None
+
+# Configuration
+KB_DIR = Path(__file__).parent / "knowledge_base"
+INDENT = 2
+COMPACT_SEPARATORS = (',', ':')
+
+
+def _get(record, field: str, default: Any = None) -> Any:
+    """dict.get-style field access, for code written against the dict layout."""
+    return getattr(record, field) if field in record._fields else default
+
+
+class Episode(NamedTuple):
+    id: str
+    guest: str = 'Unknown'
+    title: str = 'Untitled'
+    youtube_url: str = ''
+    video_id: str = ''
+    description: str = ''
+    duration_seconds: float = 0
+    duration: str = ''
+    view_count: float = 0
+    channel: str = ''
+    transcript: str = ''
+    transcript_length: int = 0
+    word_count: int = 0
+
+    get = _get
+
+
+class Chunk(NamedTuple):
+    episode_id: str
+    episode_title: str
+    guest: str
+    chunk_index: int
+    text: str
+    start_char: int
+    end_char: int
+    token_count: int = 0  # tokens in the chunk's span (0 in files written before token counting)
+
+    get = _get
+
+
+# Fields whose values repeat across many records and are worth interning
+SHARED_FIELDS: Dict[Type, Tuple[str, ...]] = {
+    Episode: ('guest', 'channel'),
+    Chunk: ('episode_id', 'episode_title', 'guest'),
+}
+
+_MISSING = object()
+
+
+def to_dict(record: NamedTuple, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    """Record as a dict in schema field order, without the `exclude` fields."""
+    if exclude:
+        exclude = set(exclude)
+        return {field: value for field, value in zip(record._fields, record) if field not in exclude}
+    return dict(zip(record._fields, record))
+
+
+def decoder(cls: Type, intern: Optional[Dict[str, str]] = None):
+    """Function turning a decoded JSON object into a `cls` record.
+
+    Missing optional fields get their defaults; unknown keys are ignored.
+    Shared string fields are interned through `intern` (one dict per load).
+    """
+    names = cls._fields
+    fields = [(field, cls._field_defaults.get(field, _MISSING)) for field in names]
+    shared = [names.index(field) for field in SHARED_FIELDS.get(cls, ())]
+    intern = ({} if intern is None else intern).setdefault
+    make = cls._make
+
+    def decode(data: Dict[str, Any]):
+        try:
+            values = [data[field] for field in names]
+        except KeyError:
+            values = []
+            for field, default in fields:
+                value = data.get(field, default)
+                if value is _MISSING:
+                    raise ValueError(f"{cls.__name__} record is missing required field '{field}'") from None
+                values.append(value)
+        for i in shared:
+            value = values[i]
+            if value.__class__ is str:
+                values[i] = intern(value, value)
+        return make(values)
+
+    return decode
+
+
+def decode_records(cls: Type, items: Iterable[Dict[str, Any]]) -> List:
+    decode = decoder(cls)
+    return [decode(item) for item in items]
+
+
+def _plain(value: Any) -> Any:
+    """Replace records (at any depth of lists and dicts) with dicts for the encoder."""
+    if isinstance(value, tuple) and hasattr(value, '_fields'):
+        return to_dict(value)
+    if isinstance(value, list):
+        return [_plain(item) for item in value] if value and _needs_plain(value[0]) else value
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    return value
+
+
+def _needs_plain(value: Any) -> bool:
+    return isinstance(value, (tuple, list, dict))
+
+
+def dumps(document: Any, compact: bool = False) -> bytes:
+    """UTF-8 JSON for a document that may contain records."""
+    document = _plain(document)
+    if orjson is not None:
+        return orjson.dumps(document, option=0 if compact else orjson.OPT_INDENT_2)
+    if compact:
+        return json.dumps(document, ensure_ascii=False, separators=COMPACT_SEPARATORS).encode('utf-8')
+    return json.dumps(document, indent=INDENT, ensure_ascii=False).encode('utf-8')
+
+
+def dump(document: Any, path: Path, compact: bool = False) -> Path:
+    """Write a document to `path` atomically (readers see the old or the new file, never half of one)."""
+    path = Path(path)
+    temporary = path.with_name(f".{path.name}.tmp")
+    with open(temporary, 'wb') as f:
+        f.write(dumps(document, compact))
+    os.replace(temporary, path)
+    return path
+
+
+def loads(data: bytes, **record_types: Type) -> Any:
+    """Parse JSON; top-level lists named in `record_types` become records.
+
+        loads(data, episodes=Episode)   # {'metadata': {...}, 'episodes': [Episode, ...]}
+    """
+    document = orjson.loads(data) if orjson is not None else json.loads(data)
+    for key, cls in record_types.items():
+        if key in document:
+            document[key] = decode_records(cls, document[key])
+    return document
+
+
+def load(path: Path, **record_types: Type) -> Any:
+    with open(path, 'rb') as f:
+        return loads(f.read(), **record_types)
+
+
+def _measure(function) -> Tuple[Any, float, int]:
+    """(result, seconds, bytes held by the result); memory is traced in a second, untimed run."""
+    import tracemalloc
+    started = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    retained = function()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del retained
+    return result, elapsed, size
+
+
+def benchmark(path: Path, key: str, cls: Type):
+    """Load and write one knowledge base file with dicts + json and with records + codec."""
+    data = path.read_bytes()
+    print(f"\n{path.name} ({len(data) / 1e6:.1f} MB, {key} as {cls.__name__})")
+
+    plain, plain_load, plain_size = _measure(lambda: json.loads(data))
+    typed, typed_load, typed_size = _measure(lambda: loads(data, **{key: cls}))
+    print(f"  load     dicts + json: {plain_load:6.2f}s {plain_size / 1e6:7.1f} MB   "
+          f"records + codec: {typed_load:6.2f}s {typed_size / 1e6:7.1f} MB")
+
+    for label, write in [
+        ("indent=2", lambda: json.dumps(plain, indent=INDENT, ensure_ascii=False).encode('utf-8')),
+        ("codec pretty", lambda: dumps(typed)),
+        ("codec compact", lambda: dumps(typed, compact=True)),
+    ]:
+        started = time.perf_counter()
+        output = write()
+        print(f"  write {label:<14} {time.perf_counter() - started:6.2f}s {len(output) / 1e6:7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark typed records and the JSON codec on the knowledge base")
+    parser.add_argument('--kb', type=Path, default=KB_DIR / "knowledge_base.json", help='knowledge_base.json')
+    parser.add_argument('--chunks', type=Path, default=KB_DIR / "chunks_for_embeddings.json",
+                        help='chunks_for_embeddings.json')
+    args = parser.parse_args()
+
+    print(f"JSON backend: {'orjson' if orjson is not None else 'json (install orjson for faster I/O)'}")
+    for path, key, cls in [(args.kb, 'episodes', Episode), (args.chunks, 'chunks', Chunk)]:
+        if not path.exists():
+            print(f"❌ Error: {path} not found. Run create_knowledge_base.py first.")
+            continue
+        benchmark(path, key, cls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Precomputed "episodes like this one" graph.
+
+Each transcript becomes a sparse TF-IDF vector; the cosine similarity of all
+episode pairs is one sparse matrix product X @ X.T, computed a block of rows
+at a time so memory stays bounded. Only the top-k neighbours of each episode
+are kept, as two small arrays, so answering "related episodes" at query time
+is a single row lookup.
+
+Usage:
+    python3 related_episodes.py marty-cagan
+    python3 related_episodes.py --build
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from corpus_blob import CORPUS_DIR, Corpus
+from text_features import build_vocabulary, sparse_dot_block, tfidf_matrix, tokenize
+
+# Configuration
+RELATED_DIR = Path(__file__).parent / "knowledge_base" / "related"
+NEIGHBORS_FILE = "neighbors.npy"
+SCORES_FILE = "scores.npy"
+MANIFEST_FILE = "manifest.json"
+TOP_K = 10
+BLOCK_SIZE = 32  # episode rows per block of the similarity product
+
+
+def top_k_neighbors(matrix, k: int = TOP_K, block_size: int = BLOCK_SIZE) -> tuple:
+    """Top-k most similar other rows for every row of an L2-normalized CSR matrix."""
+    n = matrix.n_rows
+    k = max(0, min(k, n - 1))
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if not k:
+        return neighbors, scores
+
+    postings = matrix.transpose()
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block = sparse_dot_block(matrix, start, stop, postings)
+        block[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # not its own neighbour
+        candidates = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(block, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+        neighbors[start:stop] = np.take_along_axis(candidates, order, axis=1)
+        scores[start:stop] = np.take_along_axis(candidate_scores, order, axis=1)
+    return neighbors, scores
+
+
+def build_related_episodes(corpus_dir: Path = CORPUS_DIR, output_dir: Path = RELATED_DIR,
+                           k: int = TOP_K) -> Path:
+    """Compute and save the top-k related-episode graph for a corpus."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    corpus = Corpus(corpus_dir)
+
+    documents = [tokenize(corpus.episode_text(row)) for row in range(corpus.num_episodes)]
+    vocabulary, df = build_vocabulary(documents)
+    matrix = tfidf_matrix(documents, vocabulary, df, len(documents))
+    neighbors, scores = top_k_neighbors(matrix, k)
+
+    np.save(output_dir / NEIGHBORS_FILE, neighbors)
+    np.save(output_dir / SCORES_FILE, scores)
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_episodes': corpus.num_episodes,
+            'top_k': int(neighbors.shape[1]),
+            'vocabulary_size': len(vocabulary),
+            'episode_ids': corpus.episode_ids,
+            'description': 'Top-k TF-IDF cosine neighbours of every episode'
+        }, f, indent=2, ensure_ascii=False)
+    return output_dir
+
+
+class RelatedEpisodes:
+    """Constant-time related-episode lookups from the precomputed graph."""
+
+    def __init__(self, directory: Path = RELATED_DIR):
+        directory = Path(directory)
+        with open(directory / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.episode_ids: List[str] = manifest['episode_ids']
+        self.row_by_id = {episode_id: row for row, episode_id in enumerate(self.episode_ids)}
+        self.neighbors = np.load(directory / NEIGHBORS_FILE, mmap_mode='r')
+        self.scores = np.load(directory / SCORES_FILE, mmap_mode='r')
+
+    def related(self, episode_id: str, top_n: int = TOP_K) -> List[Dict[str, Any]]:
+        """Most similar episodes to episode_id, best first."""
+        row = self.row_by_id.get(episode_id)
+        if row is None:
+            raise KeyError(f"Unknown episode: {episode_id}")
+        return [
+            {'episode_id': self.episode_ids[int(other)], 'similarity': float(score)}
+            for other, score in zip(self.neighbors[row, :top_n], self.scores[row, :top_n])
+            if other >= 0
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Related episodes from the precomputed similarity graph")
+    parser.add_argument('episode', nargs='?', help='Episode id (e.g. marty-cagan)')
+    parser.add_argument('--build', action='store_true', help='Rebuild the graph from the corpus')
+    parser.add_argument('--top', type=int, default=5, help='Number of related episodes to show')
+    args = parser.parse_args()
+
+    if args.build:
+        output_dir = build_related_episodes()
+        print(f"✓ Created {output_dir}/")
+    if not args.episode:
+        if not args.build:
+            parser.print_help()
+        return
+
+    graph = RelatedEpisodes()
+    try:
+        related = graph.related(args.episode, args.top)
+    except KeyError as e:
+        print(f"❌ Error: {e.args[0]}")
+        sys.exit(1)
+    print(f"Episodes related to {args.episode}:")
+    for item in related:
+        print(f"  {item['similarity']:.3f}  {item['episode_id']}")
+
+
+if __name__ == "__main__":
+    main()
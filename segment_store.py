@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Append-only segment store: incremental ingest with background compaction.
+
+Instead of rewriting knowledge_base.json and every index for each new
+episode, the store keeps the knowledge base as immutable segments. Each
+ingest writes one small segment (its episodes, corpus blob and BM25 index)
+and never touches the existing ones, so adding an episode costs time
+proportional to that episode.
+
+`manifest.json` lists the segments and maps every live episode to the
+segment holding its current version. Replacing an episode (a new segment
+contains it again) or deleting it leaves the old copy in place but no
+longer live: a tombstone. Queries search every segment with the
+tombstoned chunks masked out. BM25 document frequencies, chunk count and
+average chunk length are summed over the live chunks of all segments at
+query time, so a chunk scores the same whichever segment holds it.
+
+Compaction merges small segments, and segments that are mostly
+tombstones, into one new segment holding only their live episodes, then
+deletes them. It runs in a background thread. An episode re-ingested while
+a merge is running keeps its newer version.
+
+Segments are built under a temporary name and renamed into place, and the
+manifest is replaced with os.replace, so readers never see a partial
+segment or manifest. One process should write to a store at a time.
+
+Usage:
+    python3 segment_store.py --import-kb                 # seed from knowledge_base.json
+    python3 segment_store.py --sync                      # ingest new/changed episodes/, drop removed ones
+    python3 segment_store.py --add episodes/some-guest/transcript.md
+    python3 segment_store.py --remove some-guest
+    python3 segment_store.py --compact
+    python3 segment_store.py "pricing strategy" --top 5
+    python3 segment_store.py                             # segment status
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from corpus_blob import Corpus, build_corpus
+from create_knowledge_base import CHUNK_OVERLAP, CHUNK_SIZE, EPISODES_DIR, episode_chunks, load_episode
+from hybrid_search import LexicalIndex, bm25_idf, build_lexical_index
+from records import Episode, dump, dumps, load
+from text_features import tokenize
+
+# Configuration
+SEGMENTS_DIR = Path(__file__).parent / "knowledge_base" / "segments"
+KB_FILE = Path(__file__).parent / "knowledge_base" / "knowledge_base.json"
+MANIFEST_FILE = "manifest.json"
+SEGMENT_FILE = "segment.json"
+EPISODES_FILE = "episodes.json"
+SMALL_SEGMENT = 20      # segments with fewer live episodes than this are merged...
+MERGE_AT = 4            # ...once there are this many of them
+MAX_DEAD_RATIO = 0.3    # segments with more tombstoned episodes than this are rewritten
+
+
+def fingerprint(episode: Episode) -> str:
+    """Content hash of an episode (metadata and transcript)."""
+    return hashlib.sha256(dumps(episode, compact=True)).hexdigest()
+
+
+def write_json_atomic(data: Any, path: Path):
+    """Write JSON next to `path`, then swap it in with one rename."""
+    temporary = path.with_name(f".{path.name}.tmp")
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+class SegmentStore:
+    """Writer side: ingest, delete and compact segments."""
+
+    def __init__(self, directory: Path = SEGMENTS_DIR, chunk_size: int = CHUNK_SIZE,
+                 overlap: int = CHUNK_OVERLAP):
+        self.directory = Path(directory)
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.lock = threading.Lock()  # serializes manifest read-modify-write
+        self.compacting = threading.Lock()  # one compaction at a time; others return immediately
+
+    def manifest(self) -> Dict[str, Any]:
+        """Current manifest: {'next_segment', 'segments': [...], 'live': {episode_id: {...}}}."""
+        try:
+            with open(self.directory / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'next_segment': 1, 'segments': [], 'live': {}}
+
+    def _save(self, manifest: Dict[str, Any]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(manifest, self.directory / MANIFEST_FILE)
+
+    def _reserve_name(self) -> str:
+        with self.lock:
+            manifest = self.manifest()
+            number = manifest['next_segment']
+            manifest['next_segment'] = number + 1
+            self._save(manifest)
+        return f"seg-{number:06d}"
+
+    def _write_segment(self, episodes: List[Episode]) -> str:
+        """Build a segment for `episodes` and publish its directory; the manifest is not touched."""
+        name = self._reserve_name()
+        staging = self.directory / f".{name}.tmp"
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir(parents=True)
+
+        chunks = [chunk for episode in episodes
+                  for chunk in episode_chunks(episode, self.chunk_size, self.overlap)]
+        dump({'episodes': episodes}, staging / EPISODES_FILE, compact=True)
+        build_corpus(episodes, chunks, staging / "corpus")
+        build_lexical_index(staging / "corpus", staging / "lexical")
+        write_json_atomic({
+            'name': name,
+            'episodes': {episode.id: fingerprint(episode) for episode in episodes},
+            'total_chunks': len(chunks),
+            'chunk_size': self.chunk_size,
+            'chunk_overlap': self.overlap,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }, staging / SEGMENT_FILE)
+        os.rename(staging, self.directory / name)
+        return name
+
+    def add(self, episodes: Iterable[Episode]) -> Optional[str]:
+        """Ingest episodes as one new segment; earlier versions of them become tombstones."""
+        episodes = list({episode.id: episode for episode in episodes}.values())
+        if not episodes:
+            return None
+        name = self._write_segment(episodes)
+        with self.lock:
+            manifest = self.manifest()
+            manifest['segments'].append(name)
+            for episode in episodes:
+                manifest['live'][episode.id] = {'segment': name, 'sha256': fingerprint(episode)}
+            self._save(manifest)
+        return name
+
+    def remove(self, episode_ids: Iterable[str]) -> List[str]:
+        """Tombstone episodes; returns the ids that were live."""
+        with self.lock:
+            manifest = self.manifest()
+            removed = [episode_id for episode_id in episode_ids if manifest['live'].pop(episode_id, None)]
+            self._save(manifest)
+        return removed
+
+    def sync(self, episodes_dir: Path = EPISODES_DIR) -> Dict[str, List[str]]:
+        """Ingest new and changed episodes/<slug>/transcript.md files and tombstone deleted ones."""
+        live = self.manifest()['live']
+        changed, seen = [], set()
+        for transcript_file in sorted(Path(episodes_dir).glob("*/transcript.md")):
+            episode = load_episode(transcript_file)
+            if episode is None:
+                continue
+            seen.add(episode.id)
+            if live.get(episode.id, {}).get('sha256') != fingerprint(episode):
+                changed.append(episode)
+        self.add(changed)
+        removed = self.remove([episode_id for episode_id in live if episode_id not in seen])
+        return {'added': [episode.id for episode in changed], 'removed': removed}
+
+    def segment_stats(self, manifest: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Live and total episode counts and size of every segment."""
+        manifest = manifest or self.manifest()
+        live_counts: Dict[str, int] = {}
+        for entry in manifest['live'].values():
+            live_counts[entry['segment']] = live_counts.get(entry['segment'], 0) + 1
+        stats = []
+        for name in manifest['segments']:
+            with open(self.directory / name / SEGMENT_FILE, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            stats.append({
+                'name': name,
+                'episodes': len(info['episodes']),
+                'live': live_counts.get(name, 0),
+                'chunks': info['total_chunks'],
+                'bytes': sum(p.stat().st_size for p in (self.directory / name).rglob('*') if p.is_file()),
+            })
+        return stats
+
+    def compaction_plan(self, manifest: Dict[str, Any] = None) -> List[str]:
+        """Segments the next compaction would merge (empty if none is due)."""
+        stats = self.segment_stats(manifest)
+        dead = [s['name'] for s in stats
+                if s['live'] == 0 or (s['episodes'] - s['live']) / s['episodes'] > MAX_DEAD_RATIO]
+        small = [s['name'] for s in stats if 0 < s['live'] < SMALL_SEGMENT and s['name'] not in dead]
+        plan = dead + (small if len(small) >= MERGE_AT else [])
+        return [s['name'] for s in stats if s['name'] in plan]
+
+    def compact(self) -> Optional[str]:
+        """Merge the planned segments into one; returns the new segment (None if nothing to do).
+
+        Returns None without waiting if another compaction is already running.
+        """
+        if not self.compacting.acquire(blocking=False):
+            return None
+        try:
+            return self._compact()
+        finally:
+            self.compacting.release()
+
+    def _compact(self) -> Optional[str]:
+        with self.lock:
+            manifest = self.manifest()
+        plan = self.compaction_plan(manifest)
+        if not plan:
+            return None
+
+        episodes = []
+        for name in plan:
+            for episode in load(self.directory / name / EPISODES_FILE, episodes=Episode)['episodes']:
+                if manifest['live'].get(episode.id, {}).get('segment') == name:
+                    episodes.append(episode)
+        merged = self._write_segment(episodes) if episodes else None
+
+        with self.lock:
+            # Re-read: ingests that ran during the merge keep their newer versions
+            manifest = self.manifest()
+            kept = 0
+            for episode in episodes:
+                entry = manifest['live'].get(episode.id)
+                if entry is not None and entry['segment'] in plan:
+                    entry['segment'] = merged
+                    kept += 1
+            manifest['segments'] = [name for name in manifest['segments'] if name not in plan]
+            if kept:
+                manifest['segments'].append(merged)
+            self._save(manifest)
+        for name in plan + ([merged] if merged and not kept else []):
+            shutil.rmtree(self.directory / name, ignore_errors=True)
+        return merged if kept else None
+
+    def compact_in_background(self) -> threading.Thread:
+        """Start compact() on a background thread (join it before exiting)."""
+        thread = threading.Thread(target=self.compact, name="segment-compaction")
+        thread.start()
+        return thread
+
+
+class SegmentSearcher:
+    """Reader side: BM25 over every segment of a manifest snapshot, tombstones masked.
+
+    Every segment is scored with statistics of the live chunks of all
+    segments, as if they were one index.
+    """
+
+    def __init__(self, directory: Path = SEGMENTS_DIR):
+        self.directory = Path(directory)
+        self.manifest = SegmentStore(self.directory).manifest()
+        live = self.manifest['live']
+        self.segments = []
+        for name in self.manifest['segments']:
+            corpus = Corpus(self.directory / name / "corpus")
+            live_rows = np.array([live.get(episode_id, {}).get('segment') == name
+                                  for episode_id in corpus.episode_ids], dtype=bool)
+            mask = live_rows[corpus.chunks['episode_row']] if len(corpus) else np.zeros(0, dtype=bool)
+            self.segments.append((name, corpus, LexicalIndex(self.directory / name / "lexical"), mask))
+        self.live_chunks = sum(int(np.count_nonzero(mask)) for _, _, _, mask in self.segments)
+        live_length = sum(float(lexical.lengths[mask].sum()) for _, _, lexical, mask in self.segments)
+        self.average_length = live_length / max(self.live_chunks, 1)
+
+    def idf(self, terms: Iterable[str]) -> Dict[str, float]:
+        """BM25 idf of each term over the live chunks of all segments."""
+        df: Dict[str, int] = {}
+        for _, _, lexical, mask in self.segments:
+            for term, count in lexical.document_frequencies(terms, mask).items():
+                df[term] = df.get(term, 0) + count
+        return {term: float(bm25_idf(count, self.live_chunks)) for term, count in df.items()}
+
+    def search(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """Best live chunks across all segments, merged by BM25 score."""
+        idf = self.idf(set(tokenize(query)))
+        candidates = []
+        for name, corpus, lexical, mask in self.segments:
+            for chunk_id, score in lexical.search(query, top_k, mask, idf, self.average_length):
+                episode_id = corpus.episode_ids[int(corpus.chunks['episode_row'][chunk_id])]
+                # Ties go by episode and position, not by which segment holds the chunk
+                candidates.append((-score, episode_id, corpus.chunk_index(chunk_id), name, chunk_id))
+        results = []
+        for negative_score, _, _, name, chunk_id in heapq.nsmallest(top_k, candidates):
+            corpus = next(c for n, c, _, _ in self.segments if n == name)
+            record = corpus.chunk_record(chunk_id)
+            record.update({'segment': name, 'score': -negative_score})
+            results.append(record)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append-only segment store for the knowledge base")
+    parser.add_argument('query', nargs='?', help='Search query')
+    parser.add_argument('--import-kb', action='store_true', help='Ingest every episode of knowledge_base.json')
+    parser.add_argument('--sync', nargs='?', const=str(EPISODES_DIR), metavar='DIR',
+                        help='Ingest new/changed transcripts and tombstone removed ones (default: episodes/)')
+    parser.add_argument('--add', nargs='+', metavar='TRANSCRIPT', help='Ingest transcript.md files')
+    parser.add_argument('--remove', nargs='+', metavar='ID', help='Tombstone episodes')
+    parser.add_argument('--compact', action='store_true', help='Merge small and mostly-deleted segments')
+    parser.add_argument('--top', type=int, default=5, help='Number of results')
+    parser.add_argument('--kb', type=str, default=str(KB_FILE), help='knowledge_base.json for --import-kb')
+    parser.add_argument('--dir', type=str, default=None, help='Override segments directory path')
+    args = parser.parse_args()
+
+    store = SegmentStore(Path(args.dir) if args.dir else SEGMENTS_DIR)
+    started = time.perf_counter()
+    ingested = False
+    if args.import_kb:
+        name = store.add(load(Path(args.kb), episodes=Episode)['episodes'])
+        print(f"✓ Created {name} ({time.perf_counter() - started:.2f}s)")
+        ingested = True
+    if args.sync:
+        changes = store.sync(Path(args.sync))
+        print(f"✓ Synced {args.sync}: {len(changes['added'])} added/changed, {len(changes['removed'])} removed "
+              f"({time.perf_counter() - started:.2f}s)")
+        ingested = True
+    if args.add:
+        episodes = [episode for episode in (load_episode(Path(path)) for path in args.add) if episode is not None]
+        name = store.add(episodes)
+        print(f"✓ Created {name} ({len(episodes)} episodes, {time.perf_counter() - started:.2f}s)")
+        ingested = True
+    if args.remove:
+        removed = store.remove(args.remove)
+        print(f"✓ Tombstoned {len(removed)} episode(s)")
+
+    if args.compact:
+        merged = store.compact()
+        print(f"✓ Compacted into {merged}" if merged else "Nothing to compact")
+    elif ingested and store.compaction_plan():
+        print("Compacting in the background...")
+        store.compact_in_background().join()
+        print("✓ Compaction finished")
+
+    if args.query:
+        searcher = SegmentSearcher(store.directory)
+        started = time.perf_counter()
+        results = searcher.search(args.query, args.top)
+        print(f"Top {len(results)} chunks for '{args.query}' across {len(searcher.segments)} segments "
+              f"({(time.perf_counter() - started) * 1000:.1f} ms):")
+        for r in results:
+            print(f"\n{r['score']:.2f}  {r['episode_id']} [{r['chunk_index']}] ({r['segment']})")
+            print(f"   {r['text'][:150]}...")
+    elif not (args.import_kb or args.sync or args.add or args.remove or args.compact):
+        stats = store.segment_stats()
+        print(f"Live Episodes: {len(store.manifest()['live'])}")
+        for s in stats:
+            print(f"  {s['name']}: {s['live']}/{s['episodes']} live episodes, {s['chunks']:,} chunks, "
+                  f"{s['bytes'] / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
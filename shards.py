@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Scatter-gather search across corpus shards.
+
+The corpus is split into N shards of consecutive episodes, the same way
+split_knowledge_base.py splits knowledge_base.json into fixed-size files.
+Every shard is a self-contained directory holding its own corpus blob,
+chunk vectors and BM25 index:
+
+    knowledge_base/shards/
+        manifest.json            - shard -> episode range and global chunk offset
+        shard_000/corpus/        - corpus_blob.Corpus format
+        shard_000/lsa_vectors.npy - embeddings rows for the shard's chunks
+        shard_000/lexical/       - hybrid_search.LexicalIndex format
+        ...
+
+A query is embedded once, fanned out to worker processes (one per core,
+each holding its shards memory-mapped), and the per-shard top-k lists are
+merged. With one worker, the same shard files are searched in-process.
+
+Per-shard BM25 uses shard-local term statistics, as usual for
+scatter-gather search.
+
+Usage:
+    python3 shards.py --build [--shards 8]
+    python3 shards.py "growth loops" [--workers 4]
+"""
+
+import argparse
+import heapq
+import json
+import math
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from corpus_blob import (BLOB_FILE, CHUNKS_FILE, CORPUS_DIR, EPISODES_FILE,
+                         MANIFEST_FILE, Corpus)
+from embeddings import EMBEDDINGS_DIR, MODEL_FILE, VECTORS_FILE, get_backend, load_vectors, vector_search
+from hybrid_search import LexicalIndex, build_lexical_index, reciprocal_rank_fusion
+
+# Configuration
+SHARDS_DIR = Path(__file__).parent / "knowledge_base" / "shards"
+NUM_SHARDS = 8
+
+
+def write_corpus_slice(corpus: Corpus, first_row: int, last_row: int, output_dir: Path) -> Path:
+    """Copy episodes [first_row, last_row) of a corpus into a standalone corpus directory."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    blob_start, blob_end = int(corpus.episode_offsets[first_row]), int(corpus.episode_offsets[last_row])
+    first_chunk = int(corpus.episode_first_chunk[first_row])
+    last_chunk = int(corpus.episode_first_chunk[last_row])
+
+    with open(output_dir / BLOB_FILE, 'wb') as f:
+        f.write(corpus.blob[blob_start:blob_end].tobytes())
+    np.save(output_dir / EPISODES_FILE, np.asarray(corpus.episode_offsets[first_row:last_row + 1]) - blob_start)
+    chunks = np.array(corpus.chunks[first_chunk:last_chunk])
+    chunks['episode_row'] -= first_row
+    chunks['start'] -= blob_start
+    chunks['end'] -= blob_start
+    np.save(output_dir / CHUNKS_FILE, chunks)
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_episodes': last_row - first_row,
+            'total_chunks': len(chunks),
+            'blob_bytes': blob_end - blob_start,
+            'episode_ids': corpus.episode_ids[first_row:last_row],
+            'description': 'Concatenated UTF-8 transcripts with byte offset tables'
+        }, f, indent=2, ensure_ascii=False)
+    return output_dir
+
+
+def build_shards(corpus_dir: Path = CORPUS_DIR, vectors_dir: Path = EMBEDDINGS_DIR,
+                 output_dir: Path = SHARDS_DIR, num_shards: int = NUM_SHARDS) -> Path:
+    """Split the corpus, its chunk vectors and a BM25 index into num_shards shards."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    corpus = Corpus(corpus_dir)
+    vectors = load_vectors(vectors_dir)
+    episodes_per_shard = max(1, math.ceil(corpus.num_episodes / num_shards))
+
+    shards: List[Dict[str, Any]] = []
+    for first_row in range(0, corpus.num_episodes, episodes_per_shard):
+        last_row = min(first_row + episodes_per_shard, corpus.num_episodes)
+        shard_dir = output_dir / f"shard_{len(shards):03d}"
+        write_corpus_slice(corpus, first_row, last_row, shard_dir / "corpus")
+        first_chunk = int(corpus.episode_first_chunk[first_row])
+        last_chunk = int(corpus.episode_first_chunk[last_row])
+        np.save(shard_dir / VECTORS_FILE, np.asarray(vectors[first_chunk:last_chunk]))
+        build_lexical_index(shard_dir / "corpus", shard_dir / "lexical")
+        shards.append({
+            'shard': len(shards),
+            'directory': shard_dir.name,
+            'episode_range': {'start': first_row + 1, 'end': last_row},
+            'first_chunk': first_chunk,
+            'num_chunks': last_chunk - first_chunk,
+            'first_episode': corpus.episode_ids[first_row],
+            'last_episode': corpus.episode_ids[last_row - 1],
+        })
+
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_shards': len(shards),
+            'episodes_per_shard': episodes_per_shard,
+            'total_episodes': corpus.num_episodes,
+            'total_chunks': len(corpus),
+            'vectors_dir': os.path.relpath(Path(vectors_dir).resolve(), output_dir.resolve()),
+            'description': 'Episode-range shards of the corpus, chunk vectors and BM25 index',
+            'shards': shards,
+        }, f, indent=2, ensure_ascii=False)
+    return output_dir
+
+
+class Shard:
+    """One shard, memory-mapped; returns hits with global chunk ids."""
+
+    def __init__(self, directory: Path, first_chunk: int):
+        directory = Path(directory)
+        self.first_chunk = first_chunk
+        self.vectors = load_vectors(directory)
+        self.lexical = LexicalIndex(directory / "lexical")
+
+    def search(self, text: str, vector: np.ndarray, top_k: int) -> Dict[str, List[Tuple[int, float]]]:
+        # A zero vector (query without terms) would rank chunks arbitrarily
+        hits = {'vector': vector_search(self.vectors, vector, top_k) if len(self.vectors) and vector.any() else [],
+                'lexical': self.lexical.search(text, top_k)}
+        return {name: [(self.first_chunk + chunk_id, score) for chunk_id, score in ranking]
+                for name, ranking in hits.items()}
+
+
+def _serve(connection, shard_specs: List[Tuple[str, int]]):
+    """Worker loop: load assigned shards once, then answer queries until None arrives."""
+    shards = [Shard(directory, first_chunk) for directory, first_chunk in shard_specs]
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        text, vector, top_k = request
+        connection.send([shard.search(text, vector, top_k) for shard in shards])
+    connection.close()
+
+
+def merge_top_k(rankings: List[List[Tuple[int, float]]], top_k: int) -> List[Tuple[int, float]]:
+    """Global top-k of several per-shard top-k lists."""
+    return heapq.nsmallest(top_k, (hit for ranking in rankings for hit in ranking),
+                           key=lambda hit: (-hit[1], hit[0]))
+
+
+class ShardedSearch:
+    """Fan a query out to shard workers and gather the merged results.
+
+    Shards are assigned round-robin to `workers` processes; workers=1 searches
+    every shard in this process.
+    """
+
+    def __init__(self, directory: Path = SHARDS_DIR, workers: int = None, backend_name: str = 'lsa',
+                 backend_options: Dict[str, Any] = None):
+        directory = Path(directory)
+        with open(directory / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        specs = [(str(directory / shard['directory']), shard['first_chunk'])
+                 for shard in self.manifest['shards']]
+        # Embed queries with the model of the vectors the shards were cut from
+        vectors_dir = directory / self.manifest['vectors_dir']
+        options = {'path': vectors_dir / MODEL_FILE} if backend_name == 'lsa' else {}
+        self.backend = get_backend(backend_name, **(backend_options or options))
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(specs)))
+
+        self.local: List[Shard] = []
+        self.connections = []
+        self.processes = []
+        if self.workers == 1:
+            self.local = [Shard(path, first_chunk) for path, first_chunk in specs]
+            return
+        for worker in range(self.workers):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_serve, args=(child, specs[worker::self.workers]),
+                                              daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    def search(self, query: str, top_k: int = 10) -> Dict[str, Any]:
+        """Merged vector, lexical and RRF-fused top-k chunk hits, with timings."""
+        started = time.perf_counter()
+        vector = self.backend.embed([query])[0]
+        embedded = time.perf_counter()
+
+        if self.local:
+            per_shard = [shard.search(query, vector, top_k) for shard in self.local]
+        else:
+            for connection in self.connections:
+                connection.send((query, vector, top_k))
+            per_shard = [hits for connection in self.connections for hits in connection.recv()]
+        gathered = time.perf_counter()
+
+        merged = {name: merge_top_k([hits[name] for hits in per_shard], top_k)
+                  for name in ('vector', 'lexical')}
+        fused = reciprocal_rank_fusion(merged)
+        merged['fused'] = sorted(((chunk_id, entry['score']) for chunk_id, entry in fused.items()),
+                                 key=lambda hit: -hit[1])[:top_k]
+        finished = time.perf_counter()
+        merged['timings_ms'] = {
+            'embed': round((embedded - started) * 1000, 2),
+            'scatter_gather': round((gathered - embedded) * 1000, 2),
+            'merge': round((finished - gathered) * 1000, 2),
+            'total': round((finished - started) * 1000, 2),
+        }
+        return merged
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(None)
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections, self.processes = [], []
+
+    def __enter__(self) -> 'ShardedSearch':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scatter-gather search across corpus shards")
+    parser.add_argument('query', nargs='?', help='Search query')
+    parser.add_argument('--build', action='store_true', help='Split the corpus and indexes into shards')
+    parser.add_argument('--shards', type=int, default=NUM_SHARDS, help='Number of shards for --build')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per core)')
+    parser.add_argument('--top', type=int, default=10, help='Number of results')
+    args = parser.parse_args()
+
+    if args.build:
+        output_dir = build_shards(num_shards=args.shards)
+        with open(output_dir / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        print(f"✓ Created {output_dir}/ ({manifest['total_shards']} shards, "
+              f"{manifest['episodes_per_shard']} episodes each)")
+    if not args.query:
+        if not args.build:
+            parser.print_help()
+        return
+
+    corpus = Corpus()
+    with ShardedSearch(workers=args.workers) as searcher:
+        response = searcher.search(args.query, args.top)
+    timings = ', '.join(f"{stage} {ms:.1f}" for stage, ms in response['timings_ms'].items())
+    print(f"Top {len(response['fused'])} chunks for '{args.query}' "
+          f"across {searcher.manifest['total_shards']} shards, {searcher.workers} workers (ms: {timings}):")
+    for chunk_id, score in response['fused']:
+        record = corpus.chunk_record(chunk_id)
+        print(f"\n{score:.4f}  {record['episode_id']} (chunk {record['chunk_index']})")
+        print(f"   {record['text'][:150]}...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Per-speaker utterance index: who said what, where, in every transcript.
+
+Transcripts mark each turn with `Speaker Name (hh:mm:ss):` (a bare
+`(hh:mm:ss):` continues the same speaker). The build turns those markers
+into one fixed-width record per turn (episode row, speaker, role, blob byte
+span, start time) in corpus order, plus a CSR posting list of turn numbers
+per speaker.
+
+Speaker labels are normalized to ids ("LENNY RACHITSKY", "Lenny" and
+"Lenny Rachitsky" are all `lenny-rachitsky`; a first name alone is merged
+into the full name used in the same episode), and every turn gets a role:
+`host`, `guest` (the episode's listed guest) or `other`.
+
+A speaker- or role-restricted search scans only the byte spans of the
+matching turns, and hits from other indexes (suffix_index positions) are
+intersected with a speaker by a binary search over the turn starts.
+
+Usage:
+    python3 speakers.py --build                           # from knowledge_base.json
+    python3 speakers.py "pricing" --role guest
+    python3 speakers.py "?" --speaker lenny --episode marty-cagan
+    python3 speakers.py "pricing" --role guest --suffix   # intersect suffix-index hits
+    python3 speakers.py                                   # speakers with the most turns
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from corpus_blob import CORPUS_DIR, Corpus, char_to_byte_offsets
+from records import Episode, load
+from suffix_index import fold
+from timestamps import TIMESTAMP_RE, format_timestamp, parse_timestamp
+
+# Configuration
+SPEAKERS_DIR = Path(__file__).parent / "knowledge_base" / "speakers"
+KB_FILE = Path(__file__).parent / "knowledge_base" / "knowledge_base.json"
+TURNS_FILE = "turns.npy"
+POSTINGS_FILE = "speaker_turns.npy"
+OFFSETS_FILE = "speaker_offsets.npy"
+MANIFEST_FILE = "manifest.json"
+
+HOST = "Lenny Rachitsky"
+HOST_ALIASES = {'lenny', 'lenn', 'lenny-rachitsky'}
+ROLES = ['host', 'guest', 'other']
+GUEST_SEPARATORS = re.compile(r'\s*(?:&|\+|,|\band\b)\s*')
+SNIPPET_BYTES = 160
+GUEST_PREFIX = 5  # a truncated or misspelled guest word matches on this many leading characters
+
+TURN_DTYPE = np.dtype([
+    ('episode_row', '<u4'),
+    ('speaker', '<u4'),
+    ('role', 'u1'),
+    ('start', '<u4'),
+    ('end', '<u4'),
+    ('seconds', '<u4'),
+])
+
+
+def speaker_id(name: str) -> str:
+    """'Andrew ‘Boz’ Bosworth' -> 'andrew-boz-bosworth'; host aliases -> the host's id."""
+    ascii_name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    slug = re.sub(r'[^a-z0-9]+', '-', ascii_name.lower()).strip('-')
+    return speaker_id(HOST) if slug in HOST_ALIASES and name != HOST else slug
+
+
+def episode_speakers(labels: List[str]) -> Dict[str, str]:
+    """Speaker id for each label of one episode, merging first names into full names."""
+    ids = {label: speaker_id(label) for label in labels}
+    full = [sid for sid in set(ids.values()) if '-' in sid]
+    for label, sid in ids.items():
+        if '-' not in sid:
+            matches = [other for other in full if other.split('-')[0] == sid]
+            if len(matches) == 1:
+                ids[label] = matches[0]
+    return ids
+
+
+def listed_guests(guest: str) -> List[List[str]]:
+    """Words of each person in an episode's guest field ("Hamel Husain & Shreya Shankar", "Hamel+Shreya")."""
+    names = [[word for word in speaker_id(name).split('-') if word] for name in GUEST_SEPARATORS.split(guest)]
+    return [listed for listed in names if listed]
+
+
+def matches_listed(sid: str, listed: List[str]) -> bool:
+    """Whether a speaker is a listed guest: the words of one contain the other's
+    ("Boz" / "Andrew 'Boz' Bosworth"), or both full names share the surname
+    ("Gia Laudi" / "Georgiana Laudi")."""
+    words = sid.split('-')
+    if set(listed) <= set(words) or set(words) <= set(listed):
+        return True
+    return len(listed) > 1 and len(words) > 1 and listed[-1] == words[-1]
+
+
+def role_of(sid: str, guest: str) -> int:
+    """Index into ROLES: host, one of the episode's listed guests, or anyone else."""
+    if sid == speaker_id(HOST):
+        return 0
+    return 1 if any(matches_listed(sid, listed) for listed in listed_guests(guest)) else 2
+
+
+def episode_roles(sids: List[str], guest: str) -> Dict[str, int]:
+    """role_of for every speaker of one episode, allowing for truncated guest fields.
+
+    A listed name that matches no speaker ("Inbal S", "Shweta Shriva",
+    "Yamashata") is matched by prefix instead: one of its words (two
+    characters or more) starts a word of the speaker, or shares its first
+    GUEST_PREFIX characters ("inbal" / "inbal-shani", "shriva" /
+    "shweta-shrivastava", "yamashata" / "yuhki-yamashita"). It only counts
+    when exactly one non-host speaker of the episode matches that way.
+    """
+    roles = {sid: role_of(sid, guest) for sid in sids}
+    for listed in listed_guests(guest):
+        if any(matches_listed(sid, listed) for sid in sids):
+            continue
+        prefixes = [word[:GUEST_PREFIX] for word in listed if len(word) > 1]
+        candidates = [sid for sid in sids if roles[sid] != 0 and
+                      any(word.startswith(prefix) for prefix in prefixes for word in sid.split('-'))]
+        if len(candidates) == 1:
+            roles[candidates[0]] = 1
+    return roles
+
+
+def build_speaker_index(episodes: List[Episode], output_dir: Path = SPEAKERS_DIR) -> Path:
+    """Write the turn table and speaker postings for `episodes`, in corpus row order.
+
+    Spans are corpus blob byte offsets, so `episodes` must be the list the
+    corpus was built from. A turn's span starts after its speaker label and
+    runs to the next turn by a different speaker.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    speaker_ids: List[str] = []
+    speaker_names: List[str] = []
+    speaker_rows: Dict[str, int] = {}
+    turns = []
+    blob_size = 0
+    without_guest = []
+
+    for row, episode in enumerate(episodes):
+        transcript = episode.transcript
+        markers = list(TIMESTAMP_RE.finditer(transcript))
+        ids = episode_speakers([m.group('speaker').strip() for m in markers if m.group('speaker')])
+        roles = episode_roles(sorted(set(ids.values())), episode.guest)
+        if 1 not in roles.values():
+            without_guest.append(episode.id)
+
+        # One entry per change of speaker: (id, label, label start, text start, seconds)
+        changes = []
+        for m in markers:
+            label = (m.group('speaker') or '').strip()
+            if label and (not changes or ids[label] != changes[-1][0]):
+                changes.append((ids[label], label, m.start(), m.end(), parse_timestamp(m.group('time'))))
+        ends = [label_start for _, _, label_start, _, _ in changes[1:]] + [len(transcript)]
+        byte_offsets = char_to_byte_offsets(transcript, [c[3] for c in changes] + ends)
+
+        for (sid, label, _, start, seconds), end in zip(changes, ends):
+            if sid not in speaker_rows:
+                speaker_rows[sid] = len(speaker_ids)
+                speaker_ids.append(sid)
+                speaker_names.append(HOST if sid == speaker_id(HOST) else label)
+            turns.append((row, speaker_rows[sid], roles[sid],
+                          blob_size + byte_offsets[start], blob_size + byte_offsets[end], seconds))
+        blob_size += len(transcript.encode('utf-8'))
+
+    if without_guest:
+        # Compilations have no single guest; anything else usually means a garbled guest field
+        print(f"Warning: {len(without_guest)} episodes have no turns by their listed guest "
+              f"(--role guest skips them): {', '.join(without_guest)}")
+
+    if blob_size > np.iinfo(np.uint32).max:
+        raise ValueError(f"Corpus blob is {blob_size:,} bytes; turn spans only address 4 GiB")
+
+    table = np.array(turns, dtype=TURN_DTYPE)
+    postings = np.argsort(table['speaker'], kind='stable').astype(np.uint32)
+    offsets = np.zeros(len(speaker_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(table['speaker'], minlength=len(speaker_ids)), out=offsets[1:])
+
+    np.save(output_dir / TURNS_FILE, table)
+    np.save(output_dir / POSTINGS_FILE, postings)
+    np.save(output_dir / OFFSETS_FILE, offsets)
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_episodes': len(episodes),
+            'total_turns': len(table),
+            'total_speakers': len(speaker_ids),
+            'roles': ROLES,
+            'speaker_ids': speaker_ids,
+            'speaker_names': speaker_names,
+            'episode_ids': [ep.id for ep in episodes],
+            'episodes_without_guest': without_guest,
+            'description': 'Speaker turns as blob byte spans, with per-speaker postings'
+        }, f, indent=2, ensure_ascii=False)
+
+    return output_dir
+
+
+class SpeakerIndex:
+    """Memory-mapped reader for an index built by build_speaker_index."""
+
+    def __init__(self, directory: Path = SPEAKERS_DIR, corpus: Corpus = None):
+        directory = Path(directory)
+        with open(directory / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.corpus = corpus or Corpus(directory.parent / CORPUS_DIR.name)
+        self.speaker_ids: List[str] = self.manifest['speaker_ids']
+        self.speaker_names: List[str] = self.manifest['speaker_names']
+        self.speaker_rows = {sid: i for i, sid in enumerate(self.speaker_ids)}
+        self.turns = np.load(directory / TURNS_FILE, mmap_mode='r')
+        self.postings = np.load(directory / POSTINGS_FILE, mmap_mode='r')
+        self.speaker_offsets = np.load(directory / OFFSETS_FILE, mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def speaker(self, name: str) -> int:
+        """Speaker number for a name or id ("Lenny", "elena-verna", "Elena"); KeyError if unknown."""
+        sid = speaker_id(name)
+        if sid in self.speaker_rows:
+            return self.speaker_rows[sid]
+        matches = [i for i, other in enumerate(self.speaker_ids) if other.split('-')[0] == sid]
+        if len(matches) != 1:
+            raise KeyError(f"{'ambiguous' if matches else 'unknown'} speaker: {name}")
+        return matches[0]
+
+    def select(self, speaker: str = None, role: str = None, episode: str = None) -> np.ndarray:
+        """Sorted turn numbers matching every given filter (all turns if none)."""
+        if speaker is not None:
+            i = self.speaker(speaker)
+            selected = np.sort(self.postings[int(self.speaker_offsets[i]):int(self.speaker_offsets[i + 1])])
+        else:
+            selected = np.arange(len(self.turns))
+        if episode is not None:
+            row = self.corpus.episode_ids.index(episode)
+            lo, hi = np.searchsorted(self.turns['episode_row'], [row, row + 1])
+            selected = selected[(selected >= lo) & (selected < hi)]
+        if role is not None:
+            selected = selected[self.turns['role'][selected] == ROLES.index(role)]
+        return selected
+
+    def turn_of(self, positions) -> np.ndarray:
+        """Turn containing each blob byte offset (-1 outside every turn, e.g. in a label)."""
+        positions = np.asarray(positions)
+        found = np.searchsorted(self.turns['start'], positions, side='right') - 1
+        result = np.full(positions.shape, -1, dtype=np.int64)
+        valid = found >= 0
+        inside = np.zeros(positions.shape, dtype=bool)
+        inside[valid] = positions[valid] < self.turns['end'][found[valid]]
+        result[inside] = found[inside]
+        return result
+
+    def restrict(self, positions, speaker: str = None, role: str = None, episode: str = None) -> np.ndarray:
+        """The blob byte offsets (e.g. SuffixIndex.positions) said by the matching speakers."""
+        positions = np.asarray(positions)
+        turns = self.turn_of(positions)
+        keep = np.isin(turns, self.select(speaker, role, episode))
+        return positions[keep]
+
+    def turn_record(self, turn: int) -> Dict[str, Any]:
+        record = self.turns[turn]
+        row, sid = int(record['episode_row']), int(record['speaker'])
+        return {
+            'turn': turn,
+            'episode_id': self.corpus.episode_ids[row],
+            'speaker': self.speaker_names[sid],
+            'speaker_id': self.speaker_ids[sid],
+            'role': ROLES[int(record['role'])],
+            'seconds': int(record['seconds']),
+            'timestamp': format_timestamp(int(record['seconds'])),
+            'start': int(record['start']),
+            'end': int(record['end']),
+        }
+
+    def text(self, turn: int) -> str:
+        start, end = int(self.turns['start'][turn]), int(self.turns['end'][turn])
+        return str(memoryview(self.corpus.blob[start:end]), 'utf-8').strip()
+
+    def search(self, query: str, speaker: str = None, role: str = None, episode: str = None,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Case-insensitive occurrences of query in the matching turns only.
+
+        Each hit is a turn record plus the blob offset of the first match in
+        the turn, the number of matches and a snippet around the first one.
+        """
+        pattern = fold(query.encode('utf-8'))
+        starts, ends = self.turns['start'], self.turns['end']
+        hits = []
+        for turn in self.select(speaker, role, episode):
+            start, end = int(starts[turn]), int(ends[turn])
+            text = fold(bytes(self.corpus.blob[start:end]))
+            first = text.find(pattern)
+            if first < 0:
+                continue
+            hit = self.turn_record(int(turn))
+            lo = max(0, first - SNIPPET_BYTES // 2)
+            hit.update({
+                'position': start + first,
+                'count': text.count(pattern),
+                'snippet': bytes(self.corpus.blob[start + lo:min(end, start + lo + SNIPPET_BYTES)]).decode('utf-8', 'ignore'),
+            })
+            hits.append(hit)
+            if limit is not None and len(hits) == limit:
+                break
+        return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search what a speaker (or role) said across transcripts")
+    parser.add_argument('query', nargs='?', help='Text to search for (case-insensitive)')
+    parser.add_argument('--build', action='store_true', help='Build the index from knowledge_base.json')
+    parser.add_argument('--speaker', type=str, help='Speaker name or id (e.g. "Lenny", "elena-verna")')
+    parser.add_argument('--role', choices=ROLES, help='Restrict to the host, the listed guest, or others')
+    parser.add_argument('--episode', type=str, metavar='ID', help='Restrict to one episode')
+    parser.add_argument('--suffix', action='store_true',
+                        help='Find occurrences with the suffix index and intersect them with the speaker filter')
+    parser.add_argument('--top', type=int, default=10, help='Number of hits to show')
+    parser.add_argument('--kb', type=str, default=str(KB_FILE), help='knowledge_base.json for --build')
+    parser.add_argument('--corpus', type=str, default=str(CORPUS_DIR),
+                        help='Corpus directory (the suffix index is read from its sibling suffix/)')
+    parser.add_argument('--dir', type=str, default=None, help='Override speakers directory path')
+    args = parser.parse_args()
+
+    directory = Path(args.dir) if args.dir else SPEAKERS_DIR
+    if args.build:
+        episodes = load(Path(args.kb), episodes=Episode)['episodes']
+        build_speaker_index(episodes, directory)
+        print(f"✓ Created {directory}/")
+
+    index = SpeakerIndex(directory, Corpus(Path(args.corpus)))
+    try:
+        selected = index.select(args.speaker, args.role, args.episode)
+    except (KeyError, ValueError) as e:
+        print(f"❌ Error: {e.args[0]}")
+        sys.exit(1)
+
+    if not args.query:
+        counts = np.bincount(index.turns['speaker'][selected], minlength=len(index.speaker_ids))
+        print(f"Total Turns: {len(selected):,} of {len(index):,} ({index.manifest['total_speakers']} speakers)")
+        for i in np.argsort(-counts, kind='stable')[:args.top]:
+            if counts[i]:
+                print(f"  {counts[i]:>6,}  {index.speaker_names[i]} ({index.speaker_ids[i]})")
+        return
+
+    if args.suffix:
+        from suffix_index import SUFFIX_DIR, SuffixIndex
+        suffix = SuffixIndex(Path(args.corpus).parent / SUFFIX_DIR.name, corpus=index.corpus)
+    started = time.perf_counter()
+    if args.suffix:
+        positions = suffix.positions(args.query)
+        kept = index.restrict(positions, args.speaker, args.role, args.episode)
+        turns = np.unique(index.turn_of(kept))
+        hits = [index.turn_record(int(t)) for t in turns[:args.top]]
+        total = len(kept)
+    else:
+        hits = index.search(args.query, args.speaker, args.role, args.episode)
+        total = sum(hit['count'] for hit in hits)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(f"'{args.query}': {total:,} occurrences in {len(selected):,} matching turns ({elapsed_ms:.1f} ms)")
+    for hit in hits[:args.top]:
+        print(f"\n{hit['episode_id']} @ {hit['timestamp']}  {hit['speaker']} ({hit['role']})")
+        if 'snippet' in hit:
+            print(f"   ...{' '.join(hit['snippet'].split())}...")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,34 @@
 #!/usr/bin/env python3
 """
 Split the knowledge base JSON into smaller files with 20 episodes each
+
+Usage:
+    python3 split_knowledge_base.py [--compact]
 """
 
-import json
+import argparse
+import os
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from records import Episode, dump, load
 
 # Configuration
-KB_FILE = Path("knowledge_base/knowledge_base.json")
-OUTPUT_DIR = Path("knowledge_base/chunks")
+KB_FILE = Path(__file__).parent / "knowledge_base" / "knowledge_base.json"
+OUTPUT_DIR = Path(__file__).parent / "knowledge_base" / "chunks"
 EPISODES_PER_FILE = 1
 
-def split_knowledge_base():
-    """Split the knowledge base into smaller files"""
-    
-    # Create output directory
-    OUTPUT_DIR.mkdir(exist_ok=True)
-    
-    # Load the knowledge base
-    print(f"Loading {KB_FILE}...")
-    with open(KB_FILE, 'r', encoding='utf-8') as f:
-        kb = json.load(f)
-    
-    episodes = kb['episodes']
+def split_episodes(episodes: List[Episode], output_dir: Path = OUTPUT_DIR, compact: bool = False,
+                   only: Optional[Set[str]] = None, verbose: bool = True) -> Dict[str, Any]:
+    """Write the chunk files, index.json and index.txt for `episodes`; returns the index.
+
+    With `only`, just the chunk files containing those episode ids are
+    rewritten (the index files always are). Files are replaced atomically.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
     total_episodes = len(episodes)
     total_chunks = (total_episodes + EPISODES_PER_FILE - 1) // EPISODES_PER_FILE
     
-    print(f"Total episodes: {total_episodes}")
-    print(f"Episodes per file: {EPISODES_PER_FILE}")
-    print(f"Will create {total_chunks} files")
-    print()
-    
     # Create index file
     index = {
         "metadata": {
@@ -65,12 +63,10 @@ def split_knowledge_base():
         
         # Save chunk file
         chunk_filename = f"knowledge_base_chunk_{chunk_num:03d}.json"
-        chunk_path = OUTPUT_DIR / chunk_filename
-        
-        with open(chunk_path, 'w', encoding='utf-8') as f:
-            json.dump(chunk_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"✓ Created {chunk_filename} ({len(chunk_episodes)} episodes: {i+1}-{i+len(chunk_episodes)})")
+        if only is None or any(episode.id in only for episode in chunk_episodes):
+            dump(chunk_data, output_dir / chunk_filename, compact)
+            if verbose:
+                print(f"✓ Created {chunk_filename} ({len(chunk_episodes)} episodes: {i+1}-{i+len(chunk_episodes)})")
         
         # Add to index
         index["chunks"].append({
@@ -81,20 +77,19 @@ def split_knowledge_base():
                 "end": i + len(chunk_episodes)
             },
             "episodes_count": len(chunk_episodes),
-            "first_episode": chunk_episodes[0]['title'],
-            "last_episode": chunk_episodes[-1]['title']
+            "first_episode": chunk_episodes[0].title,
+            "last_episode": chunk_episodes[-1].title,
+            "first_guest": chunk_episodes[0].guest,
+            "last_guest": chunk_episodes[-1].guest
         })
     
     # Save index file
-    index_path = OUTPUT_DIR / "index.json"
-    with open(index_path, 'w', encoding='utf-8') as f:
-        json.dump(index, f, indent=2, ensure_ascii=False)
-    
-    print(f"\n✓ Created index.json")
+    dump(index, output_dir / "index.json", compact)
     
     # Create a simple text index for easy reference
-    text_index_path = OUTPUT_DIR / "index.txt"
-    with open(text_index_path, 'w', encoding='utf-8') as f:
+    text_index_path = output_dir / "index.txt"
+    temporary = output_dir / ".index.txt.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
         f.write("Knowledge Base Chunks Index\n")
         f.write("=" * 80 + "\n\n")
         f.write(f"Total Episodes: {total_episodes}\n")
@@ -107,16 +102,43 @@ def split_knowledge_base():
             f.write(f"  Episodes {chunk_info['episode_range']['start']}-{chunk_info['episode_range']['end']} ({chunk_info['episodes_count']} episodes)\n")
             f.write(f"  First: {chunk_info['first_episode'][:60]}...\n")
             f.write(f"  Last:  {chunk_info['last_episode'][:60]}...\n\n")
+    os.replace(temporary, text_index_path)
     
+    return index
+
+
+def split_knowledge_base(compact: bool = False, kb_file: Path = KB_FILE, output_dir: Path = OUTPUT_DIR):
+    """Split the knowledge base into smaller files (compact=True: no indentation)"""
+    
+    # Load the knowledge base
+    print(f"Loading {kb_file}...")
+    kb = load(kb_file, episodes=Episode)
+    
+    episodes = kb['episodes']
+    total_episodes = len(episodes)
+    total_chunks = (total_episodes + EPISODES_PER_FILE - 1) // EPISODES_PER_FILE
+    
+    print(f"Total episodes: {total_episodes}")
+    print(f"Episodes per file: {EPISODES_PER_FILE}")
+    print(f"Will create {total_chunks} files")
+    print()
+    
+    split_episodes(episodes, output_dir, compact)
+    index_path = output_dir / "index.json"
+    
+    print(f"\n✓ Created index.json")
     print(f"✓ Created index.txt")
     
     print("\n" + "=" * 80)
     print("Summary")
     print("=" * 80)
-    print(f"Created {total_chunks} chunk files in {OUTPUT_DIR}")
+    print(f"Created {total_chunks} chunk files in {output_dir}")
     print(f"Each file contains up to {EPISODES_PER_FILE} episodes")
     print(f"Index file: {index_path}")
     print("=" * 80)
 
 if __name__ == "__main__":
-    split_knowledge_base()
+    parser = argparse.ArgumentParser(description="Split knowledge_base.json into per-episode chunk files")
+    parser.add_argument('--compact', action='store_true', help='Write JSON without indentation (smaller, faster)')
+    args = parser.parse_args()
+    split_knowledge_base(compact=args.compact)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Local stub of an OpenAI-compatible chat completion endpoint, for tests.
+
+Answers POST /v1/chat/completions with a deterministic reply that echoes the
+question (or, for response_format json_object, a small JSON extraction),
+after an optional artificial latency. A fraction of requests can
+be rejected with HTTP 429 (with Retry-After) or HTTP 500 to exercise the
+retry and backoff paths of the batch pipelines.
+
+Requests with "stream": true are answered as server-sent events, one word
+per chunk with `--token-delay` seconds between chunks, ending in
+`data: [DONE]`, like the real streaming API.
+
+Usage:
+    python3 stub_chat_server.py [--port 8765] [--latency 0.2] [--rate-limit 0.1] [--token-delay 0.02]
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python3 batch_answer.py questions.ndjson
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+# Configuration
+DEFAULT_PORT = 8765
+QUESTION_RE = re.compile(r"^Question:\s*(.+)$", re.MULTILINE)
+WORD_RE = re.compile(r"[a-z]{8,}")
+TOKEN_RE = re.compile(r"\S+\s*")
+
+
+def stub_extraction(prompt: str) -> str:
+    """Deterministic JSON extraction: the most frequent long words stand in for topics."""
+    words = Counter(w for w in WORD_RE.findall(prompt.lower()))
+    common = [w for w, _ in words.most_common(8)]
+    return json.dumps({
+        'topics': common[:5],
+        'frameworks': [{'name': f"{common[0]} framework", 'description': 'Stub framework'}] if common else [],
+        'insights': [f"Focus on {w}" for w in common[:3]],
+        'quotes': [],
+        'guest_expertise': common[:2],
+    })
+
+
+def stub_reply(request: Dict[str, Any]) -> str:
+    """Deterministic answer text for a chat request (JSON when a JSON object is requested)."""
+    prompt = request['messages'][-1]['content'] if request.get('messages') else ''
+    if (request.get('response_format') or {}).get('type') == 'json_object':
+        return stub_extraction(prompt)
+    match = QUESTION_RE.search(prompt)
+    question = match.group(1).strip() if match else prompt[:80]
+    return f"Stub answer to: {question} (prompt {len(prompt)} chars)"
+
+
+class StubChatHandler(BaseHTTPRequestHandler):
+    server: 'StubChatServer'
+
+    def log_message(self, format, *args):
+        pass  # keep test output quiet
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_event(self, payload: Any):
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        self.wfile.write(f"data: {data}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def _stream(self, request: Dict[str, Any], content: str):
+        """Send `content` as chat.completion.chunk events, one word at a time."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()  # no Content-Length: the body ends when the connection closes
+        chunk = {'id': f"stub-{self.server.requests}", 'object': 'chat.completion.chunk',
+                 'model': request.get('model', 'stub')}
+        self._send_event({**chunk, 'choices': [{'index': 0, 'delta': {'role': 'assistant'},
+                                                 'finish_reason': None}]})
+        for i, token in enumerate(TOKEN_RE.findall(content)):
+            if i and self.server.token_delay:
+                time.sleep(self.server.token_delay)
+            self._send_event({**chunk, 'choices': [{'index': 0, 'delta': {'content': token},
+                                                     'finish_reason': None}]})
+        self._send_event({**chunk, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+        self._send_event("[DONE]")
+
+    def do_POST(self):
+        if not self.path.endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        self.server.record_request()
+
+        roll = self.server.random.random()
+        if roll < self.server.rate_limit:
+            self._send_json(429, {'error': {'message': 'Rate limit reached'}},
+                            {'Retry-After': str(self.server.retry_after)})
+            return
+        if roll < self.server.rate_limit + self.server.error_rate:
+            self._send_json(500, {'error': {'message': 'Stub server error'}})
+            return
+
+        time.sleep(self.server.latency)
+        content = stub_reply(request)
+        if request.get('stream'):
+            self._stream(request, content)
+            return
+        self._send_json(200, {
+            'id': f"stub-{self.server.requests}",
+            'object': 'chat.completion',
+            'model': request.get('model', 'stub'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                         'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': len(content.split())},
+        })
+
+
+class StubChatServer(ThreadingHTTPServer):
+    """Threaded HTTP server with configurable latency and failure injection."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = DEFAULT_PORT, latency: float = 0.0, rate_limit: float = 0.0,
+                 error_rate: float = 0.0, retry_after: float = 0.1, seed: int = 0,
+                 token_delay: float = 0.0):
+        super().__init__(('127.0.0.1', port), StubChatHandler)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.token_delay = token_delay
+        self.random = random.Random(seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return  # client went away (e.g. a cancelled run); nothing to report
+        super().handle_error(request, client_address)
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+
+def serve_in_background(**options: Any) -> StubChatServer:
+    """Start a stub server on a daemon thread (port=0 picks a free port)."""
+    server = StubChatServer(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible chat server for offline tests")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before answering')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500')
+    parser.add_argument('--token-delay', type=float, default=0.0, help='Seconds between streamed tokens')
+    args = parser.parse_args()
+
+    server = StubChatServer(args.port, args.latency, args.rate_limit, args.error_rate,
+                            token_delay=args.token_delay)
+    print(f"Stub chat server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nServed {server.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Suffix-array substring search over the whole transcript corpus.
+
+Builds a suffix array (plus LCP array) over the case-folded corpus blob
+written by corpus_blob.py. Any substring - partial words, punctuation-heavy
+phrases like "PM-to-CEO" - is then located by binary search in O(m log n)
+instead of a `.lower().count()` over every transcript, and each hit maps back
+to its episode and chunk.
+
+Case folding is ASCII-only (`bytes.lower()`), which keeps every byte offset
+in the folded text identical to the original blob.
+
+Usage:
+    python3 suffix_index.py --build
+    python3 suffix_index.py "product-market fit"
+    python3 suffix_index.py "PM-to-CEO" --positions
+"""
+
+import argparse
+import json
+import mmap
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from corpus_blob import CORPUS_DIR, Corpus
+
+# Configuration
+SUFFIX_DIR = Path(__file__).parent / "knowledge_base" / "suffix"
+FOLDED_FILE = "folded.bin"
+SA_FILE = "suffix_array.npy"
+LCP_FILE = "lcp.npy"
+MANIFEST_FILE = "manifest.json"
+INITIAL_PREFIX = 7  # bytes compared by the first sort (7 x 9 bits fit in an int64)
+DIRECT_LCP_DEPTH = 8  # byte-by-byte LCP rounds before switching to hashing
+HASH_BASE = 1099511628211  # odd multiplier for LCP prefix hashes
+LCP_CAP = np.iinfo(np.uint16).max  # LCP values are stored saturated at this length
+
+
+def fold(data: bytes) -> bytes:
+    """Case-fold without changing byte offsets."""
+    return data.lower()
+
+
+def _runs(first: np.ndarray, second: np.ndarray) -> tuple:
+    """Start index of the equal-key run each element belongs to, and run sizes."""
+    boundary = np.ones(len(first), dtype=bool)
+    boundary[1:] = (first[1:] != first[:-1]) | (second[1:] != second[:-1])
+    starts = np.flatnonzero(boundary)
+    sizes = np.diff(np.append(starts, len(first)))
+    return np.repeat(starts, sizes), np.repeat(sizes, sizes)
+
+
+def build_suffix_array(text: bytes) -> np.ndarray:
+    """Suffix array by prefix doubling with vectorized NumPy sorts.
+
+    Suffixes are first sorted on their leading INITIAL_PREFIX bytes. Each
+    round then doubles the compared prefix, but only re-sorts suffixes whose
+    group is still ambiguous; ranks are the SA slot where the group starts,
+    so settled suffixes never move again.
+    """
+    n = len(text)
+    if n == 0:
+        return np.empty(0, dtype=np.uint32)
+
+    data = np.frombuffer(text, dtype=np.uint8).astype(np.int64)
+    # Pack the first bytes into one key, 9 bits each so "past the end" (0)
+    # sorts before every real byte (1-256)
+    keys = np.zeros(n, dtype=np.int64)
+    for offset in range(INITIAL_PREFIX):
+        shifted = np.zeros(n, dtype=np.int64)
+        shifted[:n - offset] = data[offset:] + 1
+        keys = (keys << 9) | shifted
+    sa = np.argsort(keys, kind='stable')
+    run_start, run_size = _runs(keys[sa], keys[sa])
+    rank = np.empty(n, dtype=np.int64)
+    rank[sa] = run_start
+    pending = np.flatnonzero(run_size > 1)
+
+    k = INITIAL_PREFIX
+    while len(pending):
+        suffixes = sa[pending]
+        first = rank[suffixes]
+        second = np.full(len(suffixes), -1, dtype=np.int64)
+        in_text = suffixes + k < n
+        second[in_text] = rank[suffixes[in_text] + k]
+
+        order = np.lexsort((second, first))
+        suffixes, first, second = suffixes[order], first[order], second[order]
+        run_start, run_size = _runs(first, second)
+
+        sa[pending] = suffixes
+        rank[suffixes] = pending[run_start]
+        pending = pending[run_size > 1]
+        k *= 2
+    return sa.astype(np.uint32)
+
+
+def build_lcp(text: bytes, sa: np.ndarray, cap: int = LCP_CAP) -> np.ndarray:
+    """LCP of each suffix with its predecessor in the suffix array, saturated at cap.
+
+    Adjacent pairs are first compared byte by byte for a few positions, which
+    settles most of them. The rest (long repeats such as sponsor reads) are
+    resolved together by binary search on the match length, comparing
+    prefix polynomial hashes (mod 2**64) instead of bytes.
+    """
+    n = len(sa)
+    lcp = np.zeros(n, dtype=np.uint16)
+    if n < 2:
+        return lcp
+
+    data = np.frombuffer(text, dtype=np.uint8)
+    left = sa[:-1].astype(np.int64)
+    right = sa[1:].astype(np.int64)
+    active = np.arange(1, n)
+    depth = 0
+    while len(active) and depth < min(cap, DIRECT_LCP_DEPTH):
+        a = left[active - 1] + depth
+        b = right[active - 1] + depth
+        ok = (a < n) & (b < n)
+        ok[ok] = data[a[ok]] == data[b[ok]]
+        active = active[ok]
+        depth += 1
+        lcp[active] = depth
+    if not len(active) or depth >= cap:
+        return lcp
+
+    # G[i] = sum(c_j * P**j for j < i); two substrings of length L at a and b
+    # are equal iff (G[a+L] - G[a]) * P**b == (G[b+L] - G[b]) * P**a
+    powers = np.empty(n + 1, dtype=np.uint64)
+    powers[0] = 1
+    powers[1:] = HASH_BASE
+    powers = np.cumprod(powers, dtype=np.uint64)
+    prefix = np.zeros(n + 1, dtype=np.uint64)
+    np.cumsum((data.astype(np.uint64) + np.uint64(1)) * powers[:-1], dtype=np.uint64, out=prefix[1:])
+
+    a = left[active - 1]
+    b = right[active - 1]
+    lo = np.full(len(active), depth, dtype=np.int64)  # known to match
+    hi = np.minimum(n - np.maximum(a, b), cap)        # longest possible match
+    while True:
+        undecided = np.flatnonzero(lo < hi)
+        if not len(undecided):
+            break
+        ua, ub = a[undecided], b[undecided]
+        mid = (lo[undecided] + hi[undecided] + 1) // 2
+        equal = ((prefix[ua + mid] - prefix[ua]) * powers[ub]
+                 == (prefix[ub + mid] - prefix[ub]) * powers[ua])
+        lo[undecided[equal]] = mid[equal]
+        hi[undecided[~equal]] = mid[~equal] - 1
+    lcp[active] = lo
+    return lcp
+
+
+def build_suffix_index(corpus_dir: Path = CORPUS_DIR, output_dir: Path = SUFFIX_DIR) -> Path:
+    """Build and save the suffix and LCP arrays for a corpus."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    corpus = Corpus(corpus_dir)
+    text = fold(bytes(corpus.blob))
+
+    started = time.time()
+    sa = build_suffix_array(text)
+    lcp = build_lcp(text, sa)
+
+    with open(output_dir / FOLDED_FILE, 'wb') as f:
+        f.write(text)
+    np.save(output_dir / SA_FILE, sa)
+    np.save(output_dir / LCP_FILE, lcp)
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'blob_bytes': len(text),
+            'case_folding': 'ascii',
+            'lcp_cap': int(LCP_CAP),
+            'build_seconds': round(time.time() - started, 2),
+            'description': 'Suffix array and LCP array over the case-folded corpus blob'
+        }, f, indent=2)
+    return output_dir
+
+
+class SuffixIndex:
+    """Substring search over a corpus using its suffix array."""
+
+    def __init__(self, directory: Path = SUFFIX_DIR, corpus: Corpus = None):
+        directory = Path(directory)
+        # The suffix index is built from the corpus next to it
+        self.corpus = corpus or Corpus(directory.parent / CORPUS_DIR.name)
+        self.boundaries = np.asarray(self.corpus.episode_offsets[1:-1]).tolist()
+        self.sa = np.load(directory / SA_FILE, mmap_mode='r')
+        self.lcp = np.load(directory / LCP_FILE, mmap_mode='r')
+        self.text = b''
+        if (directory / FOLDED_FILE).stat().st_size:
+            with open(directory / FOLDED_FILE, 'rb') as f:
+                self.text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _compare(self, slot: int, pattern: bytes) -> int:
+        """Sign of (suffix at slot, truncated to len(pattern)) vs pattern."""
+        suffix = int(self.sa[slot])
+        prefix = self.text[suffix:suffix + len(pattern)]
+        if prefix == pattern:
+            return 0
+        return -1 if prefix < pattern else 1
+
+    def _lower_bound(self, pattern: bytes) -> int:
+        """First suffix array slot whose suffix is >= pattern."""
+        lo, hi = 0, len(self.sa)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._compare(mid, pattern) < 0:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _range_end(self, start: int, pattern: bytes) -> int:
+        """End of the run of suffixes sharing the pattern as a prefix.
+
+        Walks the LCP array in growing vectorized windows; patterns longer
+        than the LCP cap fall back to a binary search for the upper bound.
+        """
+        n = len(self.sa)
+        m = len(pattern)
+        if m > LCP_CAP:
+            lo, hi = start, n
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._compare(mid, pattern) <= 0:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo
+        pos = start + 1
+        block = 1024
+        while pos < n:
+            short = np.flatnonzero(self.lcp[pos:pos + block] < m)
+            if len(short):
+                return pos + int(short[0])
+            pos += block
+            block *= 2
+        return n
+
+    def find_range(self, query: str) -> tuple:
+        """Suffix array interval [start, end) of suffixes starting with query."""
+        pattern = fold(query.encode('utf-8'))
+        if not pattern:
+            return 0, 0
+        start = self._lower_bound(pattern)
+        if start >= len(self.sa) or self._compare(start, pattern) != 0:
+            return start, start
+        return start, self._range_end(start, pattern)
+
+    def _within_episodes(self, positions: np.ndarray, m: int) -> np.ndarray:
+        """The match offsets whose m bytes stay within one episode."""
+        if not len(positions):
+            return positions
+        rows = self.corpus.row_of_offset(positions)
+        return positions[positions + m <= np.asarray(self.corpus.episode_offsets)[rows + 1]]
+
+    def positions(self, query: str) -> np.ndarray:
+        """Sorted blob byte offsets of every occurrence that stays within one episode."""
+        start, end = self.find_range(query)
+        positions = np.sort(np.asarray(self.sa[start:end], dtype=np.int64))
+        return self._within_episodes(positions, len(query.encode('utf-8')))
+
+    def _crossing(self, pattern: bytes) -> int:
+        """Matches that run from one episode into the next (the blob has no separators)."""
+        m = len(pattern)
+        crossing = 0
+        if m < 2:
+            return crossing
+        # Every match inside a window around a boundary spans that boundary
+        windows = [self.text[max(boundary - m + 1, 0):boundary + m - 1] for boundary in self.boundaries]
+        for window in windows:
+            hit = window.find(pattern)
+            while hit >= 0:
+                crossing += 1
+                hit = window.find(pattern, hit + 1)
+        return crossing
+
+    def count(self, query: str) -> int:
+        """Number of occurrences of query (same as len(positions(query))).
+
+        The size of the suffix array interval, less the matches that cross an
+        episode boundary. Those are checked on the (unsorted) hits when there
+        are few, else around each boundary: O(m log n + min(occurrences,
+        episodes * m)), with no sort.
+        """
+        pattern = fold(query.encode('utf-8'))
+        start, end = self.find_range(query)
+        if end - start <= len(self.boundaries):
+            return len(self._within_episodes(np.asarray(self.sa[start:end], dtype=np.int64), len(pattern)))
+        return end - start - self._crossing(pattern)
+
+    def search(self, query: str, top_n: int = 10) -> List[Dict[str, Any]]:
+        """Episodes ranked by occurrence count, with the chunks containing hits."""
+        positions = self.positions(query)
+        if not len(positions):
+            return []
+        rows = self.corpus.row_of_offset(positions)
+        chunks = self.corpus.chunk_of_offset(positions)
+        episode_rows, counts = np.unique(rows, return_counts=True)
+        order = np.argsort(-counts, kind='stable')[:top_n]
+
+        results = []
+        for idx in order:
+            row = int(episode_rows[idx])
+            in_episode = rows == row
+            episode_start = self.corpus.episode_span(row)[0]
+            results.append({
+                'episode_row': row,
+                'episode_id': self.corpus.episode_ids[row],
+                'count': int(counts[idx]),
+                'chunk_ids': sorted(set(int(c) for c in chunks[in_episode] if c >= 0)),
+                'byte_offsets': (positions[in_episode] - episode_start).tolist(),
+            })
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Substring search over all transcripts")
+    parser.add_argument('query', nargs='?', help='Substring to search for (case-insensitive)')
+    parser.add_argument('--build', action='store_true', help='Build the suffix index from the corpus')
+    parser.add_argument('--top', type=int, default=10, help='Number of episodes to show')
+    parser.add_argument('--positions', action='store_true', help='Show byte offsets of each hit')
+    args = parser.parse_args()
+
+    if args.build:
+        print(f"Building suffix index from {CORPUS_DIR}...")
+        output_dir = build_suffix_index()
+        with open(output_dir / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        print(f"✓ Created {output_dir}/ ({manifest['blob_bytes']:,} suffixes in {manifest['build_seconds']}s)")
+        if not args.query:
+            return
+
+    if not args.query:
+        parser.print_help()
+        sys.exit(1)
+
+    index = SuffixIndex()
+    started = time.perf_counter()
+    results = index.search(args.query, top_n=args.top)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    total = sum(r['count'] for r in results)
+    print(f"Episodes mentioning '{args.query}' (top {len(results)}, {elapsed_ms:.2f} ms):")
+    for r in results:
+        print(f"  - {r['episode_id']}: {r['count']} mentions in {len(r['chunk_ids'])} chunk(s)")
+        if args.positions:
+            print(f"    offsets: {r['byte_offsets'][:10]}")
+    if not total:
+        print("  (no matches)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Map-reduce summarization of all episodes into topic, framework and guest maps.
+
+Replaces the manual batch_prompts/ + EFFICIENT_CHATGPT_WORKFLOW.md flow
+(pasting 50+ files into ChatGPT in sequence) with a repeatable pipeline:
+
+    map     - one structured extraction call per episode, run concurrently.
+              Transcripts longer than MAP_CHARS are split into groups of
+              consecutive chunks, one call per group, merged locally.
+    reduce  - merge the per-episode extractions into topic, framework and
+              guest maps. The reduce is local and incremental: an episode's
+              contributions are recorded so they can be replaced when its
+              transcript changes.
+
+Map results are cached under `knowledge_base/summaries/map/`, keyed by the
+SHA-256 of the transcript (and the prompt version and model), so adding one
+episode costs one map call plus an incremental reduce.
+
+Output (`knowledge_base/summaries/`):
+    map/<episode_id>.json  - cached extraction for one episode
+    knowledge_map.json     - topics, frameworks and guests, with episode references
+
+Usage:
+    python3 summarize_episodes.py [--concurrency 8] [--base-url URL]
+    python3 summarize_episodes.py --reduce-only
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from chat_client import DEFAULT_BASE_URL, DEFAULT_MODEL, AsyncChatClient, ChatError
+from corpus_blob import CORPUS_DIR, Corpus
+
+# Configuration
+SUMMARIES_DIR = Path(__file__).parent / "knowledge_base" / "summaries"
+MAP_DIR_NAME = "map"
+KNOWLEDGE_MAP_FILE = "knowledge_map.json"
+PROMPT_VERSION = 1  # bump when MAP_PROMPT changes to invalidate cached map results
+MAP_CHARS = 60000   # transcript characters per map call
+CONCURRENCY = 8
+LIST_FIELDS = ('topics', 'frameworks', 'insights', 'quotes', 'guest_expertise')
+
+MAP_PROMPT = """Extract structured knowledge from this podcast transcript excerpt.
+
+Episode: {title}
+Guest: {guest}
+Part {part} of {parts}
+
+Return only a JSON object with these keys:
+- "topics": 5-10 main topics discussed (short noun phrases)
+- "frameworks": frameworks or methodologies shared, as objects with "name" and "description"
+- "insights": 3-5 most actionable insights
+- "quotes": up to 5 memorable quotes, verbatim
+- "guest_expertise": the guest's areas of expertise (short noun phrases)
+
+Only include what is actually in the transcript.
+
+Transcript:
+{transcript}"""
+
+JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def transcript_hash(transcript: bytes) -> str:
+    return hashlib.sha256(transcript).hexdigest()
+
+
+def entry_version(entry: Dict[str, Any]) -> tuple:
+    """What a map result was produced from: transcript, prompt version and model."""
+    return entry.get('transcript_sha256'), entry.get('prompt_version'), entry.get('model')
+
+
+def normalize_key(name: str) -> str:
+    """Case- and whitespace-insensitive key for merging names across episodes."""
+    return " ".join(name.lower().split())
+
+
+def parse_extraction(text: str) -> Dict[str, Any]:
+    """JSON object from a model reply (tolerates surrounding prose or code fences)."""
+    match = JSON_OBJECT_RE.search(text)
+    if not match:
+        raise ValueError(f"No JSON object in reply: {text[:100]!r}")
+    data = json.loads(match.group(0))
+    result: Dict[str, Any] = {}
+    for field in LIST_FIELDS:
+        values = data.get(field) or []
+        result[field] = values if isinstance(values, list) else [values]
+    frameworks = []
+    for framework in result['frameworks']:
+        if not isinstance(framework, dict):
+            framework = {'name': str(framework), 'description': ''}
+        name = framework.get('name') or framework.get('title')
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError(f"Framework without a name in reply: {framework!r:.100}")
+        frameworks.append({'name': name.strip(), 'description': str(framework.get('description') or '')})
+    result['frameworks'] = frameworks
+    return result
+
+
+def merge_extractions(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Union of several extractions of one episode, first occurrence wins."""
+    merged: Dict[str, Any] = {field: [] for field in LIST_FIELDS}
+    for field in LIST_FIELDS:
+        seen = set()
+        for part in parts:
+            for value in part.get(field, []):
+                key = normalize_key(value['name'] if isinstance(value, dict) else str(value))
+                if key and key not in seen:
+                    seen.add(key)
+                    merged[field].append(value)
+    return merged
+
+
+def chunk_groups(corpus: Corpus, row: int, max_chars: int = MAP_CHARS) -> List[str]:
+    """Episode text as one piece, or as groups of consecutive chunks of at most max_chars."""
+    text = corpus.episode_text(row)
+    if len(text) <= max_chars:
+        return [text]
+    start, end = int(corpus.episode_first_chunk[row]), int(corpus.episode_first_chunk[row + 1])
+    groups: List[str] = []
+    current: List[str] = []
+    size = 0
+    for chunk_id in range(start, end):
+        chunk = corpus.chunk_text(chunk_id)
+        if current and size + len(chunk) > max_chars:
+            groups.append("\n".join(current))
+            current, size = [], 0
+        current.append(chunk)
+        size += len(chunk)
+    if current:
+        groups.append("\n".join(current))
+    return groups
+
+
+class MapCache:
+    """Per-episode map results keyed by transcript hash, prompt version and model."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, episode_id: str) -> Path:
+        return self.directory / f"{episode_id}.json"
+
+    def get(self, episode_id: str, digest: str, model: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The cached entry if it is still valid (for `model`, unless None accepts any model)."""
+        path = self._path(episode_id)
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        if entry.get('transcript_sha256') != digest or entry.get('prompt_version') != PROMPT_VERSION:
+            return None
+        if model is not None and entry.get('model') != model:
+            return None
+        return entry
+
+    def put(self, entry: Dict[str, Any]):
+        path = self._path(entry['episode_id'])
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2, ensure_ascii=False)
+        tmp.replace(path)
+
+
+async def map_episode(client: AsyncChatClient, semaphore: asyncio.Semaphore, corpus: Corpus, row: int,
+                      title: str, guest: str) -> tuple:
+    """Extraction for one episode (one call per chunk group, merged) and the number of calls."""
+    groups = chunk_groups(corpus, row)
+
+    async def extract(part: int, text: str) -> Dict[str, Any]:
+        prompt = MAP_PROMPT.format(title=title, guest=guest, part=part, parts=len(groups), transcript=text)
+        async with semaphore:
+            reply = await client.complete([{'role': 'user', 'content': prompt}], temperature=0,
+                                          response_format={'type': 'json_object'})
+        return parse_extraction(reply)
+
+    parts = await asyncio.gather(*(extract(i + 1, text) for i, text in enumerate(groups)))
+    return merge_extractions(list(parts)), len(groups)
+
+
+def empty_knowledge_map() -> Dict[str, Any]:
+    return {'metadata': {}, 'episodes': {}, 'topics': {}, 'frameworks': {}, 'guests': {}}
+
+
+def remove_episode(knowledge: Dict[str, Any], episode_id: str):
+    """Undo an episode's contributions to the maps."""
+    contributed = knowledge['episodes'].pop(episode_id, None)
+    if contributed is None:
+        return
+    for section in ('topics', 'frameworks', 'guests'):
+        for key in contributed['keys'][section]:
+            entry = knowledge[section].get(key)
+            if entry is None:
+                continue
+            entry['episodes'].pop(episode_id, None)
+            if not entry['episodes']:
+                del knowledge[section][key]
+
+
+def add_episode(knowledge: Dict[str, Any], entry: Dict[str, Any]):
+    """Reduce one episode's extraction into the topic, framework and guest maps."""
+    episode_id = entry['episode_id']
+    result = entry['result']
+    keys: Dict[str, List[str]] = {'topics': [], 'frameworks': [], 'guests': []}
+
+    for topic in result['topics']:
+        key = normalize_key(str(topic))
+        item = knowledge['topics'].setdefault(key, {'name': str(topic), 'episodes': {}})
+        item['episodes'][episode_id] = {'title': entry['title'], 'guest': entry['guest']}
+        keys['topics'].append(key)
+
+    for framework in result['frameworks']:
+        key = normalize_key(framework.get('name', ''))
+        if not key:
+            continue
+        item = knowledge['frameworks'].setdefault(key, {'name': framework['name'], 'episodes': {}})
+        item['episodes'][episode_id] = {'guest': entry['guest'], 'description': framework.get('description', '')}
+        keys['frameworks'].append(key)
+
+    key = normalize_key(entry['guest'] or episode_id)
+    item = knowledge['guests'].setdefault(key, {'name': entry['guest'], 'episodes': {}})
+    item['episodes'][episode_id] = {
+        'title': entry['title'],
+        'expertise': result['guest_expertise'],
+        'insights': result['insights'],
+        'quotes': result['quotes'],
+    }
+    keys['guests'].append(key)
+
+    knowledge['episodes'][episode_id] = {'transcript_sha256': entry['transcript_sha256'],
+                                         'prompt_version': entry['prompt_version'],
+                                         'model': entry['model'], 'keys': keys}
+
+
+def load_knowledge_map(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return empty_knowledge_map()
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def reduce_incremental(knowledge: Dict[str, Any], entries: List[Dict[str, Any]],
+                       episode_ids: List[str]) -> Dict[str, int]:
+    """Bring the maps up to date with the current map entries; returns change counts.
+
+    An episode is re-reduced when its transcript, prompt version or model
+    differs from what its contributions were reduced from. Episodes no longer
+    in episode_ids are removed. Episodes without an entry this run (e.g. a
+    failed map call) keep their previous contributions.
+    """
+    current = {entry['episode_id']: entry for entry in entries}
+    existing = set(episode_ids)
+    changes = {'added': 0, 'updated': 0, 'removed': 0}
+    for episode_id in list(knowledge['episodes']):
+        if episode_id not in existing:
+            remove_episode(knowledge, episode_id)
+            changes['removed'] += 1
+    for episode_id, entry in current.items():
+        previous = knowledge['episodes'].get(episode_id)
+        if previous and entry_version(previous) == entry_version(entry):
+            continue
+        changes['updated' if previous else 'added'] += 1
+        remove_episode(knowledge, episode_id)
+        add_episode(knowledge, entry)
+    return changes
+
+
+async def summarize_all(client: AsyncChatClient, corpus_dir: Path = CORPUS_DIR,
+                        output_dir: Path = SUMMARIES_DIR, concurrency: int = CONCURRENCY,
+                        titles: Dict[str, Dict[str, str]] = None, reduce_only: bool = False) -> Dict[str, Any]:
+    """Run the map step for uncached episodes and the incremental reduce.
+
+    `titles` maps episode id -> {'title', 'guest'}; defaults to the columnar index.
+    """
+    corpus = Corpus(corpus_dir)
+    cache = MapCache(output_dir / MAP_DIR_NAME)
+    if titles is None:
+        from columnar_index import EpisodeTable
+        table = EpisodeTable()
+        titles = {table.text('id', row): {'title': table.text('title', row), 'guest': table.text('guest', row)}
+                  for row in range(len(table))}
+
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {'cached': 0, 'mapped': 0, 'failed': 0, 'map_calls': 0}
+    entries: List[Dict[str, Any]] = []
+
+    async def process(row: int):
+        episode_id = corpus.episode_ids[row]
+        digest = transcript_hash(corpus.episode_bytes(row))
+        # --reduce-only makes no calls, so it uses whichever model's results are cached
+        entry = cache.get(episode_id, digest, None if reduce_only else client.model)
+        if entry is not None:
+            stats['cached'] += 1
+            entries.append(entry)
+            return
+        if reduce_only:
+            return
+        meta = titles.get(episode_id, {'title': episode_id, 'guest': ''})
+        try:
+            result, calls = await map_episode(client, semaphore, corpus, row, meta['title'], meta['guest'])
+        except (ChatError, ValueError) as e:
+            stats['failed'] += 1
+            print(f"  ❌ {episode_id}: {e}")
+            return
+        stats['mapped'] += 1
+        stats['map_calls'] += calls
+        entry = {
+            'episode_id': episode_id,
+            'title': meta['title'],
+            'guest': meta['guest'],
+            'transcript_sha256': digest,
+            'prompt_version': PROMPT_VERSION,
+            'model': client.model,
+            'result': result,
+        }
+        cache.put(entry)
+        entries.append(entry)
+
+    await asyncio.gather(*(process(row) for row in range(corpus.num_episodes)))
+
+    map_path = output_dir / KNOWLEDGE_MAP_FILE
+    knowledge = load_knowledge_map(map_path)
+    changes = reduce_incremental(knowledge, entries, corpus.episode_ids)
+    knowledge['metadata'] = {
+        'total_episodes': len(knowledge['episodes']),
+        'total_topics': len(knowledge['topics']),
+        'total_frameworks': len(knowledge['frameworks']),
+        'total_guests': len(knowledge['guests']),
+        'prompt_version': PROMPT_VERSION,
+        'description': 'Topic, framework and guest maps reduced from per-episode extractions'
+    }
+    tmp = map_path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(knowledge, f, indent=2, ensure_ascii=False)
+    tmp.replace(map_path)
+    return {**stats, **changes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Map-reduce summarization of all episodes")
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help='Map calls in flight')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='Chat model name')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='OpenAI-compatible API base URL')
+    parser.add_argument('--reduce-only', action='store_true', help='Rebuild the maps from cached results only')
+    args = parser.parse_args()
+
+    client = AsyncChatClient(args.base_url, model=args.model)
+    print(f"Summarizing episodes from {CORPUS_DIR} ({args.concurrency} concurrent map calls)...")
+    started = time.time()
+    stats = asyncio.run(summarize_all(client, concurrency=args.concurrency, reduce_only=args.reduce_only))
+    print(f"✓ Map: {stats['mapped']} episodes mapped ({stats['map_calls']} calls), "
+          f"{stats['cached']} cached, {stats['failed']} failed")
+    print(f"✓ Reduce: {stats['added']} added, {stats['updated']} updated, {stats['removed']} removed "
+          f"-> {SUMMARIES_DIR / KNOWLEDGE_MAP_FILE} ({time.time() - started:.1f}s)")
+    if stats['failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
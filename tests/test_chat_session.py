@@ -0,0 +1,29 @@
+"""Token accounting of multi-turn chat sessions."""
+
+from chat_session import ChatSession
+from prompt_layout import Passage
+
+TRANSCRIPT = "".join(f"Sentence {i} about hiring product managers and team reviews. " for i in range(200))
+
+
+def excerpts(*starts, size=1000):
+    return [Passage('ep', 'Title', 'Guest', TRANSCRIPT[start:start + size], start) for start in starts]
+
+
+def test_answered_turns_drop_their_excerpts():
+    session = ChatSession()
+    first = session.add_turn("How do I hire?", excerpts(0, 1000))
+    session.record_answer("Hire slowly.")
+    second = session.add_turn("And reviews?", excerpts(1000, 2000))
+    assert (second.passages_added, second.passages_reused) == (1, 1)
+    assert second.prompt_tokens < first.prompt_tokens
+    assert TRANSCRIPT[:1000] not in session.text()
+    assert "Hire slowly." in session.text()
+
+
+def test_history_stays_within_budget():
+    session = ChatSession(history_tokens=300)
+    for turn in range(6):
+        session.add_turn(f"Question {turn}?", excerpts(turn * 1000))
+        session.record_answer("An answer. " * 60)
+        assert session.history_tokens() <= 300
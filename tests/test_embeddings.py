@@ -0,0 +1,36 @@
+"""Regression tests for the offline LSA embedding backend."""
+
+import numpy as np
+import pytest
+
+from embeddings import LSABackend
+from text_features import tokenize
+
+TEXTS = [
+    "pricing strategy for a new product",
+    "hiring the first product manager",
+    "growth loops and retention",
+    "pricing pages and packaging",
+]
+
+
+@pytest.fixture(scope="module")
+def backend():
+    return LSABackend(n_features=1024).fit(TEXTS, dim=2)
+
+
+@pytest.mark.parametrize("texts", [
+    [''],
+    ['the and'],
+    ['pricing strategy', 'the and'],
+    ['', 'growth loops', 'What should I do?', ''],
+])
+def test_texts_without_tokens_embed_to_zero_vectors(backend, texts):
+    vectors = backend.embed(texts)
+    assert vectors.shape == (len(texts), backend.dim)
+    expected = [1.0 if tokenize(text) else 0.0 for text in texts]
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), expected, atol=1e-5)
+
+
+def test_empty_batch(backend):
+    assert backend.embed([]).shape == (0, backend.dim)
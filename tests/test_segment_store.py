@@ -0,0 +1,39 @@
+"""BM25 rankings of a segment store must not depend on how it is split."""
+
+from pathlib import Path
+
+import pytest
+
+from create_knowledge_base import EPISODES_DIR, load_episode
+from segment_store import SegmentSearcher, SegmentStore
+
+QUERIES = ["pricing", "willingness to pay", "hiring product managers", "growth loops retention"]
+
+
+@pytest.fixture(scope="module")
+def episodes():
+    return [load_episode(path) for path in sorted(Path(EPISODES_DIR).glob("*/transcript.md"))[:6]]
+
+
+def ranking(directory, query):
+    return [(r['episode_id'], r['chunk_index'], round(r['score'], 4))
+            for r in SegmentSearcher(directory).search(query, top_k=10)]
+
+
+def test_split_store_ranks_like_single_store(episodes, tmp_path):
+    SegmentStore(tmp_path / "single").add(episodes)
+    split = SegmentStore(tmp_path / "split")
+    split.add(episodes[:5])
+    split.add(episodes[5:])
+    for query in QUERIES:
+        assert ranking(tmp_path / "split", query) == ranking(tmp_path / "single", query)
+
+
+def test_tombstoned_chunks_do_not_count(episodes, tmp_path):
+    SegmentStore(tmp_path / "single").add(episodes[1:])
+    replaced = SegmentStore(tmp_path / "replaced")
+    replaced.add(episodes)
+    replaced.add(episodes[1:3])  # older copies become tombstones
+    replaced.remove([episodes[0].id])
+    for query in QUERIES:
+        assert ranking(tmp_path / "replaced", query) == ranking(tmp_path / "single", query)
@@ -0,0 +1,31 @@
+"""Edge cases for mini-batch k-means topic clustering."""
+
+import numpy as np
+
+from text_features import CSRMatrix
+from topic_clusters import assign_all, minibatch_kmeans
+
+
+def sparse(rows, n_cols=4):
+    indptr, indices, data = [0], [], []
+    for row in rows:
+        indices.extend(row)
+        data.extend([1.0] * len(row))
+        indptr.append(len(indices))
+    return CSRMatrix(np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int32),
+                     np.array(data, dtype=np.float32), n_cols)
+
+
+def test_fewer_nonempty_rows_than_topics():
+    matrix = sparse([[0], [], [2], [], []])
+    centers = minibatch_kmeans(matrix, k=4, iterations=3)
+    assert centers.shape == (2, 4)
+    labels = assign_all(matrix, centers)
+    assert labels[0] != labels[2]
+
+
+def test_all_rows_empty():
+    matrix = sparse([[], [], []])
+    centers = minibatch_kmeans(matrix, k=4, iterations=3)
+    assert centers.shape == (0, 4)
+    assert assign_all(matrix, centers).tolist() == [-1, -1, -1]
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Shared tokenization and sparse TF-IDF helpers for the build stages.
+
+Sparse matrices are plain CSR triples of NumPy arrays
+(indptr, indices, data) so they can be saved with np.save, memory-mapped and
+sliced without any dependency beyond NumPy.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:['’][a-z]+)?")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because
+been before being below between both but by can could did do does doing don't
+down during each even few for from further get go going got had has have having
+he her here hers herself him himself his how i i'm if in into is it it's its
+itself just kind know let like lot me more most my myself no nor not now of off
+on once only or other our ours ourselves out over own really right same say
+said she should so some something such than that that's the their theirs them
+themselves then there there's these they they're thing things think this those
+through to too um uh under until up very was way we we're were what when where
+which while who whom why will with would yeah you you're your yours yourself
+yourselves actually okay oh mean want see sort maybe little bit pretty tell
+feel great back need use many us first two look here's you've i've didn't
+would've et cetera trying big new better important love help done anything
+last end years day make people yes time much well lot lots still every
+""".split())
+
+
+class CSRMatrix(NamedTuple):
+    """Compressed sparse row matrix as three NumPy arrays."""
+    indptr: np.ndarray   # int64, n_rows + 1
+    indices: np.ndarray  # int32 column ids
+    data: np.ndarray     # float32 values
+    n_cols: int
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    def row_ids(self) -> np.ndarray:
+        """Row number of every stored value."""
+        return np.repeat(np.arange(self.n_rows), np.diff(self.indptr))
+
+    def transpose(self) -> 'CSRMatrix':
+        """Column-major copy (CSR of the transpose), e.g. term -> document postings."""
+        order = np.argsort(self.indices, kind='stable')
+        counts = np.bincount(self.indices, minlength=self.n_cols)
+        indptr = np.zeros(self.n_cols + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return CSRMatrix(indptr, self.row_ids()[order].astype(np.int32),
+                         self.data[order], self.n_rows)
+
+
+def tokenize(text: str, drop_stopwords: bool = True) -> List[str]:
+    """Lowercase word tokens, optionally without stopwords, numbers and 1-character tokens.
+
+    Dropping bare numbers also drops the (hh:mm:ss) speaker timestamps.
+    """
+    tokens = TOKEN_RE.findall(text.lower())
+    if drop_stopwords:
+        tokens = [t for t in tokens if len(t) > 1 and t not in STOPWORDS and not t.isdigit()]
+    return tokens
+
+
+def build_vocabulary(documents: Iterable[List[str]], min_df: int = 2,
+                     max_df_ratio: float = 0.5, max_terms: int = None) -> Tuple[Dict[str, int], np.ndarray]:
+    """Term -> column mapping and document frequencies, pruned by df."""
+    df: Counter = Counter()
+    n_docs = 0
+    for tokens in documents:
+        df.update(set(tokens))
+        n_docs += 1
+    max_df = max(1, int(max_df_ratio * n_docs))
+    kept = [(term, count) for term, count in df.items() if min_df <= count <= max_df]
+    kept.sort(key=lambda item: (-item[1], item[0]))
+    if max_terms:
+        kept = kept[:max_terms]
+    kept.sort()
+    vocabulary = {term: i for i, (term, _) in enumerate(kept)}
+    return vocabulary, np.array([count for _, count in kept], dtype=np.int64)
+
+
+def tfidf_matrix(documents: Iterable[List[str]], vocabulary: Dict[str, int],
+                 df: np.ndarray, n_docs: int) -> CSRMatrix:
+    """L2-normalized TF-IDF rows with sublinear term frequency."""
+    idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+    indptr = [0]
+    indices: List[np.ndarray] = []
+    data: List[np.ndarray] = []
+    for tokens in documents:
+        counts = Counter(vocabulary[t] for t in tokens if t in vocabulary)
+        cols = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        order = np.argsort(cols)
+        cols = cols[order]
+        weights = (1 + np.log(tf[order])) * idf[cols]
+        norm = np.linalg.norm(weights)
+        if norm:
+            weights /= norm
+        indices.append(cols)
+        data.append(weights.astype(np.float32))
+        indptr.append(indptr[-1] + len(cols))
+    return CSRMatrix(
+        np.array(indptr, dtype=np.int64),
+        np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+        np.concatenate(data) if data else np.empty(0, dtype=np.float32),
+        len(vocabulary),
+    )
+
+
+def sparse_dot_block(rows: CSRMatrix, start: int, stop: int, postings: CSRMatrix) -> np.ndarray:
+    """Dense (stop - start) x postings.n_cols block of rows[start:stop] @ postings-matrix.T.
+
+    `postings` is the transpose of the right-hand matrix. Every stored value
+    in the row block is expanded against its term's postings and the products
+    are scatter-added, so memory is bounded by the block, not the corpus.
+    """
+    lo, hi = rows.indptr[start], rows.indptr[stop]
+    block_rows = np.repeat(np.arange(stop - start), np.diff(rows.indptr[start:stop + 1]))
+    terms = rows.indices[lo:hi]
+    weights = rows.data[lo:hi]
+
+    lengths = postings.indptr[terms + 1] - postings.indptr[terms]
+    total = int(lengths.sum())
+    size = (stop - start) * postings.n_cols
+    if not total:
+        return np.zeros((stop - start, postings.n_cols), dtype=np.float32)
+
+    # Positions of every expanded posting: offsets within each term's run
+    run_starts = np.repeat(postings.indptr[terms], lengths)
+    within = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = run_starts + within
+
+    targets = np.repeat(block_rows, lengths) * postings.n_cols + postings.indices[positions]
+    products = np.repeat(weights, lengths) * postings.data[positions]
+    scores = np.bincount(targets, weights=products, minlength=size)
+    return scores.reshape(stop - start, postings.n_cols).astype(np.float32)
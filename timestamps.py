@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Character-offset to video-timestamp index with YouTube deep links.
+
+Every speaker turn in a transcript starts with a `Speaker (hh:mm:ss):` (or
+bare `(mm:ss):`) marker. The build records each marker once as a fixed-width
+(char, byte, seconds) record, sorted by position: `char` is the offset in
+the episode transcript (the coordinates of chunk start_char/end_char) and
+`byte` the offset in the corpus blob (the coordinates of corpus chunk
+records). Any hit then resolves to the turn it falls in with a binary
+search over its episode's markers, without rescanning the text.
+
+Usage:
+    python3 timestamps.py --build                       # from knowledge_base.json
+    python3 timestamps.py --episode marty-cagan --char 52000
+    python3 timestamps.py --chunk 42                    # corpus chunk -> deep link
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+import numpy as np
+
+from corpus_blob import CORPUS_DIR, Corpus, char_to_byte_offsets
+from records import Episode, load
+
+# Configuration
+TIMESTAMPS_DIR = Path(__file__).parent / "knowledge_base" / "timestamps"
+KB_FILE = Path(__file__).parent / "knowledge_base" / "knowledge_base.json"
+MARKERS_FILE = "markers.npy"
+EPISODES_FILE = "episodes.npy"
+MANIFEST_FILE = "manifest.json"
+
+MARKER_DTYPE = np.dtype([
+    ('char', '<u4'),
+    ('byte', '<u4'),
+    ('seconds', '<u4'),
+])
+
+# `Lenny (00:00:36):` or a bare `(01:21):` when the same speaker continues
+TIMESTAMP_RE = re.compile(r'^(?:(?P<speaker>[^\n()]{1,80}?) )?\((?P<time>\d{1,2}(?::\d{2}){1,2})\):', re.MULTILINE)
+
+
+def parse_timestamp(value: str) -> int:
+    """'01:02:03' or '02:03' to seconds."""
+    seconds = 0
+    for part in value.split(':'):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def format_timestamp(seconds: int) -> str:
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours:02d}:{rest // 60:02d}:{rest % 60:02d}"
+
+
+def deep_link(youtube_url: str, seconds: int) -> str:
+    """YouTube URL that starts playback at `seconds` ('' without a URL)."""
+    if not youtube_url:
+        return ''
+    return f"{youtube_url}{'&' if '?' in youtube_url else '?'}t={int(seconds)}s"
+
+
+def find_markers(transcript: str) -> List[tuple]:
+    """(char offset, seconds) of every timestamped turn, in transcript order."""
+    return [(m.start(), parse_timestamp(m.group('time'))) for m in TIMESTAMP_RE.finditer(transcript)]
+
+
+def build_timestamp_index(episodes: List[Episode], output_dir: Path = TIMESTAMPS_DIR) -> Path:
+    """Write the marker table for `episodes`, in corpus row order.
+
+    Byte offsets are blob positions, so `episodes` must be the list the
+    corpus was built from (build_corpus concatenates them in this order).
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    episode_offsets = np.zeros(len(episodes) + 1, dtype=np.int64)
+    parts = []
+    blob_size = 0
+    for row, episode in enumerate(episodes):
+        transcript = episode.transcript
+        found = find_markers(transcript)
+        byte_offsets = char_to_byte_offsets(transcript, [char for char, _ in found])
+        markers = np.zeros(len(found), dtype=MARKER_DTYPE)
+        for i, (char, seconds) in enumerate(found):
+            markers[i] = (char, blob_size + byte_offsets[char], seconds)
+        parts.append(markers)
+        blob_size += len(transcript.encode('utf-8'))
+        episode_offsets[row + 1] = episode_offsets[row] + len(found)
+
+    if blob_size > np.iinfo(np.uint32).max:
+        raise ValueError(f"Corpus blob is {blob_size:,} bytes; markers only address 4 GiB")
+
+    np.save(output_dir / MARKERS_FILE, np.concatenate(parts) if parts else np.zeros(0, dtype=MARKER_DTYPE))
+    np.save(output_dir / EPISODES_FILE, episode_offsets)
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_episodes': len(episodes),
+            'total_markers': int(episode_offsets[-1]),
+            'episode_ids': [ep.id for ep in episodes],
+            'youtube_urls': [ep.youtube_url for ep in episodes],
+            'description': 'Speaker-turn timestamps as (char, blob byte, seconds) per episode'
+        }, f, indent=2, ensure_ascii=False)
+
+    return output_dir
+
+
+class TimestampIndex:
+    """Memory-mapped reader for an index built by build_timestamp_index."""
+
+    def __init__(self, directory: Path = TIMESTAMPS_DIR):
+        directory = Path(directory)
+        with open(directory / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.episode_ids: List[str] = self.manifest['episode_ids']
+        self.youtube_urls: List[str] = self.manifest['youtube_urls']
+        self.rows = {episode_id: row for row, episode_id in enumerate(self.episode_ids)}
+        self.markers = np.load(directory / MARKERS_FILE, mmap_mode='r')
+        self.episode_offsets = np.load(directory / EPISODES_FILE, mmap_mode='r')
+
+    def _row(self, episode: Union[str, int]) -> int:
+        return self.rows[episode] if isinstance(episode, str) else int(episode)
+
+    def seconds_at(self, episode: Union[str, int], char_offset: int) -> int:
+        """Video time of the turn containing a transcript character offset (0 before the first)."""
+        row = self._row(episode)
+        lo, hi = int(self.episode_offsets[row]), int(self.episode_offsets[row + 1])
+        i = int(np.searchsorted(self.markers['char'][lo:hi], char_offset, side='right')) - 1
+        return int(self.markers['seconds'][lo + i]) if i >= 0 else 0
+
+    def seconds_at_bytes(self, rows, positions) -> np.ndarray:
+        """Video times for blob byte offsets (e.g. corpus chunk starts) in the given episode rows."""
+        positions = np.asarray(positions)
+        found = np.searchsorted(self.markers['byte'], positions, side='right') - 1
+        # A marker before the episode's first one belongs to the previous episode
+        inside = found >= np.asarray(self.episode_offsets)[np.asarray(rows)]
+        seconds = np.asarray(self.markers['seconds'])[np.maximum(found, 0)]
+        return np.where(inside, seconds, 0).astype(np.int64)
+
+    def link(self, episode: Union[str, int], seconds: int) -> str:
+        return deep_link(self.youtube_urls[self._row(episode)], seconds)
+
+    def locate(self, episode: Union[str, int], char_offset: int) -> Dict[str, Any]:
+        """Timestamp and deep link for a character offset in an episode transcript."""
+        seconds = self.seconds_at(episode, char_offset)
+        return {'seconds': seconds, 'timestamp': format_timestamp(seconds), 'url': self.link(episode, seconds)}
+
+    def locate_chunk(self, corpus: Corpus, chunk_id: int) -> Dict[str, Any]:
+        """Timestamp and deep link for the start of a corpus chunk."""
+        row = int(corpus.chunks['episode_row'][chunk_id])
+        seconds = int(self.seconds_at_bytes([row], [int(corpus.chunks['start'][chunk_id])])[0])
+        return {'seconds': seconds, 'timestamp': format_timestamp(seconds), 'url': self.link(row, seconds)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve transcript offsets to video timestamps")
+    parser.add_argument('--build', action='store_true', help='Build the index from knowledge_base.json')
+    parser.add_argument('--episode', type=str, metavar='ID', help='Episode for --char')
+    parser.add_argument('--char', type=int, metavar='N', help='Character offset in the episode transcript')
+    parser.add_argument('--chunk', type=int, metavar='N', help='Corpus chunk number')
+    parser.add_argument('--kb', type=str, default=str(KB_FILE), help='knowledge_base.json for --build')
+    parser.add_argument('--corpus', type=str, default=str(CORPUS_DIR), help='Corpus directory for --chunk')
+    parser.add_argument('--dir', type=str, default=None, help='Override timestamps directory path')
+    args = parser.parse_args()
+
+    directory = Path(args.dir) if args.dir else TIMESTAMPS_DIR
+    if args.build:
+        episodes = load(Path(args.kb), episodes=Episode)['episodes']
+        build_timestamp_index(episodes, directory)
+        print(f"✓ Created {directory}/")
+
+    index = TimestampIndex(directory)
+    if args.chunk is not None:
+        corpus = Corpus(Path(args.corpus))
+        if not 0 <= args.chunk < len(corpus):
+            print(f"❌ Error: chunk {args.chunk} out of range (0-{len(corpus) - 1})")
+            sys.exit(1)
+        location = index.locate_chunk(corpus, args.chunk)
+        print(f"{corpus.chunk_record(args.chunk)['episode_id']} @ {location['timestamp']}  {location['url']}")
+    elif args.episode:
+        if args.episode not in index.rows:
+            print(f"❌ Error: unknown episode: {args.episode}")
+            sys.exit(1)
+        location = index.locate(args.episode, args.char or 0)
+        print(f"{args.episode} @ {location['timestamp']}  {location['url']}")
+    else:
+        manifest = index.manifest
+        timed = int(np.count_nonzero(np.diff(index.episode_offsets)))
+        print(f"Total Episodes: {manifest['total_episodes']} ({timed} with timestamps)")
+        print(f"Total Markers: {manifest['total_markers']:,}")
+        print(f"Marker Table Size: {index.markers.nbytes:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
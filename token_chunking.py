@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Token-budgeted chunking with pluggable tokenizers.
+
+`chunk_text` measures chunks in characters, but embedding inputs, context
+windows and prices are measured in tokens, and the 1000-character chunks
+run from under 190 to over 330 tokens. `token_chunks` instead cuts chunks of
+`max_tokens` tokens that share `overlap` tokens with their neighbours, counted
+with a pluggable tokenizer (a chunk is a token short when a boundary falls on
+a whitespace-only token, which is left out):
+
+- `approx` (default): offline and dependency-free. Splits text like GPT
+  pre-tokenization (words with their leading space, digit groups of up to
+  3, punctuation runs, whitespace) and counts each piece longer than
+  WORD_PIECE_CHARS as several tokens. It averages ~4 characters per token
+  on the transcripts, like the rule of thumb in prompt_layout.py.
+- `tiktoken[:encoding]`: exact OpenAI token counts (`pip install tiktoken`).
+
+A tokenizer returns the start offset of every token, from a single pass over
+the text. Chunk boundaries and per-chunk counts then come from that array
+(and `span_token_counts` counts arbitrary character spans with a binary
+search), so chunking stays linear in the transcript length. The counts are
+kept in the `token_count` field of chunk records, so nothing downstream has
+to re-tokenize.
+
+Usage:
+    python3 token_chunking.py                                 # token counts of the current char chunks
+    python3 token_chunking.py --tokens 256 --overlap 32       # token-budgeted chunks
+    python3 token_chunking.py --tokens 256 --tokenizer tiktoken:cl100k_base
+"""
+
+import argparse
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+# Configuration
+KB_FILE = Path(__file__).parent / "knowledge_base" / "knowledge_base.json"
+CHUNK_TOKENS = 256          # Tokens per chunk in token mode
+CHUNK_TOKEN_OVERLAP = 32    # Tokens shared by neighbouring chunks
+DEFAULT_TOKENIZER = "approx"
+WORD_PIECE_CHARS = 8        # approx: a piece counts one token per (started) 8 characters
+
+# Contractions, words with their leading space, digit groups, punctuation runs, whitespace.
+# Matches are contiguous: every character of the text falls in exactly one piece.
+PRETOKEN_RE = re.compile(r"'(?:[sdmt]|ll|ve|re)(?![^\W\d_])| ?[^\W\d_]+| ?\d{1,3}| ?(?:[^\s\w]|_)+|\s+(?!\S)|\s+")
+
+
+class ApproxTokenizer:
+    """Fast offline approximation of a BPE tokenizer."""
+
+    name = "approx"
+
+    def offsets(self, text: str) -> np.ndarray:
+        """Start character offset of every token."""
+        starts = np.fromiter((m.start() for m in PRETOKEN_RE.finditer(text)), dtype=np.int64)
+        lengths = np.diff(np.append(starts, len(text)))
+        pieces = (lengths + WORD_PIECE_CHARS - 1) // WORD_PIECE_CHARS
+        if not len(pieces) or pieces.max() == 1:
+            return starts
+        # Long pieces split every WORD_PIECE_CHARS characters
+        first = np.repeat(np.cumsum(pieces) - pieces, pieces)
+        return np.repeat(starts, pieces) + (np.arange(int(pieces.sum())) - first) * WORD_PIECE_CHARS
+
+    def count(self, text: str) -> int:
+        return len(self.offsets(text))
+
+
+class TiktokenTokenizer:
+    """Exact OpenAI token counts (requires the tiktoken package)."""
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        try:
+            import tiktoken
+        except ImportError:
+            raise ImportError("The tiktoken tokenizer requires: pip install tiktoken") from None
+        self.encoding = tiktoken.get_encoding(encoding)
+        self.name = f"tiktoken:{encoding}"
+
+    def offsets(self, text: str) -> np.ndarray:
+        tokens = self.encoding.encode(text, disallowed_special=())
+        _, offsets = self.encoding.decode_with_offsets(tokens)
+        return np.asarray(offsets, dtype=np.int64)
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+def get_tokenizer(name: str = DEFAULT_TOKENIZER):
+    """'approx', 'tiktoken' or 'tiktoken:<encoding>'."""
+    if name == "approx":
+        return ApproxTokenizer()
+    if name == "tiktoken" or name.startswith("tiktoken:"):
+        return TiktokenTokenizer(*name.split(":", 1)[1:])
+    raise ValueError(f"Unknown tokenizer '{name}' (expected 'approx' or 'tiktoken[:encoding]')")
+
+
+def token_chunks(text: str, tokenizer=None, max_tokens: int = CHUNK_TOKENS,
+                 overlap: int = CHUNK_TOKEN_OVERLAP) -> List[Dict[str, Any]]:
+    """Split text into chunks of max_tokens tokens that share `overlap` tokens with the next chunk.
+
+    Returns chunk_text-style dicts ('text', 'start', 'end') plus 'tokens', the
+    number of tokens in 'text'. Chunks start and end on tokens with text:
+    whitespace-only tokens at the edges are left out, so a chunk that would
+    end on one holds a token fewer, and the next chunk starts early enough to
+    keep at least `overlap` tokens in common. A word token keeps its leading
+    space, so re-tokenizing 'text' gives back 'tokens'.
+    """
+    if not 0 <= overlap < max_tokens:
+        raise ValueError(f"overlap must be in [0, {max_tokens}), got {overlap}")
+    tokenizer = tokenizer or ApproxTokenizer()
+    bounds = np.append(tokenizer.offsets(text), len(text)).tolist()
+    total = len(bounds) - 1
+
+    def blank(token: int) -> bool:
+        return text[bounds[token]:bounds[token + 1]].isspace()
+
+    chunks = []
+    first = 0
+    while first < total and blank(first):
+        first += 1
+    while first < total:
+        stop = min(first + max_tokens, total)
+        last = stop
+        while blank(last - 1):
+            last -= 1
+        chunks.append({'text': text[bounds[first]:bounds[last]], 'start': bounds[first], 'end': bounds[last],
+                       'tokens': last - first})
+        if stop == total:
+            break
+        previous, first = first, last - overlap
+        while first > previous + 1 and blank(first):
+            first -= 1
+        first = max(first, previous + 1)
+        while first < total and blank(first):
+            first += 1
+    return chunks
+
+
+def span_token_counts(text: str, spans: Sequence[tuple], tokenizer=None) -> List[int]:
+    """Tokens overlapping each (start, end) character span, from one tokenization of `text`.
+
+    A span that starts inside a token (e.g. a stripped chunk starting at the
+    word of " word") counts that token too. A span that cuts a long word can
+    differ by one from tokenizing its text on its own.
+    """
+    if not spans:
+        return []
+    tokenizer = tokenizer or ApproxTokenizer()
+    offsets = tokenizer.offsets(text)
+    starts, ends = np.asarray(spans, dtype=np.int64).T
+    first = np.maximum(np.searchsorted(offsets, starts, side='right') - 1, 0)
+    return np.where(ends > starts, np.searchsorted(offsets, ends) - first, 0).tolist()
+
+
+def main():
+    from create_knowledge_base import CHUNK_OVERLAP, CHUNK_SIZE, chunk_text
+    from records import Episode, load
+
+    parser = argparse.ArgumentParser(description="Token counts of character chunks, or token-budgeted chunks")
+    parser.add_argument('--tokens', type=int, default=0, metavar='N',
+                        help=f'Chunk to N tokens per chunk (e.g. {CHUNK_TOKENS}); default: character chunks')
+    parser.add_argument('--overlap', type=int, default=CHUNK_TOKEN_OVERLAP, help='Token overlap for --tokens')
+    parser.add_argument('--tokenizer', type=str, default=DEFAULT_TOKENIZER, help="'approx' or 'tiktoken[:encoding]'")
+    parser.add_argument('--kb', type=str, default=str(KB_FILE), help='knowledge_base.json to chunk')
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer(args.tokenizer)
+    episodes = load(Path(args.kb), episodes=Episode)['episodes']
+    started = time.perf_counter()
+    counts = []
+    for episode in episodes:
+        if args.tokens:
+            counts.extend(c['tokens'] for c in token_chunks(episode.transcript, tokenizer, args.tokens, args.overlap))
+        else:
+            chunks = chunk_text(episode.transcript)
+            counts.extend(span_token_counts(episode.transcript, [(c['start'], c['end']) for c in chunks], tokenizer))
+    elapsed = time.perf_counter() - started
+
+    counts = np.asarray(counts)
+    chars = sum(episode.transcript_length for episode in episodes)
+    mode = (f"{args.tokens}-token chunks, {args.overlap} overlap" if args.tokens
+            else f"{CHUNK_SIZE}-character chunks, {CHUNK_OVERLAP} overlap")
+    print(f"Tokenizer: {tokenizer.name}  ({mode})")
+    print(f"Chunks: {len(counts):,} in {elapsed:.2f}s ({chars / max(elapsed, 1e-9) / 1e6:.1f}M chars/s)")
+    if len(counts):
+        p5, p50, p95 = np.percentile(counts, [5, 50, 95])
+        print(f"Tokens per chunk: min {counts.min()}, p5 {p5:.0f}, median {p50:.0f}, p95 {p95:.0f}, max {counts.max()}")
+        print(f"Spread (p95 / p5): {p95 / max(p5, 1):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
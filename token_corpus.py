@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Integer-encoded token corpus and vectorized n-gram statistics.
+
+The build tokenizes every transcript once and writes the whole corpus as one
+memory-mapped uint32 array of token ids, with a vocabulary ordered by
+frequency (id 1 is the most common word) and an offset table of episode
+boundaries. Speaker labels and timestamps are not tokens; every speaker turn
+and every episode ends with the BREAK id (0) instead, so no n-gram or
+co-occurrence window spans two turns.
+
+Analyses then run as NumPy operations over the id array instead of
+re-tokenizing strings: n-grams are packed into int64 keys and counted with
+np.unique, collocations are scored by PMI, and per-episode term frequencies
+come from a bincount over episode rows.
+
+Usage:
+    python3 token_corpus.py --build
+    python3 token_corpus.py --ngrams 3 --top 20              # most frequent trigrams
+    python3 token_corpus.py --ngrams 2 --spread              # bigrams said in the most episodes
+    python3 token_corpus.py --collocations retention --window 5
+    python3 token_corpus.py --tf retention churn             # episodes using these terms most
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from corpus_blob import CORPUS_DIR, Corpus
+from text_features import STOPWORDS, TOKEN_RE, CSRMatrix
+from timestamps import TIMESTAMP_RE
+
+# Configuration
+TOKENS_DIR = Path(__file__).parent / "knowledge_base" / "tokens"
+TOKENS_FILE = "tokens.npy"
+EPISODES_FILE = "episodes.npy"
+COUNTS_FILE = "counts.npy"
+VOCAB_FILE = "vocab.txt"
+MANIFEST_FILE = "manifest.json"
+BREAK = 0
+BREAK_TERM = "<break>"
+MIN_COUNT = 5   # n-grams rarer than this are not ranked by PMI
+
+
+def turn_texts(transcript: str) -> List[str]:
+    """The transcript text between speaker markers (labels and timestamps dropped)."""
+    pieces = []
+    position = 0
+    for m in TIMESTAMP_RE.finditer(transcript):
+        pieces.append(transcript[position:m.start()])
+        position = m.end()
+    pieces.append(transcript[position:])
+    return [piece for piece in pieces if piece.strip()]
+
+
+def build_token_corpus(corpus_dir: Path = CORPUS_DIR, output_dir: Path = TOKENS_DIR) -> Path:
+    """Tokenize every transcript once and write the id array, vocabulary and offsets."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    corpus = Corpus(corpus_dir)
+
+    # First-seen ids while encoding; renumbered by frequency below
+    vocabulary: Dict[str, int] = {BREAK_TERM: BREAK}
+    assign = vocabulary.setdefault
+    parts = []
+    episode_offsets = np.zeros(corpus.num_episodes + 1, dtype=np.int64)
+    for row in range(corpus.num_episodes):
+        ids = []
+        for piece in turn_texts(corpus.episode_text(row)):
+            ids.extend([assign(token, len(vocabulary)) for token in TOKEN_RE.findall(piece.lower())])
+            ids.append(BREAK)
+        if not ids or ids[-1] != BREAK:
+            ids.append(BREAK)
+        parts.append(np.array(ids, dtype=np.uint32))
+        episode_offsets[row + 1] = episode_offsets[row] + len(ids)
+
+    tokens = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint32)
+    counts = np.bincount(tokens, minlength=len(vocabulary))
+    order = np.argsort(-counts[1:], kind='stable') + 1   # BREAK keeps id 0
+    order = np.concatenate([[BREAK], order])
+    renumber = np.empty(len(order), dtype=np.uint32)
+    renumber[order] = np.arange(len(order), dtype=np.uint32)
+    tokens = renumber[tokens]
+    terms = list(vocabulary)
+
+    np.save(output_dir / TOKENS_FILE, tokens)
+    np.save(output_dir / EPISODES_FILE, episode_offsets)
+    np.save(output_dir / COUNTS_FILE, counts[order].astype(np.int64))
+    with open(output_dir / VOCAB_FILE, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(terms[i] for i in order))
+        f.write('\n')
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_episodes': corpus.num_episodes,
+            'total_tokens': int(np.count_nonzero(tokens)),
+            'vocabulary_size': len(order),
+            'episode_ids': corpus.episode_ids,
+            'build_seconds': round(time.perf_counter() - started, 2),
+            'description': 'uint32 token ids per episode (0 = turn/episode break), vocabulary by frequency'
+        }, f, indent=2, ensure_ascii=False)
+
+    return output_dir
+
+
+class TokenCorpus:
+    """Memory-mapped token ids with n-gram, PMI and term-frequency statistics."""
+
+    def __init__(self, directory: Path = TOKENS_DIR):
+        directory = Path(directory)
+        with open(directory / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        with open(directory / VOCAB_FILE, 'r', encoding='utf-8') as f:
+            self.terms: List[str] = f.read().split('\n')[:-1]
+        self.episode_ids: List[str] = self.manifest['episode_ids']
+        self.tokens = np.load(directory / TOKENS_FILE, mmap_mode='r')
+        self.episode_offsets = np.load(directory / EPISODES_FILE, mmap_mode='r')
+        self.counts = np.load(directory / COUNTS_FILE)
+        self.ids = {term: i for i, term in enumerate(self.terms)}
+        # Words that make poor phrase edges: stopwords, numbers, single characters
+        self.stop = np.array([i == BREAK or t in STOPWORDS or len(t) < 2 or t.isdigit()
+                              for i, t in enumerate(self.terms)], dtype=bool)
+        self._rows = None
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self.terms)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.manifest['total_tokens']
+
+    @property
+    def max_ngram(self) -> int:
+        """Largest n whose n-gram keys fit in int64."""
+        n = 1
+        while self.vocabulary_size ** (n + 1) < 2 ** 63:
+            n += 1
+        return n
+
+    def id_of(self, term: str) -> int:
+        """Token id of a term (KeyError if it never occurs)."""
+        return self.ids[term.lower()]
+
+    def rows(self) -> np.ndarray:
+        """Episode row of every token position (computed once)."""
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(len(self.episode_ids), dtype=np.int32),
+                                   np.diff(self.episode_offsets))
+        return self._rows
+
+    def ngram_keys(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(int64 key, start position) of every n-gram that does not cross a break.
+
+        A key packs the n ids in base vocabulary_size, first id most significant.
+        """
+        if self.vocabulary_size ** n >= 2 ** 63:
+            raise ValueError(f"{n}-gram keys of a {self.vocabulary_size:,}-term vocabulary do not fit in int64")
+        tokens = np.asarray(self.tokens)
+        length = len(tokens) - n + 1
+        keys = np.zeros(max(length, 0), dtype=np.int64)
+        valid = np.ones(max(length, 0), dtype=bool)
+        for offset in range(n):
+            window = tokens[offset:offset + length]
+            keys = keys * self.vocabulary_size + window
+            valid &= window != BREAK
+        starts = np.flatnonzero(valid)
+        return keys[starts], starts
+
+    def decode(self, key: int, n: int) -> str:
+        ids = []
+        for _ in range(n):
+            key, last = divmod(int(key), self.vocabulary_size)
+            ids.append(last)
+        return ' '.join(self.terms[i] for i in reversed(ids))
+
+    def _edges(self, keys: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """First and last token ids of packed n-gram keys."""
+        return keys // self.vocabulary_size ** (n - 1), keys % self.vocabulary_size
+
+    def ngram_counts(self, n: int, by_episode: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """(sorted unique keys, counts); by_episode counts episodes containing each n-gram."""
+        keys, starts = self.ngram_keys(n)
+        if by_episode:
+            # Keep one occurrence per (n-gram, episode)
+            rows = self.rows()[starts]
+            order = np.lexsort((rows, keys))
+            keys, rows = keys[order], rows[order]
+            first = np.ones(len(keys), dtype=bool)
+            first[1:] = (keys[1:] != keys[:-1]) | (rows[1:] != rows[:-1])
+            keys = keys[first]
+        return np.unique(keys, return_counts=True)
+
+    def top_ngrams(self, n: int, top: int = 20, by_episode: bool = False,
+                   keep_stopwords: bool = False) -> List[Tuple[str, int]]:
+        """Most frequent n-grams (or those in the most episodes), without stopword edges."""
+        keys, counts = self.ngram_counts(n, by_episode)
+        if not keep_stopwords:
+            first, last = self._edges(keys, n)
+            keep = ~(self.stop[first] | self.stop[last])
+            keys, counts = keys[keep], counts[keep]
+        best = np.argsort(-counts, kind='stable')[:top]
+        return [(self.decode(keys[i], n), int(counts[i])) for i in best]
+
+    def collocations(self, top: int = 20, min_count: int = MIN_COUNT) -> List[Tuple[str, float, int]]:
+        """Adjacent word pairs with the highest PMI: log(p(a b) / (p(a) p(b)))."""
+        keys, counts = self.ngram_counts(2)
+        first, second = self._edges(keys, 2)
+        keep = (counts >= min_count) & ~(self.stop[first] | self.stop[second])
+        keys, counts, first, second = keys[keep], counts[keep], first[keep], second[keep]
+        total = self.total_tokens
+        pmi = np.log(counts * total / (self.counts[first] * self.counts[second]))
+        best = np.argsort(-pmi, kind='stable')[:top]
+        return [(self.decode(keys[i], 2), float(pmi[i]), int(counts[i])) for i in best]
+
+    def neighbours(self, term: str, window: int = 5, top: int = 20,
+                   min_count: int = MIN_COUNT) -> List[Tuple[str, float, int]]:
+        """Words within `window` tokens of `term` (same turn), ranked by PMI."""
+        target = self.id_of(term)
+        tokens = np.asarray(self.tokens)
+        positions = np.flatnonzero(tokens == target)
+        # Break number of every position: equal numbers mean the same turn
+        segment = np.cumsum(tokens == BREAK)
+        found = []
+        for offset in range(-window, window + 1):
+            if offset == 0:
+                continue
+            around = positions + offset
+            around = around[(around >= 0) & (around < len(tokens))]
+            around = around[segment[around] == segment[around - offset]]
+            found.append(tokens[around])
+        near = np.concatenate(found) if found else np.zeros(0, dtype=np.uint32)
+        together = np.bincount(near, minlength=self.vocabulary_size)
+        candidates = np.flatnonzero((together >= min_count) & ~self.stop)
+        candidates = candidates[candidates != target]
+        expected = self.counts[target] * self.counts[candidates] * 2 * window / self.total_tokens
+        pmi = np.log(together[candidates] / expected)
+        best = np.argsort(-pmi, kind='stable')[:top]
+        return [(self.terms[candidates[i]], float(pmi[i]), int(together[candidates[i]])) for i in best]
+
+    def term_frequencies(self, terms: List[str]) -> np.ndarray:
+        """(episodes x terms) occurrence counts; unknown terms get a zero column."""
+        ids = np.array([self.ids.get(term.lower(), -1) for term in terms], dtype=np.int64)
+        column = np.full(self.vocabulary_size, -1, dtype=np.int64)
+        column[ids[ids >= 0]] = np.flatnonzero(ids >= 0)
+        tokens = np.asarray(self.tokens)
+        positions = np.flatnonzero(column[tokens] >= 0)
+        cells = self.rows()[positions].astype(np.int64) * len(terms) + column[tokens[positions]]
+        counts = np.bincount(cells, minlength=len(self.episode_ids) * len(terms))
+        return counts.reshape(len(self.episode_ids), len(terms))
+
+    def episode_term_matrix(self) -> CSRMatrix:
+        """Counts of every term in every episode as a CSR matrix (breaks excluded)."""
+        tokens = np.asarray(self.tokens)
+        keep = tokens != BREAK
+        cells = self.rows()[keep].astype(np.int64) * self.vocabulary_size + tokens[keep]
+        cells, counts = np.unique(cells, return_counts=True)
+        rows, cols = np.divmod(cells, self.vocabulary_size)
+        indptr = np.zeros(len(self.episode_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(self.episode_ids)), out=indptr[1:])
+        return CSRMatrix(indptr, cols.astype(np.int32), counts.astype(np.float32), self.vocabulary_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="N-gram, collocation and term-frequency statistics over all transcripts")
+    parser.add_argument('--build', action='store_true', help='Tokenize the corpus into the id array')
+    parser.add_argument('--ngrams', type=int, metavar='N', help='Most frequent N-grams')
+    parser.add_argument('--spread', action='store_true', help='Rank --ngrams by number of episodes instead')
+    parser.add_argument('--collocations', nargs='?', const='', metavar='TERM',
+                        help='Highest-PMI word pairs, or the words most associated with TERM')
+    parser.add_argument('--window', type=int, default=5, help='Co-occurrence window for --collocations TERM')
+    parser.add_argument('--min-count', type=int, default=MIN_COUNT, help='Minimum count for PMI rankings')
+    parser.add_argument('--tf', nargs='+', metavar='TERM', help='Episodes that use these terms most')
+    parser.add_argument('--top', type=int, default=20, help='Number of results')
+    parser.add_argument('--corpus', type=str, default=str(CORPUS_DIR), help='Corpus directory for --build')
+    parser.add_argument('--dir', type=str, default=None, help='Override tokens directory path')
+    args = parser.parse_args()
+
+    directory = Path(args.dir) if args.dir else TOKENS_DIR
+    if args.build:
+        build_token_corpus(Path(args.corpus), directory)
+        with open(directory / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        print(f"✓ Created {directory}/ ({manifest['total_tokens']:,} tokens, "
+              f"{manifest['vocabulary_size']:,} terms in {manifest['build_seconds']}s)")
+
+    corpus = TokenCorpus(directory)
+    if args.ngrams is not None and not 1 <= args.ngrams <= corpus.max_ngram:
+        print(f"❌ Error: --ngrams must be between 1 and {corpus.max_ngram} for a "
+              f"{corpus.vocabulary_size:,}-term vocabulary")
+        sys.exit(1)
+    started = time.perf_counter()
+    if args.ngrams:
+        label = 'episodes' if args.spread else 'count'
+        rows = [(phrase, f"{count:,} {label}") for phrase, count in corpus.top_ngrams(args.ngrams, args.top, args.spread)]
+        title = f"Top {args.ngrams}-grams by {label}"
+    elif args.collocations is not None:
+        try:
+            if args.collocations:
+                found = corpus.neighbours(args.collocations, args.window, args.top, args.min_count)
+                title = f"Words within {args.window} of '{args.collocations}' by PMI"
+            else:
+                found = corpus.collocations(args.top, args.min_count)
+                title = "Collocations by PMI"
+        except KeyError:
+            print(f"❌ Error: '{args.collocations}' does not occur in the corpus")
+            sys.exit(1)
+        rows = [(phrase, f"PMI {pmi:5.2f}  ({count:,}x)") for phrase, pmi, count in found]
+    elif args.tf:
+        counts = corpus.term_frequencies(args.tf)
+        totals = counts.sum(axis=1)
+        rows = [(corpus.episode_ids[i], '  '.join(f"{t}={c}" for t, c in zip(args.tf, counts[i])))
+                for i in np.argsort(-totals, kind='stable')[:args.top] if totals[i]]
+        title = f"Episodes using {', '.join(args.tf)} most"
+    else:
+        print(f"Total Episodes: {len(corpus.episode_ids)}")
+        print(f"Total Tokens: {corpus.total_tokens:,}")
+        print(f"Vocabulary: {corpus.vocabulary_size:,} terms")
+        print(f"Token Array Size: {corpus.tokens.nbytes:,} bytes")
+        return
+    elapsed = time.perf_counter() - started
+
+    print(f"{title} ({elapsed:.2f}s):")
+    for phrase, value in rows:
+        print(f"  {phrase:<40} {value}")
+    if not rows:
+        print("  (none)")
+
+
+if __name__ == "__main__":
+    main()
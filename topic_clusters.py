@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Offline topic clustering of transcript chunks.
+
+Replaces the hand-built "Topic-Based Organization" from the ChatGPT batch
+workflow with a local build stage: every chunk becomes a sparse TF-IDF
+vector, spherical mini-batch k-means (vectorized NumPy, no API calls) groups
+them into topics, and each topic is labelled with the highest-weighted terms
+of its centroid.
+
+Output (`knowledge_base/topics/`):
+    topics.json      - topic -> label, top terms, chunks and episodes
+    assignments.npy  - topic id of every chunk (rows of corpus/chunks.npy)
+
+Usage:
+    python3 topic_clusters.py --build [--topics 40]
+    python3 topic_clusters.py            # list topics
+"""
+
+import argparse
+import json
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from corpus_blob import CORPUS_DIR, Corpus
+from text_features import CSRMatrix, build_vocabulary, tfidf_matrix, tokenize
+
+# Configuration
+TOPICS_DIR = Path(__file__).parent / "knowledge_base" / "topics"
+TOPICS_FILE = "topics.json"
+ASSIGNMENTS_FILE = "assignments.npy"
+NUM_TOPICS = 40
+BATCH_SIZE = 2048
+NUM_ITERATIONS = 150
+MAX_TERMS = 30000
+LABEL_TERMS = 8
+ASSIGN_BLOCK = 4096  # chunks scored per block in the final assignment pass
+SEED = 42
+
+
+def rows_dot_dense(matrix: CSRMatrix, rows: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """(len(rows), k) dot products of selected sparse rows with dense centers."""
+    starts = matrix.indptr[rows]
+    lengths = matrix.indptr[rows + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros((len(rows), len(centers)), dtype=np.float32)
+    positions = np.repeat(starts, lengths) + (
+        np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths))
+    products = centers[:, matrix.indices[positions]] * matrix.data[positions]
+    sims = np.zeros((len(centers), len(rows)), dtype=np.float32)
+    nonempty = lengths > 0
+    segment_starts = (np.cumsum(lengths) - lengths)[nonempty]
+    sims[:, nonempty] = np.add.reduceat(products, segment_starts, axis=1)
+    return sims.T
+
+
+def assign_all(matrix: CSRMatrix, centers: np.ndarray, block: int = ASSIGN_BLOCK) -> np.ndarray:
+    """Nearest center (by cosine) for every row; -1 when there are no centers."""
+    labels = np.full(matrix.n_rows, -1, dtype=np.int32)
+    if not len(centers):
+        return labels
+    for start in range(0, matrix.n_rows, block):
+        rows = np.arange(start, min(start + block, matrix.n_rows))
+        labels[rows] = rows_dot_dense(matrix, rows, centers).argmax(axis=1)
+    return labels
+
+
+def minibatch_kmeans(matrix: CSRMatrix, k: int = NUM_TOPICS, batch_size: int = BATCH_SIZE,
+                     iterations: int = NUM_ITERATIONS, seed: int = SEED) -> np.ndarray:
+    """Spherical mini-batch k-means over L2-normalized sparse rows.
+
+    Each step assigns a random batch to its most similar centers, then moves
+    every center toward the mean of its batch members with a per-center
+    learning rate of 1 / (points seen so far), as in Sculley (2010). Seeds
+    come from non-empty rows, so fewer of those than k yields fewer centers.
+    """
+    rng = np.random.default_rng(seed)
+    nonempty = np.flatnonzero(np.diff(matrix.indptr) > 0)
+    k = min(k, len(nonempty))
+
+    centers = np.zeros((k, matrix.n_cols), dtype=np.float32)
+    if not k:
+        return centers
+    for center, row in enumerate(rng.choice(nonempty, size=k, replace=False)):
+        lo, hi = matrix.indptr[row], matrix.indptr[row + 1]
+        centers[center, matrix.indices[lo:hi]] = matrix.data[lo:hi]
+    seen = np.ones(k, dtype=np.float64)
+
+    for _ in range(iterations):
+        batch = rng.choice(nonempty, size=min(batch_size, len(nonempty)), replace=False)
+        labels = rows_dot_dense(matrix, batch, centers).argmax(axis=1)
+
+        starts = matrix.indptr[batch]
+        lengths = matrix.indptr[batch + 1] - starts
+        total = int(lengths.sum())
+        positions = np.repeat(starts, lengths) + (
+            np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths))
+        sums = np.zeros_like(centers)
+        np.add.at(sums, (np.repeat(labels, lengths), matrix.indices[positions]), matrix.data[positions])
+
+        counts = np.bincount(labels, minlength=k).astype(np.float64)
+        updated = counts > 0
+        seen_after = seen + counts
+        centers[updated] = ((centers[updated] * seen[updated, None] + sums[updated])
+                            / seen_after[updated, None]).astype(np.float32)
+        seen = seen_after
+        norms = np.linalg.norm(centers, axis=1, keepdims=True)
+        centers /= np.maximum(norms, 1e-12)
+    return centers
+
+
+def label_topics(centers: np.ndarray, vocabulary: Dict[str, int], n_terms: int = LABEL_TERMS) -> List[List[str]]:
+    """Highest-weighted vocabulary terms of each center."""
+    terms = np.empty(len(vocabulary), dtype=object)
+    for term, column in vocabulary.items():
+        terms[column] = term
+    top = np.argsort(-centers, axis=1)[:, :n_terms]
+    return [terms[row].tolist() for row in top]
+
+
+def build_topics(corpus_dir: Path = CORPUS_DIR, output_dir: Path = TOPICS_DIR,
+                 k: int = NUM_TOPICS) -> Path:
+    """Cluster all corpus chunks into k topics and write the topic map."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    corpus = Corpus(corpus_dir)
+    started = time.time()
+
+    documents = [tokenize(corpus.chunk_text(i)) for i in range(len(corpus))]
+    vocabulary, df = build_vocabulary(documents, min_df=5, max_df_ratio=0.2, max_terms=MAX_TERMS)
+    matrix = tfidf_matrix(documents, vocabulary, df, len(documents))
+    del documents
+
+    centers = minibatch_kmeans(matrix, k)
+    assignments = assign_all(matrix, centers)
+    labels = label_topics(centers, vocabulary)
+
+    episode_rows = np.asarray(corpus.chunks['episode_row'])
+    topics: List[Dict[str, Any]] = []
+    for topic_id in range(len(centers)):
+        chunk_ids = np.flatnonzero(assignments == topic_id)
+        episode_counts = Counter(episode_rows[chunk_ids].tolist())
+        topics.append({
+            'topic_id': topic_id,
+            'label': ', '.join(labels[topic_id][:3]),
+            'top_terms': labels[topic_id],
+            'num_chunks': len(chunk_ids),
+            'episodes': [
+                {'episode_id': corpus.episode_ids[row], 'chunks': count}
+                for row, count in episode_counts.most_common()
+            ],
+            'chunk_ids': chunk_ids.tolist(),
+        })
+    topics.sort(key=lambda topic: -topic['num_chunks'])
+
+    np.save(output_dir / ASSIGNMENTS_FILE, assignments.astype(np.int16))
+    with open(output_dir / TOPICS_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'metadata': {
+                'total_topics': len(topics),
+                'total_chunks': len(corpus),
+                'vocabulary_size': len(vocabulary),
+                'build_seconds': round(time.time() - started, 1),
+                'description': 'Topic -> chunks/episodes map from mini-batch k-means over chunk TF-IDF'
+            },
+            'topics': topics
+        }, f, indent=2, ensure_ascii=False)
+    return output_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline topic clustering of transcript chunks")
+    parser.add_argument('--build', action='store_true', help='Cluster the corpus and write the topic map')
+    parser.add_argument('--topics', type=int, default=NUM_TOPICS, help='Number of topics')
+    parser.add_argument('--episodes', type=int, default=3, help='Episodes to show per topic')
+    args = parser.parse_args()
+
+    if args.build:
+        print(f"Clustering chunks from {CORPUS_DIR} into {args.topics} topics...")
+        build_topics(k=args.topics)
+        print(f"✓ Created {TOPICS_DIR}/")
+
+    with open(TOPICS_DIR / TOPICS_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    meta = data['metadata']
+    print(f"\n{meta['total_topics']} topics over {meta['total_chunks']:,} chunks\n")
+    for topic in data['topics']:
+        episodes = ', '.join(e['episode_id'] for e in topic['episodes'][:args.episodes])
+        print(f"[{topic['topic_id']:>2}] {topic['label']} ({topic['num_chunks']} chunks)")
+        print(f"     terms: {' '.join(topic['top_terms'])}")
+        print(f"     top episodes: {episodes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Watch episodes/ and keep the knowledge base up to date as transcripts change.
+
+A long-running alternative to rerunning create_knowledge_base.py and
+split_knowledge_base.py by hand. Filesystem events come from inotify
+(Linux, through ctypes) or, where that is unavailable, from polling file
+mtimes. Events are debounced: a batch is processed once the directory has
+been quiet for DEBOUNCE_SECONDS (or MAX_DELAY_SECONDS after its first
+event, so a busy scraper cannot starve it).
+
+Only the affected episodes are re-parsed and re-chunked. knowledge_base.json,
+index.json, chunks_for_embeddings.json, episode_index.txt and the chunks/
+files are then rewritten from memory (chunks/ files only for the affected
+episodes, unless episodes were added or removed). An existing segment store
+(segment_store.py) gets the changed episodes as a new segment. Every file
+is written under a temporary name and swapped in with os.replace, so readers
+never see a half-written file. The derived indexes (corpus, lexical,
+embeddings, ...) still come from a full create_knowledge_base.py run.
+
+The watcher reports how far behind episodes/ it is in watch_status.json:
+the number of episodes with unprocessed changes, when the oldest of them
+happened (`oldest_pending_epoch`, so readers can compute the current lag;
+`--status` does), and how long the last batch took from first event to
+published files.
+
+Usage:
+    python3 watch_knowledge_base.py                 # watch episodes/ (catches up first)
+    python3 watch_knowledge_base.py --poll          # force the polling watcher
+    python3 watch_knowledge_base.py --once          # catch up and exit
+    python3 watch_knowledge_base.py --status        # print watch_status.json
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from create_knowledge_base import (CHUNK_OVERLAP, CHUNK_SIZE, EPISODES_DIR, OUTPUT_DIR, episode_chunks, load_episode,
+                                   write_episode_files)
+from records import Chunk, Episode, load
+from segment_store import SEGMENTS_DIR, MANIFEST_FILE as SEGMENTS_MANIFEST, SegmentStore, fingerprint
+from split_knowledge_base import split_episodes
+from token_chunking import DEFAULT_TOKENIZER, get_tokenizer
+
+# Configuration
+TRANSCRIPT_FILE = "transcript.md"
+STATUS_FILE = "watch_status.json"
+DEBOUNCE_SECONDS = 2.0
+MAX_DELAY_SECONDS = 30.0
+POLL_SECONDS = 1.0
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+DIRECTORY_EVENTS = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF
+FILE_EVENTS = IN_CLOSE_WRITE | IN_MODIFY | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+
+
+class PollingWatcher:
+    """Detect changed episode directories by comparing transcript (mtime, size) snapshots."""
+
+    name = "polling"
+
+    def __init__(self, episodes_dir: Path, interval: float = POLL_SECONDS):
+        self.episodes_dir = episodes_dir
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, tuple]:
+        snapshot = {}
+        for path in self.episodes_dir.glob(f"*/{TRANSCRIPT_FILE}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[path.parent.name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def changes(self, timeout: float) -> Optional[Set[str]]:
+        """Slugs changed since the last call (waits up to `timeout`)."""
+        time.sleep(min(timeout, self.interval))
+        current = self._scan()
+        changed = {slug for slug in current.keys() | self.snapshot.keys()
+                   if current.get(slug) != self.snapshot.get(slug)}
+        self.snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify on episodes/ and every episode directory, via libc."""
+
+    name = "inotify"
+
+    def __init__(self, episodes_dir: Path):
+        self.episodes_dir = episodes_dir
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, Optional[str]] = {}  # watch descriptor -> slug (None: episodes/ itself)
+        self._watch(episodes_dir, None, DIRECTORY_EVENTS)
+        for path in episodes_dir.iterdir():
+            if path.is_dir():
+                self._watch(path, path.name, FILE_EVENTS)
+
+    def _watch(self, path: Path, slug: Optional[str], mask: int):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if slug is None:
+                raise OSError(error, f"inotify_add_watch failed for {path}")
+            return  # the episode directory vanished again; its deletion event covers it
+        self.watches[wd] = slug
+
+    def changes(self, timeout: float) -> Optional[Set[str]]:
+        """Slugs with events (waits up to `timeout`); None if events were lost and a rescan is needed."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[str] = set()
+        overflow = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            slug = self.watches.get(wd, '')
+            if slug is None:
+                # An episode directory appeared or went away
+                if mask & IN_ISDIR:
+                    changed.add(name)
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # Watch it; a transcript written before the watch existed is caught by the event above
+                        self._watch(self.episodes_dir / name, name, FILE_EVENTS)
+            elif slug and name == TRANSCRIPT_FILE:
+                changed.add(slug)
+            elif slug and mask & IN_DELETE_SELF:
+                changed.add(slug)
+        return None if overflow else changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_watcher(episodes_dir: Path, poll: bool = False):
+    """inotify where available, polling otherwise."""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(episodes_dir)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); polling every {POLL_SECONDS:g}s")
+    return PollingWatcher(episodes_dir)
+
+
+class LiveKnowledgeBase:
+    """The knowledge base held in memory, updated one episode at a time."""
+
+    def __init__(self, episodes_dir: Path = EPISODES_DIR, output_dir: Path = OUTPUT_DIR,
+                 compact: bool = False, segments_dir: Path = SEGMENTS_DIR):
+        self.episodes_dir = episodes_dir
+        self.output_dir = output_dir
+        self.compact = compact
+        self.episodes: Dict[str, Episode] = {}
+        self.chunks: Dict[str, List[Chunk]] = {}
+        self.segments = SegmentStore(segments_dir) if (segments_dir / SEGMENTS_MANIFEST).exists() else None
+        self.last_batch: Dict[str, float] = {}
+        self.compaction: Optional[threading.Thread] = None
+        self.chunking = {'chunk_size': CHUNK_SIZE, 'chunk_overlap': CHUNK_OVERLAP}
+
+        kb_file = output_dir / "knowledge_base.json"
+        chunks_file = output_dir / "chunks_for_embeddings.json"
+        if kb_file.exists() and chunks_file.exists():
+            self.episodes = {ep.id: ep for ep in load(kb_file, episodes=Episode)['episodes']}
+            chunks = load(chunks_file, chunks=Chunk)
+            for chunk in chunks['chunks']:
+                self.chunks.setdefault(chunk.episode_id, []).append(chunk)
+            # Re-chunk changed episodes the way the existing files were built (characters or tokens)
+            self.chunking = {key: value for key, value in chunks['metadata'].items()
+                             if key in ('chunk_size', 'chunk_overlap', 'chunk_unit', 'tokenizer')}
+        self.tokenizer = get_tokenizer(self.chunking.get('tokenizer', DEFAULT_TOKENIZER))
+
+    def source_slugs(self) -> Set[str]:
+        return {path.parent.name for path in self.episodes_dir.glob(f"*/{TRANSCRIPT_FILE}")}
+
+    def update(self, slugs: Set[str]) -> Dict[str, List[str]]:
+        """Re-read the given episodes from disk; returns the ids added, edited and removed."""
+        changes = {'added': [], 'edited': [], 'removed': []}
+        for slug in sorted(slugs):
+            transcript_file = self.episodes_dir / slug / TRANSCRIPT_FILE
+            try:
+                episode = load_episode(transcript_file) if transcript_file.exists() else None
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"❌ Error: could not read {transcript_file}: {e}")
+                continue
+            previous = self.episodes.get(slug)
+            if episode is None:
+                if previous is not None:
+                    del self.episodes[slug]
+                    self.chunks.pop(slug, None)
+                    changes['removed'].append(slug)
+            elif previous is None or fingerprint(previous) != fingerprint(episode):
+                self.episodes[slug] = episode
+                self.chunks[slug] = episode_chunks(episode, self.chunking['chunk_size'], self.chunking['chunk_overlap'],
+                                                   self.chunking.get('chunk_unit', 'chars'), self.tokenizer)
+                changes['added' if previous is None else 'edited'].append(slug)
+        return changes
+
+    def publish(self, changes: Dict[str, List[str]]):
+        """Swap the updated artifacts into place."""
+        # create_knowledge_base.py processes transcripts in path order
+        episodes = [self.episodes[slug] for slug in sorted(self.episodes)]
+        all_chunks = [chunk for episode in episodes for chunk in self.chunks[episode.id]]
+        write_episode_files(episodes, all_chunks, self.output_dir, self.compact, verbose=False, chunking=self.chunking)
+
+        # Additions and removals renumber the chunk files; edits only touch their own
+        chunks_dir = self.output_dir / "chunks"
+        renumbered = bool(changes['added'] or changes['removed'])
+        index = split_episodes(episodes, chunks_dir, self.compact,
+                               only=None if renumbered else set(changes['edited']), verbose=False)
+        for stale in chunks_dir.glob("knowledge_base_chunk_*.json"):
+            if int(stale.stem.rsplit('_', 1)[1]) > index['metadata']['total_files']:
+                stale.unlink()
+
+        if self.segments is not None:
+            self.segments.add(self.episodes[slug] for slug in changes['added'] + changes['edited'])
+            self.segments.remove(changes['removed'])
+            # A running compaction picks up the rest of the plan on a later batch
+            compacting = self.compaction is not None and self.compaction.is_alive()
+            if not compacting and self.segments.compaction_plan():
+                self.compaction = self.segments.compact_in_background()
+
+    def process(self, slugs: Set[str]) -> Dict[str, List[str]]:
+        """update() then publish() if anything changed."""
+        changes = self.update(slugs)
+        if any(changes.values()):
+            self.publish(changes)
+        return changes
+
+    def write_status(self, watcher: str, pending: Dict[str, float]):
+        """Record how far behind episodes/ the published files are."""
+        now = time.time()
+        oldest = min(pending.values()) if pending else None
+        status = {
+            'watcher': watcher,
+            'updated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'episodes': len(self.episodes),
+            'pending_episodes': len(pending),
+            # The file is only rewritten on events and batches: lag now = time.time() - oldest_pending_epoch
+            'oldest_pending_epoch': round(oldest, 3) if oldest is not None else None,
+            'lag_seconds': round(now - oldest, 3) if oldest is not None else 0.0,
+            'last_batch': self.last_batch,
+        }
+        temporary = self.output_dir / f".{STATUS_FILE}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(status, f, indent=2)
+        os.replace(temporary, self.output_dir / STATUS_FILE)
+
+
+def watch(kb: LiveKnowledgeBase, watcher, once: bool = False):
+    """Catch up with episodes/, then process debounced batches of changes until interrupted."""
+    print(f"Catching up with {kb.episodes_dir} ({len(kb.episodes)} episodes loaded)...")
+    pending = {slug: time.time() for slug in kb.source_slugs() | set(kb.episodes)}
+    last_event = 0.0
+    while True:
+        now = time.time()
+        if pending and (now - last_event >= DEBOUNCE_SECONDS or now - min(pending.values()) >= MAX_DELAY_SECONDS):
+            kb.write_status(watcher.name, pending)  # the batch stays pending until it is published
+            started = time.time()
+            first_event = min(pending.values())
+            batch = set(pending)
+            pending.clear()
+            changes = kb.process(batch)
+            finished = time.time()
+            if any(changes.values()):
+                kb.last_batch = {
+                    'finished': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'added': len(changes['added']), 'edited': len(changes['edited']),
+                    'removed': len(changes['removed']),
+                    'processing_seconds': round(finished - started, 3),
+                    'lag_seconds': round(finished - first_event, 3),
+                }
+                print(f"✓ Updated {len(changes['added'])} added, {len(changes['edited'])} edited, "
+                      f"{len(changes['removed'])} removed in {finished - started:.2f}s "
+                      f"({finished - first_event:.2f}s after the first change)")
+            kb.write_status(watcher.name, pending)
+            if once:
+                return
+            continue
+
+        timeout = POLL_SECONDS if not pending else max(0.05, last_event + DEBOUNCE_SECONDS - now)
+        changed = watcher.changes(timeout)
+        if changed is None:
+            print("Event queue overflowed; rescanning episodes/")
+            changed = kb.source_slugs() | set(kb.episodes)
+        if changed:
+            now = time.time()
+            for slug in changed:
+                pending.setdefault(slug, now)
+            last_event = now
+            kb.write_status(watcher.name, pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the knowledge base up to date as episodes change")
+    parser.add_argument('--poll', action='store_true', help='Poll file mtimes instead of using inotify')
+    parser.add_argument('--once', action='store_true', help='Catch up with episodes/ and exit')
+    parser.add_argument('--status', action='store_true', help=f'Print {STATUS_FILE} and exit')
+    parser.add_argument('--compact', action='store_true', help='Write JSON without indentation (smaller, faster)')
+    parser.add_argument('--episodes', type=str, default=str(EPISODES_DIR), help='Episodes directory to watch')
+    parser.add_argument('--dir', type=str, default=None, help='Override knowledge base directory path')
+    parser.add_argument('--segments', type=str, default=str(SEGMENTS_DIR),
+                        help='Segment store to update, if it exists')
+    args = parser.parse_args()
+
+    output_dir = Path(args.dir) if args.dir else OUTPUT_DIR
+    if args.status:
+        try:
+            with open(output_dir / STATUS_FILE, 'r', encoding='utf-8') as f:
+                status = json.load(f)
+            if status.get('oldest_pending_epoch') is not None:
+                status['lag_seconds'] = round(time.time() - status['oldest_pending_epoch'], 3)
+            print(json.dumps(status, indent=2))
+        except FileNotFoundError:
+            print(f"❌ Error: {output_dir / STATUS_FILE} not found (is the watcher running?)")
+            sys.exit(1)
+        return
+
+    episodes_dir = Path(args.episodes)
+    if not episodes_dir.is_dir():
+        print(f"❌ Error: {episodes_dir} is not a directory")
+        sys.exit(1)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    kb = LiveKnowledgeBase(episodes_dir, output_dir, args.compact, Path(args.segments))
+    watcher = open_watcher(episodes_dir, args.poll)
+    if not args.once:
+        print(f"Watching {episodes_dir} ({watcher.name}); Ctrl+C to stop")
+    try:
+        watch(kb, watcher, args.once)
+    except KeyboardInterrupt:
+        print("\nStopped")
+    finally:
+        watcher.close()
+        if kb.compaction is not None:
+            kb.compaction.join()
+
+
+if __name__ == "__main__":
+    main()